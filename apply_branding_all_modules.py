@@ -9,11 +9,13 @@ Usage:
 """
 
 import re
-import ast
 import shutil
 from pathlib import Path
 from datetime import datetime
 
+from build_tools.metadata import read_chart_metadata
+from build_tools.trace import span, traced
+
 
 GITHUB_BASE = "https://github.com/QuantLet/NeuralNetworks/tree/main"
 
@@ -21,18 +23,8 @@ GITHUB_BASE = "https://github.com/QuantLet/NeuralNetworks/tree/main"
 def extract_metadata_from_chart(py_file):
     """Extract CHART_METADATA URL from a chart Python file."""
     try:
-        with open(py_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        pattern = r'CHART_METADATA\s*=\s*(\{[^}]+\})'
-        match = re.search(pattern, content, re.DOTALL)
-
-        if match:
-            dict_str = match.group(1)
-            metadata = ast.literal_eval(dict_str)
-            return metadata.get('url', '')
-        return ''
-    except Exception:
+        return read_chart_metadata(py_file).get('url', '')
+    except OSError:
         return ''
 
 
@@ -199,6 +191,7 @@ def process_tex_file(tex_file, module_name):
     return branding_count
 
 
+@traced('apply_branding_all_modules')
 def main():
     """Process all module .tex files."""
     project_root = Path(__file__).parent
@@ -218,17 +211,17 @@ def main():
 
     for module_name, tex_filename in modules:
         tex_file = project_root / module_name / tex_filename
-        if tex_file.exists():
-            total_branded += process_tex_file(tex_file, module_name)
-        else:
+        if not tex_file.exists():
             # Try to find latest .tex file in the module
             module_dir = project_root / module_name
             tex_files = sorted(module_dir.glob('*.tex'))
             tex_files = [f for f in tex_files if 'template' not in f.name.lower()]
-            if tex_files:
-                total_branded += process_tex_file(tex_files[-1], module_name)
-            else:
+            if not tex_files:
                 print(f"\n[SKIP] No .tex file found in {module_name}")
+                continue
+            tex_file = tex_files[-1]
+        with span(module_name, 'branding'):
+            total_branded += process_tex_file(tex_file, module_name)
 
     print(f"\n{'='*60}")
     print(f"COMPLETE: Added branding to {total_branded} frames total")
@@ -0,0 +1,12 @@
+"""Chart Build Pipeline Package"""
+
+__all__ = ['build_charts', 'find_chart_scripts', 'print_report']
+
+
+def __getattr__(name):
+    # Imported lazily so that `python -m build_tools.<module>` does not load
+    # the runner (and everything it imports) before the module itself.
+    if name in __all__:
+        from . import runner
+        return getattr(runner, name)
+    raise AttributeError(f"module 'build_tools' has no attribute {name!r}")
@@ -0,0 +1,290 @@
+"""
+Chart Preview Assets
+
+Web-sized copies of the 300-dpi chart PNGs, for consumers that do not need
+the full-resolution master (docs pages, QuantLet sync).
+
+For every chart PNG in the chart index, one preview per configured width
+("preview_widths" in build_config.json, e.g. 1600 and 800 px) is written to
+previews/<chart dir>/<name>_<width>.png:
+- previews are only ever downscaled (a narrower master is used as is)
+- fully opaque images are stored without alpha channel
+- with "preview_colors" > 0 they are reduced to a palette of that size
+- PNGs are written with optimize=True
+
+previews/manifest.json lists every tier ("full" = the master itself) with
+its path, pixel size and byte size, so consumers pick a tier by name. A
+preview is rebuilt only when the hash of its master PNG changes.
+
+previews/ is a build product and is gitignored. Before pointing docs/ at a
+preview tier with --docs, add that tier's files with ``git add -f``. The
+raw.githubusercontent URLs only resolve for committed files.
+
+Usage:
+    python -m build_tools.assets               # build previews + manifest
+    python -m build_tools.assets --force       # rebuild every preview
+    python -m build_tools.assets --docs 1600   # point docs/*.md images at a tier
+
+    from build_tools.assets import load_manifest, pick_tier
+
+    manifest = load_manifest()
+    path = pick_tier(manifest, chart.output('.png'), '800')
+"""
+
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .cache import file_digest
+from .config import PROJECT_ROOT, load_config, resolve_jobs
+from .registry import load_index
+
+
+PREVIEW_DIR_NAME = 'previews'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+FULL_TIER = 'full'
+
+# raw.githubusercontent.com/<owner>/<repo>/<branch>/<path>.png
+RAW_URL = re.compile(r'(https://raw\.githubusercontent\.com/[^/\s]+/[^/\s]+/[^/\s]+/)([^"\')\s]+\.png)')
+
+
+def preview_dir(project_root=PROJECT_ROOT):
+    return Path(project_root) / PREVIEW_DIR_NAME
+
+
+def load_manifest(project_root=PROJECT_ROOT):
+    """Load previews/manifest.json (empty manifest if missing or outdated)."""
+    path = preview_dir(project_root) / MANIFEST_NAME
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'tiers': [FULL_TIER], 'assets': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'tiers': [FULL_TIER], 'assets': {}}
+    return manifest
+
+
+def save_manifest(manifest, project_root=PROJECT_ROOT):
+    """Write the manifest atomically."""
+    path = preview_dir(project_root) / MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def make_preview(master, dest, width, colors=256):
+    """
+    Write a downscaled, compressed copy of ``master`` to ``dest``.
+
+    Returns
+    -------
+    size : tuple of int
+        (width, height) of the preview
+    """
+    from PIL import Image
+
+    with Image.open(master) as image:
+        image.load()
+    height = max(1, round(image.height * width / image.width))
+    preview = image.resize((width, height), Image.LANCZOS)
+
+    if preview.mode == 'RGBA' and preview.getextrema()[3] == (255, 255):
+        preview = preview.convert('RGB')
+    if colors:
+        method = Image.Quantize.MEDIANCUT if preview.mode == 'RGB' else Image.Quantize.FASTOCTREE
+        preview = preview.quantize(colors, method=method, dither=Image.Dither.NONE)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    preview.save(dest, 'PNG', optimize=True)
+    return preview.size
+
+
+def _tier_info(path, project_root, size):
+    return {
+        'path': path.relative_to(project_root).as_posix(),
+        'width': size[0],
+        'height': size[1],
+        'bytes': path.stat().st_size,
+    }
+
+
+def _build_asset(master, old, project_root, widths, colors, force):
+    """Return the manifest entry of one master PNG, rebuilding stale previews."""
+    from PIL import Image
+
+    rel_master = master.relative_to(project_root)
+    digest = file_digest(master)
+
+    tier_names = {FULL_TIER} | {str(width) for width in widths}
+    if (old and not force and old.get('sha256') == digest and old.get('colors') == colors
+            and set(old['tiers']) == tier_names
+            and all((project_root / info['path']).exists() for info in old['tiers'].values())):
+        return old, False
+
+    with Image.open(master) as image:
+        master_size = image.size
+
+    tiers = {FULL_TIER: _tier_info(master, project_root, master_size)}
+    for width in widths:
+        if width >= master_size[0]:
+            tiers[str(width)] = tiers[FULL_TIER]
+            continue
+        dest = (preview_dir(project_root) / rel_master.parent
+                / f"{master.stem}_{width}.png")
+        size = make_preview(master, dest, width, colors)
+        tiers[str(width)] = _tier_info(dest, project_root, size)
+
+    entry = {'sha256': digest, 'colors': colors, 'tiers': tiers}
+    return entry, True
+
+
+def build_previews(project_root=PROJECT_ROOT, widths=None, colors=None, force=False, jobs=None):
+    """
+    Bring previews and manifest up to date with the chart PNGs.
+
+    Returns
+    -------
+    manifest : dict
+    rebuilt : list of str
+        Masters (relative paths) whose previews were written
+    """
+    project_root = Path(project_root).resolve()
+    config = load_config()
+    widths = sorted(config['preview_widths'] if widths is None else widths, reverse=True)
+    colors = config['preview_colors'] if colors is None else colors
+    jobs = resolve_jobs(config['jobs'] if jobs is None else jobs)
+
+    index = load_index(project_root)
+    masters = [chart.output('.png') for chart in index.charts()]
+    masters = [png for png in masters if png is not None]
+
+    old_manifest = load_manifest(project_root)
+    old_assets = old_manifest['assets']
+
+    def build(master):
+        key = master.relative_to(project_root).as_posix()
+        return key, _build_asset(master, old_assets.get(key), project_root, widths, colors, force)
+
+    # Pillow releases the GIL while resizing and encoding
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(build, masters))
+
+    assets = {key: entry for key, (entry, _) in results}
+    rebuilt = [key for key, (_, changed) in results if changed]
+
+    # Drop previews of charts that no longer exist (or of dropped widths)
+    keep = {info['path'] for entry in assets.values() for info in entry['tiers'].values()}
+    for entry in old_assets.values():
+        for info in entry['tiers'].values():
+            path = project_root / info['path']
+            if info['path'] not in keep and path.is_relative_to(preview_dir(project_root)):
+                path.unlink(missing_ok=True)
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'tiers': [FULL_TIER] + [str(w) for w in widths],
+        'assets': assets,
+    }
+    if manifest != old_manifest:
+        save_manifest(manifest, project_root)
+    return manifest, rebuilt
+
+
+def pick_tier(manifest, png, tier, project_root=PROJECT_ROOT):
+    """
+    Path of the requested tier of a chart PNG.
+
+    Falls back to the master itself if the PNG or tier is not in the manifest.
+    """
+    project_root = Path(project_root)
+    png = Path(png)
+    try:
+        key = png.resolve().relative_to(project_root.resolve()).as_posix()
+    except ValueError:
+        return png
+    entry = manifest['assets'].get(key)
+    if entry is None or str(tier) not in entry['tiers']:
+        return png
+    return project_root / entry['tiers'][str(tier)]['path']
+
+
+def tier_bytes(manifest, tier):
+    """Total size in bytes of one tier over all assets."""
+    return sum(entry['tiers'][tier]['bytes'] for entry in manifest['assets'].values()
+               if tier in entry['tiers'])
+
+
+def rewrite_docs(manifest, tier, project_root=PROJECT_ROOT):
+    """
+    Point raw.githubusercontent image URLs in docs/*.md at ``tier``.
+
+    URLs of any tier of a known chart PNG are rewritten, so switching
+    between tiers (including back to "full") works both ways.
+
+    Returns
+    -------
+    changed : list of Path
+        Rewritten markdown files
+    """
+    targets = {}
+    for entry in manifest['assets'].values():
+        if tier not in entry['tiers']:
+            continue
+        for info in entry['tiers'].values():
+            targets[info['path']] = entry['tiers'][tier]['path']
+
+    def replace(match):
+        return match.group(1) + targets.get(match.group(2), match.group(2))
+
+    changed = []
+    for md_file in sorted((Path(project_root) / 'docs').glob('*.md')):
+        text = md_file.read_text(encoding='utf-8')
+        new_text = RAW_URL.sub(replace, text)
+        if new_text != text:
+            md_file.write_text(new_text, encoding='utf-8')
+            changed.append(md_file)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build web-sized chart PNG previews')
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild every preview')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='previews built at the same time (default: build_config.json)')
+    parser.add_argument('--docs', metavar='TIER', default=None,
+                        help="rewrite docs/*.md chart images to a tier (e.g. 1600, 'full')")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Building chart previews")
+    print("=" * 60)
+
+    manifest, rebuilt = build_previews(force=args.force, jobs=args.jobs)
+    for key in rebuilt:
+        print(f"  [OK] {key}")
+
+    print(f"\nMasters: {len(manifest['assets'])} ({len(rebuilt)} rebuilt)")
+    full_size = tier_bytes(manifest, FULL_TIER)
+    for tier in manifest['tiers']:
+        size = tier_bytes(manifest, tier)
+        share = 100.0 * size / full_size if full_size else 0.0
+        print(f"  {tier:>5}: {size / 1e6:7.1f} MB ({share:.0f}% of full)")
+
+    if args.docs:
+        if args.docs not in manifest['tiers']:
+            parser.error(f"unknown tier {args.docs!r} (available: {', '.join(manifest['tiers'])})")
+        for md_file in rewrite_docs(manifest, args.docs):
+            print(f"  [UPDATED] {md_file.name}")
+
+
+if __name__ == '__main__':
+    main()
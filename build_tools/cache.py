@@ -0,0 +1,225 @@
+"""
+Incremental Chart Build Cache
+
+A chart is rebuilt only when something that can change its output changed:
+the chart script, the shared chart_helpers package (for charts importing
+it), the branding config, the logo/QR images, the rasterization policy
+(build_tools.rasterize), the source date epoch (build_tools.reproducible)
+or the installed numpy/matplotlib versions. Keys are content hashes, so
+touching a file without editing it does not invalidate the cache.
+
+Usage:
+    from build_tools.cache import ChartCache
+
+    cache = ChartCache()
+    if not cache.is_fresh(py_file):
+        ...  # build the chart
+        cache.record(py_file, find_outputs(py_file.parent))
+    cache.save()
+"""
+
+import hashlib
+import json
+import os
+import platform
+import threading
+from importlib import metadata
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .config import PROJECT_ROOT
+from .rasterize import policy_fingerprint
+from .reproducible import source_date_epoch
+
+
+CACHE_PATH = PROJECT_ROOT / '.build' / 'chart_cache.json'
+BRANDING_CONFIG = PROJECT_ROOT / 'quantlet_tools' / 'utils' / 'branding_config.json'
+LOGO_DIR = PROJECT_ROOT / 'quantlet_tools' / 'logo'
+HELPERS_DIR = PROJECT_ROOT / 'chart_helpers'
+
+OUTPUT_SUFFIXES = ('.pdf', '.png')
+PINNED_PACKAGES = ('numpy', 'matplotlib')
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's content."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def environment_fingerprint():
+    """Versions that affect rendering (read from package metadata, no imports)."""
+    versions = [f"python={platform.python_version()}"]
+    for package in PINNED_PACKAGES:
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=missing")
+    return ';'.join(versions)
+
+
+def shared_inputs():
+    """Input files every chart depends on (branding config and logos)."""
+    inputs = []
+    if BRANDING_CONFIG.exists():
+        inputs.append(BRANDING_CONFIG)
+    if LOGO_DIR.exists():
+        inputs.extend(sorted(p for p in LOGO_DIR.iterdir() if p.is_file()))
+    return inputs
+
+
+def helper_files():
+    """Modules of the shared chart_helpers package."""
+    return sorted(HELPERS_DIR.glob('*.py')) if HELPERS_DIR.is_dir() else []
+
+
+def uses_helpers(py_file):
+    """True if a chart script imports the chart_helpers package."""
+    try:
+        return 'chart_helpers' in Path(py_file).read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return False
+
+
+def chart_inputs(py_file):
+    """Input files of one chart: its script, its QR code (if any) and the helpers it imports."""
+    py_file = Path(py_file)
+    inputs = [py_file]
+    qr_path = py_file.parent / 'qr_code.png'
+    if qr_path.exists():
+        inputs.append(qr_path)
+    if uses_helpers(py_file):
+        inputs.extend(helper_files())
+    return inputs
+
+
+def find_outputs(chart_dir, since=None):
+    """
+    Return the PDF/PNG files a chart wrote into its folder.
+
+    If ``since`` (a timestamp) is given, only files modified at or after it
+    are returned. The QR code is an input, never an output.
+    """
+    outputs = []
+    for path in sorted(Path(chart_dir).iterdir()):
+        if path.suffix not in OUTPUT_SUFFIXES or path.name == 'qr_code.png':
+            continue
+        if since is not None and path.stat().st_mtime < since:
+            continue
+        outputs.append(path)
+    return outputs
+
+
+def relative_key(path, project_root=PROJECT_ROOT):
+    """Path relative to the project root, used as cache entry name."""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(Path(project_root).resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+class ChartCache:
+    """Content-addressed record of which chart outputs are up to date."""
+
+    def __init__(self, cache_path=CACHE_PATH, project_root=PROJECT_ROOT):
+        self.cache_path = Path(cache_path)
+        self.project_root = Path(project_root)
+        self._lock = threading.Lock()
+        self._environment = environment_fingerprint()
+        self._shared_digest = None
+        self._changes = {}
+        self.entries = self._load()
+
+    def _load(self):
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('environment') != self._environment:
+            # numpy/matplotlib upgrade: every chart may render differently
+            return {}
+        return data.get('charts', {})
+
+    def save(self):
+        """
+        Write the cache atomically.
+
+        Only the charts recorded or invalidated by this process are written
+        over what is on disk, so builds running side by side (build_tools.
+        workqueue) do not drop each other's entries.
+        """
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        with self._lock, open(self.cache_path.with_suffix('.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._load()
+            for name, entry in self._changes.items():
+                if entry is None:
+                    entries.pop(name, None)
+                else:
+                    entries[name] = entry
+            self.entries.update(entries)
+            data = {'environment': self._environment, 'charts': entries}
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.cache_path)
+
+    def shared_digest(self):
+        """Digest of the inputs shared by all charts (computed once per run)."""
+        if self._shared_digest is None:
+            h = hashlib.sha256(self._environment.encode())
+            h.update(policy_fingerprint().encode())
+            h.update(str(source_date_epoch()).encode())
+            for path in shared_inputs():
+                h.update(path.name.encode())
+                h.update(file_digest(path).encode())
+            self._shared_digest = h.hexdigest()
+        return self._shared_digest
+
+    def key(self, py_file):
+        """Cache key of a chart: hash of its own inputs plus the shared inputs."""
+        h = hashlib.sha256(self.shared_digest().encode())
+        for path in chart_inputs(py_file):
+            h.update(path.name.encode())
+            h.update(file_digest(path).encode())
+        return h.hexdigest()
+
+    def is_fresh(self, py_file):
+        """True if the chart's inputs are unchanged and all its outputs still exist."""
+        entry = self.entries.get(relative_key(py_file, self.project_root))
+        if not entry or not entry.get('outputs'):
+            return False
+        chart_dir = Path(py_file).parent
+        if not all((chart_dir / name).exists() for name in entry['outputs']):
+            return False
+        return entry['key'] == self.key(py_file)
+
+    def record(self, py_file, outputs):
+        """Remember that ``py_file`` built ``outputs`` from its current inputs."""
+        entry = {
+            'key': self.key(py_file),
+            'outputs': sorted(Path(p).name for p in outputs),
+        }
+        name = relative_key(py_file, self.project_root)
+        with self._lock:
+            self.entries[name] = entry
+            self._changes[name] = entry
+
+    def invalidate(self, py_file):
+        """Forget a chart so that it is rebuilt next time."""
+        name = relative_key(py_file, self.project_root)
+        with self._lock:
+            self.entries.pop(name, None)
+            self._changes[name] = None
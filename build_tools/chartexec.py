@@ -0,0 +1,221 @@
+"""
+In-Process Chart Execution
+
+Runs a chart script inside an already warm interpreter, as if it had been
+started with ``python <chart>.py`` from its own folder:
+- fresh module namespace per run (runpy, run_name='__main__'); plugin
+  charts (build_tools.plugins) are imported and their build() is called
+  with the configured formats and dpi instead
+- cwd, sys.argv and sys.path (chart folder, then the project root for
+  chart_helpers) set for the chart and restored afterwards; modules imported from the chart folder or chart_helpers are dropped, so
+  the next run sees edits to them
+- stdout/stderr captured
+- all figures closed and matplotlib rcParams reset after the run
+- optionally reproducible (build_tools.reproducible): pinned metadata,
+  SOURCE_DATE_EPOCH and per-chart RNG seeds
+- optionally under address-space and CPU limits (build_tools.memory); the
+  peak memory of the run is always reported
+
+It is also the bootstrap of the subprocess backend when a chart needs any
+of the savefig hooks, profiling, reproducible mode, lazy imports
+(build_tools.lazy) or resource limits. The run information (profile, peak
+memory, written/unchanged outputs) is then written as JSON to --info-out:
+
+    python -m build_tools.chartexec [--export-hook] [--skip-unchanged]
+                                    [--reproducible] [--profile] [--lazy-imports]
+                                    [--limits] [--info-out FILE] chart.py
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import runpy
+import sys
+import traceback
+from pathlib import Path
+
+from .config import PROJECT_ROOT
+from .plugins import is_plugin, run_plugin
+from .trace import span
+
+
+def reset_matplotlib():
+    """Close all figures and restore rcParams to the matplotlibrc defaults."""
+    if 'matplotlib.pyplot' not in sys.modules:
+        return
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    plt.close('all')
+    matplotlib.rc_file_defaults()
+
+
+def _drop_local_modules(chart_dir, before):
+    """Forget modules imported from the chart folder or chart_helpers during the run."""
+    local = (str(chart_dir), str(PROJECT_ROOT / 'chart_helpers'))
+    for name in set(sys.modules) - before:
+        module_file = getattr(sys.modules[name], '__file__', None) or ''
+        if module_file.startswith(local):
+            del sys.modules[name]
+
+
+def run_chart_script(py_file, profiler=None, reproducible=False):
+    """
+    Execute a chart script in this process.
+
+    Parameters
+    ----------
+    py_file : Path
+    profiler : ChartProfiler, optional
+        Measures the run (see build_tools.profiling)
+    reproducible : bool, optional
+        Run under build_tools.reproducible.chart_run
+
+    Returns
+    -------
+    ok : bool
+        True if the script finished without an exception (or with exit code 0)
+    output : str
+        Captured stdout/stderr, including the traceback on failure
+    """
+    py_file = Path(py_file).resolve()
+    chart_dir = py_file.parent
+
+    saved_cwd = os.getcwd()
+    saved_argv = sys.argv[:]
+    saved_path = sys.path[:]
+    modules_before = set(sys.modules)
+
+    buffer = io.StringIO()
+    ok = True
+
+    try:
+        os.chdir(chart_dir)
+        sys.argv = [py_file.name]
+        sys.path[:0] = [str(chart_dir), str(PROJECT_ROOT)]
+        measure = profiler.measure() if profiler is not None else contextlib.nullcontext()
+        pinned = contextlib.nullcontext()
+        if reproducible:
+            from .reproducible import chart_run
+            pinned = chart_run(py_file)
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer), pinned, measure:
+            try:
+                if is_plugin(py_file):
+                    run_plugin(py_file, chart_dir)
+                else:
+                    runpy.run_path(str(py_file), run_name='__main__')
+            except SystemExit as e:
+                ok = e.code in (None, 0)
+            except BaseException:
+                traceback.print_exc()
+                ok = False
+    finally:
+        reset_matplotlib()
+        _drop_local_modules(chart_dir, modules_before)
+        sys.path[:] = saved_path
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+
+    return ok, buffer.getvalue()
+
+
+def install_hooks(export_hook=False, skip_unchanged=False, rasterize=False):
+    """Install the process-wide savefig hooks a chart build asks for."""
+    if export_hook:
+        from . import export
+        export.install()
+    if rasterize:
+        # Inside the unchanged-output guard, so it compares the final bytes
+        from . import rasterize as rasterizing
+        rasterizing.install(**rasterizing.config_settings())
+    if skip_unchanged:
+        from . import outputs
+        outputs.install()
+
+
+def run_chart_job(py_file, profile=False, reproducible=False, limits=(0, 0)):
+    """
+    Run a chart with the per-run options of a build job.
+
+    Parameters
+    ----------
+    limits : tuple
+        (address space MB, CPU seconds) the run may use (0 = unlimited),
+        see build_tools.memory.job_limits
+
+    Returns
+    -------
+    ok : bool
+    output : str
+    info : dict
+        'peak_rss_mb', 'profile' (with ``profile``) and 'outputs'
+        ({'written': [...], 'unchanged': [...]}, when the unchanged-output
+        guard is installed)
+    """
+    from . import outputs
+    from .memory import job_limits
+    from .profiling import peak_rss_mb, reset_peak_rss
+
+    profiler = None
+    if profile:
+        from .profiling import ChartProfiler
+        profiler = ChartProfiler()
+
+    outputs.take_log()
+    reset_peak_rss()
+    with job_limits(*limits), span(Path(py_file).stem, 'chart-run') as traced:
+        ok, output = run_chart_script(py_file, profiler, reproducible)
+        traced['ok'] = ok
+
+    info = {'peak_rss_mb': round(peak_rss_mb(), 1)}
+    if profiler is not None:
+        info['profile'] = profiler.result()
+    if outputs.is_installed():
+        info['outputs'] = outputs.take_log()
+    return ok, output, info
+
+
+def main():
+    """Run one chart in this (fresh) process for the subprocess backend."""
+    parser = argparse.ArgumentParser(description='Run a chart script')
+    parser.add_argument('script')
+    parser.add_argument('--export-hook', action='store_true',
+                        help='Install build_tools.export before running the chart')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help='Leave unchanged outputs untouched (build_tools.outputs)')
+    parser.add_argument('--rasterize', action='store_true',
+                        help='Rasterize dense layers of vector outputs (build_tools.rasterize)')
+    parser.add_argument('--reproducible', action='store_true',
+                        help='Pin metadata, SOURCE_DATE_EPOCH and RNG seeds (build_tools.reproducible)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Measure the run (build_tools.profiling)')
+    parser.add_argument('--lazy-imports', action='store_true',
+                        help='Import the "lazy_imports" of build_config.json lazily (build_tools.lazy)')
+    parser.add_argument('--limits', action='store_true',
+                        help='Apply "memory_limit_mb" and "cpu_limit" of build_config.json')
+    parser.add_argument('--info-out', metavar='FILE',
+                        help='Write the run information (JSON) to FILE')
+    args = parser.parse_args()
+
+    if args.lazy_imports:
+        from .config import load_config
+        from .lazy import install
+        install(load_config().get('lazy_imports', []))
+    install_hooks(args.export_hook, args.skip_unchanged, args.rasterize)
+    limits = (0, 0)
+    if args.limits:
+        from .memory import config_limits
+        limits = config_limits()
+    ok, output, info = run_chart_job(args.script, args.profile, args.reproducible, limits)
+    sys.stdout.write(output)
+
+    if args.info_out:
+        with open(args.info_out, 'w') as f:
+            json.dump(info, f)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Build Configuration
+
+Settings for the chart build pipeline are read from build_tools/build_config.json.
+
+- jobs: charts built at the same time (0 = one per CPU core)
+- timeout: per-chart timeout in seconds for charts without build history
+- timeout_min / timeout_max / timeout_factor / timeout_history: learned
+  per-chart time budgets (build_tools.timeouts)
+- retries / retry_backoff: reruns of charts that timed out or crashed, and
+  the first wait before them in seconds (doubled per retry)
+- memory_budget_mb / memory_default_mb: memory the charts of a build may use
+  at once (0 = 80% of available memory) and the peak assumed for charts
+  without history (build_tools.memory)
+- memory_limit_mb / cpu_limit: address space (MB, on top of the process's
+  own) and CPU seconds each chart job may use (0 = unlimited)
+- queue_lease / queue_heartbeat / queue_poll: leases, their renewal and the
+  idle polling of the shared build queue (build_tools.workqueue)
+- backend: "warm" (preloaded worker pool) or "subprocess" (fresh python per chart)
+- worker_max_jobs / worker_max_rss_mb: when a warm worker is recycled
+- preload: modules imported once by every warm worker
+- lazy_imports: modules chart processes import lazily, on first use
+  (build_tools.lazy); preloaded ones then cost nothing until a chart needs them
+- export_hook: measure a figure's tight bbox once for all its savefig calls
+  (build_tools.export)
+- reproducible: byte-reproducible outputs (build_tools.reproducible)
+- source_date_epoch: fixed PDF creation date of reproducible builds (Unix
+  time; the SOURCE_DATE_EPOCH environment variable overrides it)
+- skip_unchanged: leave outputs that render the same untouched (build_tools.outputs)
+- rasterize / rasterize_threshold / rasterize_dpi: draw artists with more than
+  this many vertices or points as images at this dpi in vector outputs, text
+  and axes staying vector (build_tools.rasterize; CHART_METADATA can override)
+- rasterize_if_smaller: write the rasterized version only when it is smaller
+- export_formats: {format: dpi} written by build_tools.export.save_figure
+- preview_widths / preview_colors: web-sized PNG tiers (build_tools.assets)
+- sync_png_tier: PNG tier shipped by sync_to_quantlet.py ("full" = 300-dpi master)
+- store_dir / store_budget_mb: shared artifact store (build_tools.store; null =
+  $NN_ARTIFACT_STORE or ~/.cache) and its LRU size budget
+- store_outputs: keep chart outputs in the store and restore them instead of
+  rebuilding a chart whose inputs were already built in any checkout
+- gc_archive: glob patterns of untracked files ``build_tools.store gc`` moves
+  into the store (git-tracked files are never archived)
+- watch_interval / watch_debounce: polling period and quiet time of build_tools.watch
+- profile_history: profiled builds kept in .build/profiles/
+- profile_regression_pct / profile_min_seconds / profile_min_mb: when a chart
+  counts as slower or larger than in the previous profiled build
+- history / history_runs: record every pipeline run in .build/history.sqlite
+  (build_tools.history) and how many runs are kept
+- history_baseline / history_min_kb: builds the latest one is compared with in
+  the history dashboard, and the smallest output growth flagged there
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_config(config_path=None):
+    """Load build configuration from config file."""
+    if config_path is None:
+        config_path = Path(__file__).parent / 'build_config.json'
+    else:
+        config_path = Path(config_path)
+
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+
+def resolve_jobs(jobs):
+    """Turn a configured job count into a usable worker count (0 = all cores)."""
+    if not jobs or jobs < 1:
+        return os.cpu_count() or 1
+    return jobs
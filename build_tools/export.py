@@ -0,0 +1,187 @@
+"""
+Figure Export
+
+Saves one figure in several formats from a single layout pass.
+
+``savefig(..., bbox_inches='tight')`` draws the whole figure once just to
+measure it and then draws it again to write the file, so the usual
+PDF + PNG pair costs four draws. Here the tight bounding box is computed
+once and handed to every save as an explicit box, leaving one draw per
+output file.
+
+Two ways to use it:
+- ``save_figure(fig, stem)`` writes all configured formats (build_config.json
+  "export_formats", format -> dpi) for code that knows about build_tools
+- ``install()`` patches ``Figure.savefig`` so existing chart scripts that
+  call ``plt.savefig`` once per format reuse the measured box, as long as
+  the figure was not modified in between. The chart build installs it in
+  every worker (config "export_hook").
+
+Usage:
+    from build_tools.export import save_figure
+
+    paths = save_figure(fig, 'loss_landscape_3d')
+
+    # Run a chart script with the hook installed
+    python -m build_tools.export chart.py
+"""
+
+import contextlib
+import runpy
+import sys
+from pathlib import Path
+
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.layout_engine import PlaceHolderLayoutEngine
+
+from .config import load_config
+
+
+_original_savefig = Figure.savefig
+
+
+@contextlib.contextmanager
+def _layout_done(fig):
+    """
+    Skip the layout pre-draw savefig does when a figure has a layout engine.
+
+    The layout has already been executed while measuring the figure, which
+    is also what savefig itself relies on after its own pre-draw.
+    """
+    engine = fig.get_layout_engine()
+    fig._layout_engine = None
+    try:
+        yield
+    finally:
+        fig._layout_engine = engine
+
+
+def tight_bbox(fig, dpi, pad_inches=None, bbox_extra_artists=None):
+    """
+    Measure the tight bounding box of a figure at the given dpi.
+
+    Runs the figure's layout engine (if any) once, like savefig does.
+
+    Returns
+    -------
+    bbox : Bbox
+        Padded bounding box in inches, to pass as ``bbox_inches``
+    """
+    if pad_inches in (None, 'layout'):
+        pad_inches = matplotlib.rcParams['savefig.pad_inches']
+
+    figure_dpi = fig.dpi
+    fig.dpi = dpi
+    try:
+        fig.draw_without_rendering()
+        bbox = fig.get_tightbbox(bbox_extra_artists=bbox_extra_artists)
+    finally:
+        fig.dpi = figure_dpi
+    return bbox.padded(pad_inches).frozen()
+
+
+def export_formats(formats=None, dpi=None):
+    """Normalise a format list/dict to {format: dpi} (defaults from build_config.json)."""
+    if formats is None:
+        formats = load_config().get('export_formats', {'pdf': 300, 'png': 300})
+    if isinstance(formats, str):
+        formats = [formats]
+    if not isinstance(formats, dict):
+        formats = {fmt: dpi for fmt in formats}
+    return {fmt.lstrip('.'): (dpi or fmt_dpi or matplotlib.rcParams['savefig.dpi'])
+            for fmt, fmt_dpi in formats.items()}
+
+
+def save_figure(fig, stem, formats=None, dpi=None, pad_inches=None, **savefig_kwargs):
+    """
+    Save ``fig`` as ``<stem>.<format>`` for every requested format.
+
+    Parameters
+    ----------
+    fig : Figure
+    stem : str or Path
+        Output path without suffix
+    formats : list of str or dict, optional
+        Formats to write, or a {format: dpi} mapping. Defaults to
+        "export_formats" in build_config.json.
+    dpi : float, optional
+        Resolution for every format (overrides per-format values)
+    pad_inches : float, optional
+        Padding around the tight bounding box
+    **savefig_kwargs
+        Passed on to ``Figure.savefig`` (e.g. facecolor)
+
+    Returns
+    -------
+    paths : list of Path
+        Written files, in format order
+    """
+    formats = export_formats(formats, dpi)
+    bbox = tight_bbox(fig, max(formats.values()), pad_inches)
+
+    paths = []
+    with _layout_done(fig):
+        for fmt, fmt_dpi in formats.items():
+            path = Path(f"{stem}.{fmt}")
+            _original_savefig(fig, path, format=fmt, dpi=fmt_dpi,
+                              bbox_inches=bbox, **savefig_kwargs)
+            paths.append(path)
+    return paths
+
+
+def _reusable_layout(fig):
+    """True if a measured box stays valid until the figure is modified."""
+    engine = fig.get_layout_engine()
+    return engine is None or isinstance(engine, PlaceHolderLayoutEngine)
+
+
+def _savefig(fig, fname, *args, **kwargs):
+    """Figure.savefig replacement that measures an unchanged figure only once."""
+    bbox_inches = kwargs.get('bbox_inches', matplotlib.rcParams['savefig.bbox'])
+    if bbox_inches != 'tight' or args or kwargs.get('bbox_extra_artists') \
+            or not _reusable_layout(fig):
+        return _original_savefig(fig, fname, *args, **kwargs)
+
+    dpi = kwargs.get('dpi') or matplotlib.rcParams['savefig.dpi']
+    if dpi == 'figure':
+        dpi = fig.dpi
+    pad_inches = kwargs.get('pad_inches')
+
+    # Any change to an artist marks the figure stale again (see below)
+    measured = getattr(fig, '_export_bbox', None)
+    if measured is None or fig.stale or measured[0] != (dpi, pad_inches):
+        measured = ((dpi, pad_inches), tight_bbox(fig, dpi, pad_inches))
+
+    kwargs['bbox_inches'] = measured[1]
+    with _layout_done(fig):
+        result = _original_savefig(fig, fname, **kwargs)
+
+    fig._export_bbox = measured
+    fig.stale = False
+    return result
+
+
+def install():
+    """Patch Figure.savefig in this process (idempotent)."""
+    Figure.savefig = _savefig
+
+
+def uninstall():
+    """Restore the original Figure.savefig."""
+    Figure.savefig = _original_savefig
+
+
+def main():
+    """Run a chart script (sys.argv[1]) with the export hook installed."""
+    if len(sys.argv) < 2:
+        print("Usage: python -m build_tools.export <chart.py> [args...]")
+        sys.exit(2)
+
+    install()
+    sys.argv = sys.argv[1:]
+    runpy.run_path(sys.argv[0], run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,403 @@
+"""
+Course Build Graph
+
+Make-like build driver for the whole course: chart scripts -> chart PDFs ->
+.tex documents (via \\includegraphics) -> compiled PDFs. Only nodes whose
+inputs changed are rebuilt, and independent nodes run concurrently.
+
+Node kinds:
+- chart:<group>/<name>   chart script -> <name>.pdf (content-hash cache)
+- tex:lectures           module .tex files -> lectures/*.tex (split_into_lectures.py)
+- pdf:<path/stem>        .tex + included graphics -> .pdf (pdflatex)
+
+Every run except a dry run is recorded in the build history
+(build_tools.history): chart nodes as charts, the other nodes as stages
+with the size of their outputs.
+
+Usage:
+    python -m build_tools.graph                      # rebuild everything out of date
+    python -m build_tools.graph --dry-run            # show what would run
+    python -m build_tools.graph mlp_architecture     # one lecture and what it needs
+    python -m build_tools.graph --affected xor_solution_mlp
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from pathlib import Path
+
+from .cache import ChartCache
+from .config import PROJECT_ROOT, load_config, resolve_jobs
+from .history import record_run
+from .runner import (ChartResult, chart_group, find_chart_scripts, run_chart, run_chart_warm,
+                     run_with_budget)
+from .timeouts import ChartTimings, run_command
+from .trace import run as traced_run, span
+from .workers import WarmWorkerPool
+
+
+INCLUDE_PATTERN = re.compile(r'\\includegraphics\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}')
+GRAPHICS_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg')
+LATEX_AUX_EXTENSIONS = ('aux', 'log', 'nav', 'out', 'snm', 'toc')
+STAMP_DIR = PROJECT_ROOT / '.build' / 'stamps'
+
+
+class Node:
+    """One build step: turns ``inputs`` into ``outputs`` after its ``deps`` are built."""
+
+    def __init__(self, name, inputs=(), outputs=(), deps=(), action=None, stamp=None):
+        self.name = name
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.deps = list(deps)
+        self.action = action
+        self.stamp = Path(stamp) if stamp else None
+
+    def is_dirty(self):
+        """True if an output (or the stamp) is missing or older than an input."""
+        targets = [self.stamp] if self.stamp else self.outputs
+        if not targets or not all(p.exists() for p in targets):
+            return True
+        newest_input = max((p.stat().st_mtime for p in self.inputs if p.exists()), default=0)
+        oldest_output = min(p.stat().st_mtime for p in targets)
+        return newest_input > oldest_output
+
+    def run(self):
+        """Run the action; returns (ok, message)."""
+        ok, message = self.action(self) if self.action else (True, '')
+        if ok and self.stamp:
+            self.stamp.parent.mkdir(parents=True, exist_ok=True)
+            self.stamp.touch()
+        return ok, message
+
+    def __repr__(self):
+        return f"Node({self.name!r})"
+
+
+class ChartNode(Node):
+    """Chart script node; dirty when its content-hash cache entry is stale."""
+
+    def __init__(self, name, py_file, cache, **kwargs):
+        super().__init__(name, **kwargs)
+        self.py_file = py_file
+        self.cache = cache
+
+    def is_dirty(self):
+        return not self.cache.is_fresh(self.py_file)
+
+
+def scan_includes(tex_file):
+    """Return the files a .tex file pulls in with \\includegraphics (resolved, existing or not)."""
+    tex_file = Path(tex_file)
+    includes = []
+
+    for line in tex_file.read_text(encoding='utf-8').splitlines():
+        line = re.split(r'(?<!\\)%', line, 1)[0]   # drop comments
+        for match in INCLUDE_PATTERN.finditer(line):
+            path = (tex_file.parent / match.group(1).strip()).resolve()
+            if not path.suffix:
+                candidates = [path.with_suffix(ext) for ext in GRAPHICS_EXTENSIONS]
+                path = next((c for c in candidates if c.exists()), candidates[0])
+            if path not in includes:
+                includes.append(path)
+
+    return includes
+
+
+def document_tex_files(project_root=PROJECT_ROOT):
+    """The .tex documents that are compiled to PDFs."""
+    project_root = Path(project_root)
+    tex_files = []
+    for pattern in ['module*/*0829*.tex', 'appendix/*.tex', 'lectures/*.tex',
+                    '*_NeuralNetworks_Complete.tex']:
+        tex_files.extend(sorted(project_root.glob(pattern)))
+    return tex_files
+
+
+def _relative_name(path, project_root):
+    return Path(path).resolve().relative_to(Path(project_root).resolve()).with_suffix('').as_posix()
+
+
+def run_pdflatex(node):
+    """Compile a document node's .tex file in its own folder and remove aux files."""
+    tex_file = node.inputs[0]
+    try:
+        result = run_command(['pdflatex', '-interaction=nonstopmode', tex_file.name],
+                             tex_file.parent, timeout=300)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return False, str(e)
+    finally:
+        for ext in LATEX_AUX_EXTENSIONS:
+            aux_file = tex_file.with_suffix(f'.{ext}')
+            if aux_file.exists() and ext != 'log':
+                aux_file.unlink()
+
+    pdf_file = tex_file.with_suffix('.pdf')
+    if pdf_file.exists() and pdf_file.stat().st_mtime >= tex_file.stat().st_mtime:
+        return True, ''
+    return False, result.stdout[-300:]
+
+
+def run_split_lectures(node):
+    """Regenerate lectures/*.tex from the module .tex files."""
+    result = traced_run(
+        [sys.executable, 'split_into_lectures.py'],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    return result.returncode == 0, (result.stderr or result.stdout)[-300:]
+
+
+def course_graph(project_root=PROJECT_ROOT, cache=None, chart_runner=run_chart):
+    """
+    Build the dependency graph of the course.
+
+    Returns
+    -------
+    graph : dict
+        Node name -> Node, in a stable (dependency-friendly) order
+    """
+    project_root = Path(project_root)
+    cache = cache if cache is not None else ChartCache()
+    graph = {}
+    producers = {}   # output file -> node name
+
+    def chart_action(node):
+        result = chart_runner(node.py_file)
+        if result.ok and result.outputs:
+            cache.record(node.py_file, result.outputs)
+        else:
+            cache.invalidate(node.py_file)
+        return result.ok, result.message
+
+    for py_file in find_chart_scripts(project_root):
+        name = f"chart:{chart_group(py_file, project_root)}/{py_file.stem}"
+        pdf_file = (py_file.parent / f"{py_file.stem}.pdf").resolve()
+        graph[name] = ChartNode(name, py_file, cache, inputs=[py_file], outputs=[pdf_file],
+                                action=chart_action)
+        producers[pdf_file] = name
+
+    module_tex = sorted(project_root.glob('module*/*0829*.tex'))
+    lecture_tex = sorted(project_root.glob('lectures/*.tex'))
+    if module_tex and (project_root / 'split_into_lectures.py').exists():
+        graph['tex:lectures'] = Node('tex:lectures', inputs=module_tex, outputs=lecture_tex,
+                                     action=run_split_lectures, stamp=STAMP_DIR / 'split_lectures')
+        for tex_file in lecture_tex:
+            producers[tex_file.resolve()] = 'tex:lectures'
+
+    for tex_file in document_tex_files(project_root):
+        includes = scan_includes(tex_file)
+        deps = sorted({producers[p] for p in [tex_file.resolve()] + includes if p in producers})
+        name = f"pdf:{_relative_name(tex_file, project_root)}"
+        graph[name] = Node(name, inputs=[tex_file] + includes, outputs=[tex_file.with_suffix('.pdf')],
+                           deps=deps, action=run_pdflatex)
+
+    return graph
+
+
+def select(graph, targets):
+    """Return the names of ``targets`` and everything they depend on."""
+    wanted = []
+    for target in targets:
+        matches = [name for name in graph
+                   if name == target or name.split(':', 1)[1] == target
+                   or name.rsplit('/', 1)[-1] == target]
+        if not matches:
+            raise KeyError(f"No build target named {target!r}")
+        wanted.extend(matches)
+
+    selected = set()
+    stack = list(wanted)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(graph[name].deps)
+    return [name for name in graph if name in selected]
+
+
+def dependents(graph, names):
+    """Return the names of all nodes that (transitively) depend on ``names``."""
+    reverse = {name: [] for name in graph}
+    for name, node in graph.items():
+        for dep in node.deps:
+            reverse[dep].append(name)
+
+    found = set()
+    stack = list(names)
+    while stack:
+        for child in reverse[stack.pop()]:
+            if child not in found:
+                found.add(child)
+                stack.append(child)
+    return [name for name in graph if name in found]
+
+
+def execute(graph, names=None, jobs=None, dry_run=False, on_event=None):
+    """
+    Build ``names`` (default: all nodes) in dependency order.
+
+    A node runs as soon as all of its dependencies have finished and it is
+    out of date; nodes whose dependencies failed are skipped.
+
+    Returns
+    -------
+    status : dict
+        Node name -> 'built', 'up-to-date', 'failed' or 'skipped'
+    """
+    names = list(graph) if names is None else list(names)
+    jobs = resolve_jobs(load_config()['jobs'] if jobs is None else jobs)
+    on_event = on_event or (lambda name, state, message='': None)
+
+    remaining = {name: {d for d in graph[name].deps if d in names} for name in names}
+    status = {}
+    running = {}
+    lock = threading.Lock()
+
+    def finish(name, state, message=''):
+        with lock:
+            status[name] = state
+        on_event(name, state, message)
+
+    def dep_rebuilt(name):
+        return any(status.get(d) == 'built' for d in graph[name].deps)
+
+    def run_node(node):
+        with span(node.name, 'node') as traced:
+            ok, message = node.run()
+            traced['ok'] = ok
+            return ok, message
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while remaining or running:
+            ready = [name for name, deps in remaining.items()
+                     if all(d in status for d in deps)]
+            for name in ready:
+                del remaining[name]
+                node = graph[name]
+                if any(status.get(d) in ('failed', 'skipped') for d in node.deps):
+                    finish(name, 'skipped')
+                elif not node.is_dirty() and not (dry_run and dep_rebuilt(name)):
+                    finish(name, 'up-to-date')
+                elif dry_run:
+                    finish(name, 'built', 'would run')
+                else:
+                    on_event(name, 'started')
+                    running[pool.submit(run_node, node)] = name
+
+            if not running:
+                if remaining and not ready:
+                    raise RuntimeError(f"Dependency cycle among: {sorted(remaining)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    ok, message = future.result()
+                except Exception as e:
+                    ok, message = False, str(e)
+                finish(name, 'built' if ok else 'failed', message)
+
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild charts and lecture PDFs that are out of date')
+    parser.add_argument('targets', nargs='*',
+                        help='Node names, chart names or document stems (default: everything)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Nodes built at the same time (default: build_config.json)')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='Only show what would be rebuilt')
+    parser.add_argument('--affected', nargs='+', metavar='CHART',
+                        help='Build only the documents that include these charts')
+    parser.add_argument('--charts-only', action='store_true',
+                        help='Stop after the chart nodes (no LaTeX)')
+    args = parser.parse_args()
+
+    config = load_config()
+    jobs = resolve_jobs(config['jobs'] if args.jobs is None else args.jobs)
+    timings = ChartTimings(config=config)
+
+    warm_pool = None
+    run = partial(run_chart, export_hook=config['export_hook'],
+                  reproducible=config['reproducible'],
+                  skip_unchanged=config['skip_unchanged'],
+                  rasterize=config.get('rasterize', False))
+    if config['backend'] == 'warm' and not args.dry_run:
+        warm_pool = WarmWorkerPool.from_config(jobs, config)
+        run = partial(run_chart_warm, warm_pool)
+    chart_results = []
+
+    def chart_runner(py_file):
+        result = run_with_budget(run, py_file, timings)
+        chart_results.append(result)
+        return result
+
+    cache = ChartCache()
+    graph = course_graph(PROJECT_ROOT, cache, chart_runner)
+
+    if args.affected:
+        charts = select(graph, args.affected)
+        names = select(graph, dependents(graph, charts)) if charts else []
+    elif args.targets:
+        names = select(graph, args.targets)
+    else:
+        names = list(graph)
+    if args.charts_only:
+        names = [name for name in names if name.startswith('chart:')]
+
+    started = {}
+    recorded = []   # (name, seconds, ok) of the non-chart nodes that ran
+
+    def report(name, state, message=''):
+        if state == 'started':
+            started[name] = time.perf_counter()
+            return
+        if name.startswith('chart:'):
+            if state == 'up-to-date':
+                chart_results.append(ChartResult(graph[name].py_file, True, 0, 0.0, '', cached=True))
+        elif name in started:
+            recorded.append((name, time.perf_counter() - started.pop(name), state == 'built'))
+        label = {'built': 'OK', 'up-to-date': 'UP-TO-DATE', 'failed': 'FAIL', 'skipped': 'SKIP'}[state]
+        if state == 'built' and args.dry_run:
+            label = 'WOULD BUILD'
+        if state != 'up-to-date':
+            detail = f": {message.strip().splitlines()[-1][:100]}" if state == 'failed' and message.strip() else ''
+            print(f"  [{label}] {name}{detail}")
+
+    print(f"Build graph: {len(graph)} nodes, {len(names)} selected")
+    print("=" * 60)
+    start = time.perf_counter()
+    with record_run('graph', enabled=not args.dry_run, config=config, nodes=len(names),
+                    jobs=jobs, targets=args.targets or args.affected or []) as record:
+        try:
+            with span('build graph', nodes=len(names), dry_run=args.dry_run):
+                status = execute(graph, names, jobs=jobs, dry_run=args.dry_run, on_event=report)
+        finally:
+            cache.save()
+            timings.save()
+            if warm_pool is not None:
+                warm_pool.close()
+            record.charts(chart_results)
+            for name, seconds, ok in recorded:
+                record.add_stage(name, seconds, ok, graph[name].outputs)
+
+    counts = {state: list(status.values()).count(state)
+              for state in ('built', 'up-to-date', 'failed', 'skipped')}
+    print("=" * 60)
+    print(f"Done in {time.perf_counter() - start:.1f}s: "
+          f"{counts['built']} built, {counts['up-to-date']} up to date, "
+          f"{counts['failed']} failed, {counts['skipped']} skipped")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
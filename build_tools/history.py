@@ -0,0 +1,553 @@
+"""
+Build History and Dashboard
+
+Every pipeline run (generate_all_new_charts.py, build_tools.graph,
+split_into_lectures.py) is recorded in a local SQLite database,
+.build/history.sqlite (the last "history_runs" runs are kept):
+- runs: entry point, start, wall time, success, git commit and options
+- stages: named steps of a run (the chart build, the lecture split, one
+  pdflatex document, ...) with their time and the size of their outputs
+- charts: every chart of a run with its build time, attempts, peak memory,
+  output size and whether it came from the cache
+
+``python -m build_tools.history dashboard`` renders the history to one
+self-contained HTML file (matplotlib figures embedded as PNG): wall time per
+run, cache hit rate, output size, the slowest charts, and every chart or
+stage whose latest time or output size jumped against the median of its
+previous "history_baseline" builds (by more than "profile_regression_pct"
+percent and at least "profile_min_seconds" / "history_min_kb"), each with
+its trend.
+
+Recording never breaks a build: if the database cannot be opened or
+written, the run is not recorded. "history": false turns recording off.
+
+Usage:
+    python -m build_tools.history [--runs 15]          # recent runs and regressions
+    python -m build_tools.history dashboard [-o .build/dashboard.html] [--runs 200]
+
+    from build_tools.history import record_run
+
+    with record_run('charts', jobs=8) as record:
+        with record.stage('charts'):
+            results = build_charts(scripts)
+        record.charts(results)
+"""
+
+import argparse
+import base64
+import contextlib
+import html
+import io
+import json
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .cache import find_outputs, relative_key
+from .config import PROJECT_ROOT, load_config
+
+
+HISTORY_PATH = PROJECT_ROOT / '.build' / 'history.sqlite'
+DASHBOARD_PATH = PROJECT_ROOT / '.build' / 'dashboard.html'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    command TEXT NOT NULL,      -- pipeline entry point ('charts', 'graph', ...)
+    started REAL NOT NULL,
+    seconds REAL,               -- NULL while running or if the process died
+    ok INTEGER,
+    git_commit TEXT,
+    info TEXT                   -- JSON: options of the run (jobs, backend, ...)
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    started REAL NOT NULL,
+    seconds REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    bytes INTEGER               -- size of the stage's outputs afterwards
+);
+CREATE TABLE IF NOT EXISTS charts (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    chart TEXT NOT NULL,        -- chart script relative to the project root
+    ok INTEGER NOT NULL,
+    cached INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    peak_mb REAL,
+    bytes INTEGER               -- size of the chart's outputs (NULL if unknown)
+);
+CREATE INDEX IF NOT EXISTS stages_by_name ON stages (name, run);
+CREATE INDEX IF NOT EXISTS charts_by_name ON charts (chart, run);
+"""
+
+
+def output_bytes(paths):
+    """Total size of the existing files in ``paths`` (None if there are none)."""
+    sizes = [Path(p).stat().st_size for p in paths if Path(p).is_file()]
+    return sum(sizes) if sizes else None
+
+
+def git_commit(project_root=PROJECT_ROOT):
+    """Short hash of the checked-out commit, None outside a git checkout."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class BuildHistory:
+    """
+    Connection to the history database.
+
+    Thread-safe: graph nodes running in parallel record through the same
+    instance.
+    """
+
+    def __init__(self, path=HISTORY_PATH, project_root=PROJECT_ROOT, config=None):
+        self.config = load_config() if config is None else config
+        self.path = Path(path)
+        self.project_root = Path(project_root)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA foreign_keys=ON')
+        self._db.executescript(SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params)
+
+    def start_run(self, command, **info):
+        """Record the start of a run; returns its id."""
+        cursor = self._execute(
+            'INSERT INTO runs (command, started, git_commit, info) VALUES (?, ?, ?, ?)',
+            (command, time.time(), git_commit(self.project_root), json.dumps(info, sort_keys=True)))
+        return cursor.lastrowid
+
+    def finish_run(self, run, ok, seconds):
+        """Record the end of a run and drop the runs beyond "history_runs"."""
+        self._execute('UPDATE runs SET ok = ?, seconds = ? WHERE id = ?', (int(ok), seconds, run))
+        keep = self.config.get('history_runs', 200)
+        self._execute('DELETE FROM runs WHERE id NOT IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)',
+                      (keep,))
+
+    def add_stage(self, run, name, started, seconds, ok=True, outputs=()):
+        self._execute('INSERT INTO stages VALUES (?, ?, ?, ?, ?, ?)',
+                      (run, name, started, seconds, int(ok), output_bytes(outputs)))
+
+    def add_charts(self, run, results):
+        """Record ChartResults (build_tools.runner) of a run."""
+        # Charts skipped as fresh do not list their outputs; measure the files on disk
+        rows = [(run, relative_key(r.script, self.project_root), int(r.ok), int(r.cached),
+                 r.elapsed, r.attempts, r.peak_mb,
+                 output_bytes(r.outputs or (find_outputs(Path(r.script).parent) if r.cached else ())))
+                for r in results if r is not None]
+        with self._lock:
+            self._db.executemany('INSERT INTO charts VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def runs(self, limit=None):
+        """
+        Recorded runs, newest first.
+
+        Returns
+        -------
+        runs : list of dict
+            Run columns plus ``charts``, ``cached``, ``failed`` (chart counts)
+            and ``bytes`` (chart and stage outputs)
+        """
+        rows = self._execute("""
+            SELECT r.id, r.command, r.started, r.seconds, r.ok, r.git_commit, r.info,
+                   COUNT(c.chart), COALESCE(SUM(c.cached), 0), COALESCE(SUM(1 - c.ok), 0),
+                   COALESCE(SUM(c.bytes), 0)
+                   + (SELECT COALESCE(SUM(s.bytes), 0) FROM stages s WHERE s.run = r.id)
+            FROM runs r LEFT JOIN charts c ON c.run = r.id
+            GROUP BY r.id ORDER BY r.id DESC LIMIT ?""", (-1 if limit is None else limit,)).fetchall()
+        keys = ['id', 'command', 'started', 'seconds', 'ok', 'git_commit', 'info',
+                'charts', 'cached', 'failed', 'bytes']
+        runs = [dict(zip(keys, row)) for row in rows]
+        for run in runs:
+            run['info'] = json.loads(run['info'] or '{}')
+        return runs
+
+    def series(self, kind, since_run=0):
+        """
+        Successful builds of every chart (``kind='charts'``) or stage
+        (``kind='stages'``), cached charts excluded.
+
+        A stage's time depends on how many charts its run took from the
+        cache, so stage points also carry the run's (built, total) chart
+        counts. find_regressions() only compares points with equal counts.
+
+        Returns
+        -------
+        series : dict
+            Name -> list of (run id, seconds, bytes), oldest first; stages
+            add (built, total)
+        """
+        if kind == 'charts':
+            sql = ('SELECT chart, run, seconds, bytes FROM charts '
+                   'WHERE ok = 1 AND cached = 0 AND run >= ? ORDER BY run')
+        elif kind == 'stages':
+            sql = ('SELECT s.name, s.run, s.seconds, s.bytes, '
+                   '(SELECT COUNT(*) FROM charts c WHERE c.run = s.run AND c.cached = 0), '
+                   '(SELECT COUNT(*) FROM charts c WHERE c.run = s.run) '
+                   'FROM stages s WHERE s.ok = 1 AND s.run >= ? ORDER BY s.run')
+        else:
+            raise ValueError(f"Unknown history series: {kind}")
+        series = {}
+        for name, *point in self._execute(sql, (since_run,)):
+            series.setdefault(name, []).append(tuple(point))
+        return series
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RunRecord:
+    """
+    Recorder handed out by record_run(); without a history every method is
+    a no-op. A failed stage or chart marks the run as failed.
+    """
+
+    def __init__(self, history=None, run=None):
+        self.history = history
+        self.run = run
+        self.ok = True
+
+    def _write(self, method, *args):
+        if self.history is None or self.run is None:
+            return
+        try:
+            method(self.run, *args)
+        except sqlite3.Error:
+            pass
+
+    def add_stage(self, name, seconds, ok=True, outputs=(), started=None):
+        """Record a stage timed by the caller."""
+        self.ok = self.ok and ok
+        started = time.time() - seconds if started is None else started
+        self._write(getattr(self.history, 'add_stage', None), name, started, seconds, ok, outputs)
+
+    @contextlib.contextmanager
+    def stage(self, name, outputs=()):
+        """
+        Time the enclosed block as a stage.
+
+        Yields a dict: set ``ok`` to False to record a failure, or
+        ``outputs`` to the files the stage wrote (measured afterwards).
+        """
+        info = {'ok': True, 'outputs': outputs}
+        started, start = time.time(), time.perf_counter()
+        try:
+            yield info
+        except BaseException:
+            info['ok'] = False
+            raise
+        finally:
+            self.add_stage(name, time.perf_counter() - start, info['ok'], info['outputs'], started)
+
+    def charts(self, results):
+        """Record the ChartResults of the run."""
+        results = [r for r in results if r is not None]
+        self.ok = self.ok and all(r.ok for r in results)
+        self._write(getattr(self.history, 'add_charts', None), results)
+
+
+@contextlib.contextmanager
+def record_run(command, enabled=True, config=None, **info):
+    """
+    Record one pipeline run in the history.
+
+    Parameters
+    ----------
+    command : str
+        Entry point ('charts', 'graph', 'lectures', ...)
+    enabled : bool, optional
+        False (e.g. for a dry run) records nothing
+    **info
+        Options of the run, stored as JSON
+
+    Yields
+    ------
+    record : RunRecord
+    """
+    config = load_config() if config is None else config
+    history = None
+    if enabled and config.get('history', True):
+        try:
+            history = BuildHistory(config=config)
+        except (OSError, sqlite3.Error):
+            history = None
+
+    record = RunRecord(history)
+    if history is not None:
+        try:
+            record.run = history.start_run(command, **info)
+        except sqlite3.Error:
+            pass
+
+    start = time.perf_counter()
+    finished = False
+    try:
+        yield record
+        finished = True
+    finally:
+        if history is not None:
+            try:
+                if record.run is not None:
+                    history.finish_run(record.run, finished and record.ok,
+                                       time.perf_counter() - start)
+            except sqlite3.Error:
+                pass
+            history.close()
+
+
+def find_regressions(series, config=None):
+    """
+    Entries whose latest build is slower or larger than usual.
+
+    The latest point of each series is compared with the median of the
+    "history_baseline" points before it that ran under the same conditions
+    (for stages: the same numbers of built and cached charts).
+
+    Returns
+    -------
+    regressions : list of tuple
+        (name, metric, baseline, latest, run id) with metric 'seconds' or
+        'bytes', largest ratio first
+    """
+    config = load_config() if config is None else config
+    ratio = 1 + config.get('profile_regression_pct', 25) / 100
+    baseline_runs = config.get('history_baseline', 5)
+    minimum = {'seconds': config.get('profile_min_seconds', 0.5),
+               'bytes': config.get('history_min_kb', 20) * 1024}
+
+    regressions = []
+    for name, points in series.items():
+        if len(points) < 2:
+            continue
+        run = points[-1][0]
+        comparable = [p for p in points[:-1] if p[3:] == points[-1][3:]][-baseline_runs:]
+        for index, metric in ((1, 'seconds'), (2, 'bytes')):
+            latest = points[-1][index]
+            previous = [p[index] for p in comparable if p[index] is not None]
+            if latest is None or not previous:
+                continue
+            baseline = statistics.median(previous)
+            if latest - baseline >= minimum[metric] and latest > baseline * ratio:
+                regressions.append((name, metric, baseline, latest, run))
+    regressions.sort(key=lambda r: -(r[3] / r[2] if r[2] else float('inf')))
+    return regressions
+
+
+def format_value(metric, value):
+    if metric == 'seconds':
+        return f"{value:.1f}s"
+    return f"{value / 1024:.0f} KB" if value < 1024 * 1024 else f"{value / (1024 * 1024):.1f} MB"
+
+
+def print_runs(runs):
+    """Print one line per run, newest first."""
+    print(f"  {'run':>5}  {'started':16}  {'command':10} {'commit':8} {'wall':>7}  "
+          f"{'charts':>6} {'hit':>5}  {'output':>8}  status")
+    for run in runs:
+        started = datetime.fromtimestamp(run['started']).strftime('%Y-%m-%d %H:%M')
+        wall = f"{run['seconds']:.1f}s" if run['seconds'] is not None else '-'
+        hit = f"{100 * run['cached'] / run['charts']:.0f}%" if run['charts'] else '-'
+        status = {1: 'OK', 0: 'FAIL'}.get(run['ok'], 'UNFINISHED')
+        print(f"  {run['id']:5d}  {started:16}  {run['command'][:10]:10} "
+              f"{(run['git_commit'] or '-')[:8]:8} {wall:>7}  {run['charts']:6d} {hit:>5}  "
+              f"{format_value('bytes', run['bytes']):>8}  {status}")
+
+
+def print_regressions(regressions, top=10):
+    if not regressions:
+        print("    no regressions")
+        return
+    for name, metric, baseline, latest, run in regressions[:top]:
+        label = 'SLOWER' if metric == 'seconds' else 'LARGER'
+        print(f"    [{label}] {name}: {format_value(metric, baseline)} -> "
+              f"{format_value(metric, latest)} (x{latest / baseline if baseline else float('inf'):.1f}, "
+              f"run {run})")
+
+
+def _png(fig):
+    """A matplotlib figure as a base64 PNG <img> tag."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+    return f'<img src="data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}">'
+
+
+def _trend_figure(title, points, metric, run_dates):
+    """Small figure of one series with its regression point highlighted."""
+    from matplotlib.figure import Figure
+
+    scale, unit = (1, 's') if metric == 'seconds' else (1024, 'KB')
+    points = [p for p in points if p[1 if metric == 'seconds' else 2] is not None]
+    dates = [run_dates.get(p[0]) for p in points]
+    values = [p[1 if metric == 'seconds' else 2] / scale for p in points]
+    fig = Figure(figsize=(5, 2.2))
+    ax = fig.add_subplot()
+    ax.plot(dates, values, marker='o', markersize=3, color='#3333B2')
+    ax.plot(dates[-1:], values[-1:], marker='o', color='#D62728')
+    ax.set_title(title, fontsize=9)
+    ax.set_ylabel(unit, fontsize=8)
+    ax.set_ylim(bottom=0)
+    ax.tick_params(labelsize=7)
+    fig.autofmt_xdate()
+    return _png(fig)
+
+
+def render_dashboard(history, path=DASHBOARD_PATH, limit=200, top=12):
+    """
+    Write the HTML dashboard of the last ``limit`` runs.
+
+    Returns
+    -------
+    path : Path
+    """
+    from matplotlib.figure import Figure
+
+    runs = history.runs(limit)[::-1]
+    since = runs[0]['id'] if runs else 0
+    run_dates = {run['id']: datetime.fromtimestamp(run['started']) for run in runs}
+    charts = history.series('charts', since)
+    stages = history.series('stages', since)
+    regressions = find_regressions({**charts, **stages}, history.config)
+
+    sections = []
+
+    fig = Figure(figsize=(10, 6))
+    ax_wall, ax_hit, ax_size = fig.subplots(3, 1, sharex=True)
+    for command in sorted({run['command'] for run in runs}):
+        done = [run for run in runs if run['command'] == command and run['seconds'] is not None]
+        dates = [run_dates[run['id']] for run in done]
+        ax_wall.plot(dates, [run['seconds'] for run in done], marker='o', markersize=3, label=command)
+        failed = [run for run in done if not run['ok']]
+        ax_wall.plot([run_dates[run['id']] for run in failed], [run['seconds'] for run in failed],
+                     'x', color='#D62728')
+        with_charts = [run for run in done if run['charts']]
+        if with_charts:
+            ax_hit.plot([run_dates[run['id']] for run in with_charts],
+                        [100 * run['cached'] / run['charts'] for run in with_charts],
+                        marker='o', markersize=3, label=command)
+        ax_size.plot(dates, [run['bytes'] / (1024 * 1024) for run in done],
+                     marker='o', markersize=3, label=command)
+    ax_wall.set_ylabel('wall time (s)')
+    ax_hit.set_ylabel('cache hits (%)')
+    ax_hit.set_ylim(-5, 105)
+    ax_size.set_ylabel('outputs (MB)')
+    ax_wall.legend(fontsize=8, loc='upper left')
+    ax_wall.set_title('Runs (x = failed)')
+    fig.autofmt_xdate()
+    sections.append(f"<h2>Runs</h2>{_png(fig)}")
+
+    if regressions:
+        rows = ''.join(
+            f"<tr><td>{html.escape(name)}</td><td>{'time' if metric == 'seconds' else 'size'}</td>"
+            f"<td>{format_value(metric, baseline)}</td><td>{format_value(metric, latest)}</td>"
+            f"<td>x{latest / baseline if baseline else float('inf'):.1f}</td><td>{run}</td></tr>"
+            for name, metric, baseline, latest, run in regressions)
+        figures = ''.join(
+            _trend_figure(f"{name} ({'time' if metric == 'seconds' else 'size'})",
+                          charts.get(name) or stages[name], metric, run_dates)
+            for name, metric, _, _, _ in regressions[:top])
+        sections.append(
+            f"<h2>Regressions</h2><p>Latest build against the median of the previous "
+            f"{history.config.get('history_baseline', 5)} builds.</p>"
+            f"<table><tr><th>chart / stage</th><th>metric</th><th>baseline</th><th>latest</th>"
+            f"<th>ratio</th><th>run</th></tr>{rows}</table>{figures}")
+    else:
+        sections.append("<h2>Regressions</h2><p>None.</p>")
+
+    latest = sorted(((points[-1][1], name, points) for name, points in charts.items()),
+                    reverse=True)[:top]
+    if latest:
+        rows = ''.join(f"<tr><td>{html.escape(name)}</td><td>{seconds:.1f}s</td>"
+                       f"<td>{format_value('bytes', points[-1][2] or 0)}</td><td>{len(points)}</td></tr>"
+                       for seconds, name, points in latest)
+        sections.append(f"<h2>Slowest charts (latest build)</h2><table><tr><th>chart</th>"
+                        f"<th>time</th><th>outputs</th><th>builds</th></tr>{rows}</table>")
+
+    rows = []
+    for run in runs[::-1]:
+        wall = '-' if run['seconds'] is None else f"{run['seconds']:.1f}s"
+        status = {1: 'OK', 0: 'FAIL'}.get(run['ok'], 'unfinished')
+        rows.append(f"<tr><td>{run['id']}</td><td>{run_dates[run['id']]:%Y-%m-%d %H:%M}</td>"
+                    f"<td>{html.escape(run['command'])}</td><td>{html.escape(run['git_commit'] or '-')}</td>"
+                    f"<td>{wall}</td><td>{run['charts']}</td><td>{run['cached']}</td>"
+                    f"<td>{run['failed']}</td><td>{format_value('bytes', run['bytes'])}</td>"
+                    f"<td>{status}</td></tr>")
+    rows = ''.join(rows)
+    sections.append(f"<h2>All runs</h2><table><tr><th>run</th><th>started</th><th>command</th>"
+                    f"<th>commit</th><th>wall</th><th>charts</th><th>cached</th><th>failed</th>"
+                    f"<th>outputs</th><th>status</th></tr>{rows}</table>")
+
+    page = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Build history</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #222; }}
+table {{ border-collapse: collapse; margin-bottom: 1em; font-size: 0.9em; }}
+td, th {{ border: 1px solid #ccc; padding: 0.2em 0.6em; text-align: left; }}
+img {{ margin: 0.3em; }}
+</style></head><body>
+<h1>Build history</h1>
+<p>{len(runs)} runs, generated {datetime.now():%Y-%m-%d %H:%M}</p>
+{''.join(sections)}
+</body></html>
+"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(page, encoding='utf-8')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the build history or render its dashboard')
+    parser.add_argument('command', nargs='?', choices=['list', 'dashboard'], default='list')
+    parser.add_argument('-o', '--output', default=str(DASHBOARD_PATH),
+                        help='Dashboard file (default: .build/dashboard.html)')
+    parser.add_argument('--runs', type=int, default=None,
+                        help='Runs shown (default: 15 listed, 200 in the dashboard)')
+    parser.add_argument('--top', type=int, default=10, help='Regressions shown')
+    args = parser.parse_args()
+
+    if not HISTORY_PATH.exists():
+        print("No build history yet (run generate_all_new_charts.py or build_tools.graph)")
+        return 1
+    history = BuildHistory()
+    try:
+        if args.command == 'dashboard':
+            path = render_dashboard(history, args.output, args.runs or 200, args.top)
+            print(f"[OK] Dashboard: {path}")
+            return 0
+
+        runs = history.runs(args.runs or 15)
+        print(f"Build history: {HISTORY_PATH}")
+        print("=" * 60)
+        print_runs(runs)
+        since = runs[-1]['id'] if runs else 0
+        series = {**history.series('charts', since), **history.series('stages', since)}
+        print(f"\n  Regressions (latest build vs. median of the previous "
+              f"{history.config.get('history_baseline', 5)}):")
+        print_regressions(find_regressions(series, history.config), args.top)
+        return 0
+    finally:
+        history.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
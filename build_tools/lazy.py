@@ -0,0 +1,118 @@
+"""
+Lazy Imports for Chart Processes
+
+Imports the modules listed in "lazy_imports" (build_config.json) lazily in
+chart processes: ``import scipy.ndimage`` binds the module at once, but the
+module only executes on first attribute access (importlib.util.LazyLoader).
+A chart that imports scipy, sklearn or pandas without reaching the code
+that uses them therefore does not pay for loading them.
+
+The warm workers install the layer before preloading, so a preloaded module
+that is also lazy costs nothing at worker start and is loaded by the first
+chart that imports it. The subprocess backend installs it in the chart
+process (build_tools.chartexec).
+
+Limits:
+- ``from pkg.module import name`` reads the attribute right away, so the
+  module is loaded at that line
+- a parent package is loaded when a submodule is imported (``import
+  scipy.ndimage`` loads scipy, lazily only scipy.ndimage)
+- on Python < 3.12 a second import statement of the module loads it
+- matplotlib itself imports mpl_toolkits.mplot3d (to register the 3d
+  projection), so 3D support cannot be deferred
+
+This module only imports importlib and runpy, so it does not distort the
+startup profile (build_tools.startup) it is used by.
+
+Usage:
+    python -m build_tools.lazy chart.py [module ...]   # run a chart with the layer
+
+    from build_tools.lazy import install
+    install(['scipy.ndimage', 'sklearn'])
+"""
+
+import importlib.util
+import os
+import sys
+
+
+class LazyFinder:
+    """Meta path finder that wraps the loader of the listed modules in a LazyLoader."""
+
+    def __init__(self, names):
+        self.names = frozenset(names)
+
+    def find_spec(self, name, path, target=None):
+        if name not in self.names:
+            return None
+        for finder in sys.meta_path:
+            find = getattr(finder, 'find_spec', None)
+            if isinstance(finder, LazyFinder) or find is None:
+                continue
+            spec = find(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        # Extension modules and namespace packages cannot be loaded lazily
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module') or spec.origin is None:
+            return spec
+        spec.loader = importlib.util.LazyLoader(spec.loader)
+        return spec
+
+
+def install(names):
+    """
+    Import the given modules lazily from now on in this process.
+
+    Returns
+    -------
+    finder : LazyFinder or None
+        The installed finder (replacing an earlier one), None if ``names`` is empty
+    """
+    uninstall()
+    if not names:
+        return None
+    finder = LazyFinder(names)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def uninstall():
+    """Remove the lazy layer (modules already bound lazily stay lazy)."""
+    sys.meta_path[:] = [finder for finder in sys.meta_path if not isinstance(finder, LazyFinder)]
+
+
+def is_pending(name):
+    """True if a module was imported lazily and has not been loaded yet."""
+    module = sys.modules.get(name)
+    return module is not None and type(module) is importlib.util._LazyModule
+
+
+def run_script(py_file, cwd=None):
+    """
+    Run a chart as ``python <chart>.py`` (this process is the chart's).
+
+    The chart runs in its own folder, or in ``cwd`` so its outputs go there.
+    """
+    import runpy
+
+    py_file = os.path.abspath(py_file)
+    os.chdir(cwd or os.path.dirname(py_file))
+    sys.argv = [os.path.basename(py_file)]
+    sys.path.insert(0, os.path.dirname(py_file))
+    runpy.run_path(py_file, run_name='__main__')
+
+
+def main():
+    # No argparse: every import here shows up in the startup profile
+    if len(sys.argv) < 2 or sys.argv[1] in ('-h', '--help'):
+        print("usage: python -m build_tools.lazy chart.py [module ...]")
+        sys.exit(0 if len(sys.argv) > 1 else 2)
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    install(sys.argv[2:])
+    run_script(sys.argv[1])
+
+
+if __name__ == '__main__':
+    main()
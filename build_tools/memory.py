@@ -0,0 +1,190 @@
+"""
+Chart Memory Budgets and Resource Limits
+
+A few charts allocate large intermediate arrays (300-dpi rasters, stacks of
+500x500 weight matrices); several of them at once can push the machine
+into swap. Two things keep a parallel build within memory:
+
+- Scheduling: the peak memory of every chart is recorded on each
+  successful build (.build/chart_memory.json, the last "timeout_history"
+  runs). Charts are started heaviest first, and a chart only starts while
+  the predicted peaks of the running charts plus its own fit in
+  "memory_budget_mb" (0 = 80% of the memory available when the build
+  starts). A chart bigger than the budget runs alone. Charts without
+  history count as "memory_default_mb".
+- Limits: every chart job runs under RLIMIT_AS ("memory_limit_mb" of
+  address space on top of what its process already has mapped; the chart
+  fails with MemoryError beyond it) and RLIMIT_CPU ("cpu_limit" CPU
+  seconds; the process is killed with SIGXCPU beyond it). Warm workers set
+  the limits around each chart and lift them again afterwards. Address
+  space is virtual memory, so the limit is a guard against runaway
+  allocations, not a measure of RSS.
+
+Peaks are whole-process peak RSS (the preloaded modules of a warm worker
+included); idle warm workers are not counted against the budget. Limits are
+POSIX only; elsewhere charts run unlimited.
+
+Usage:
+    from build_tools.memory import ChartMemory, MemoryGate, job_limits, memory_budget_mb
+
+    memory = ChartMemory()
+    gate = MemoryGate(memory_budget_mb(config))
+    with gate.reserve(memory.estimate(py_file)):
+        with job_limits(2048, 600):   # in the chart process
+            ...
+    memory.record(py_file, peak_mb)
+    memory.save()
+"""
+
+import collections
+import contextlib
+import math
+import os
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .cache import relative_key
+from .config import PROJECT_ROOT, load_config
+from .timeouts import ChartTimings
+
+
+MEMORY_PATH = PROJECT_ROOT / '.build' / 'chart_memory.json'
+
+
+def meminfo_mb(field):
+    """A field of /proc/meminfo in MB, None if unavailable."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def memory_budget_mb(config=None):
+    """Memory the charts of one build may use at once, in MB."""
+    config = load_config() if config is None else config
+    if config.get('memory_budget_mb'):
+        return config['memory_budget_mb']
+    available = meminfo_mb('MemAvailable')
+    if available is None:
+        try:
+            available = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+        except (AttributeError, ValueError, OSError):
+            return float('inf')
+    return 0.8 * available
+
+
+def address_space_mb():
+    """Virtual memory currently mapped by this process in MB (0 if unknown)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[0])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+def config_limits(config=None):
+    """(memory_limit_mb, cpu_limit) of build_config.json; 0 turns a limit off."""
+    config = load_config() if config is None else config
+    return config.get('memory_limit_mb', 0), config.get('cpu_limit', 0)
+
+
+@contextlib.contextmanager
+def job_limits(memory_mb=0, cpu_seconds=0):
+    """
+    Limit the rest of this process's run to ``memory_mb`` more address
+    space and ``cpu_seconds`` more CPU time; the previous soft limits are
+    restored on exit.
+    """
+    if resource is None or not (memory_mb or cpu_seconds):
+        yield
+        return
+
+    saved = []
+    try:
+        if memory_mb:
+            soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+            limit = int((address_space_mb() + memory_mb) * 1024 * 1024)
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            saved.append((resource.RLIMIT_AS, (soft, hard)))
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        if cpu_seconds:
+            soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            limit = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            saved.append((resource.RLIMIT_CPU, (soft, hard)))
+            resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+        yield
+    finally:
+        for kind, limits in reversed(saved):
+            resource.setrlimit(kind, limits)
+
+
+class ChartMemory(ChartTimings):
+    """Peak memory (MB) of recent successful chart builds and the estimates learned from them."""
+
+    def __init__(self, path=MEMORY_PATH, project_root=PROJECT_ROOT, config=None):
+        super().__init__(path, project_root, config)
+
+    def estimate(self, py_file):
+        """Predicted peak memory of a chart in MB."""
+        history = self.entries.get(relative_key(py_file, self.project_root))
+        if not history:
+            return self.config.get('memory_default_mb', 500)
+        return max(history)
+
+
+class MemoryGate:
+    """
+    Admits chart runs while their predicted peaks fit in ``budget_mb``.
+
+    Thread-safe. The oldest waiting run keeps its room: later, smaller runs
+    are only admitted next to it if both fit, so heavy charts are not
+    starved by a stream of light ones. A reservation bigger than the whole
+    budget is admitted only when nothing else is running.
+    """
+
+    def __init__(self, budget_mb):
+        self.budget_mb = budget_mb
+        self.used_mb = 0.0
+        self.running = 0
+        self._waiting = collections.deque()
+        self._condition = threading.Condition()
+
+    def _admissible(self, ticket):
+        mb = ticket[1]
+        if self.running == 0 and self._waiting[0] is ticket:
+            return True
+        if self.used_mb + mb > self.budget_mb:
+            return False
+        oldest = self._waiting[0]
+        return oldest is ticket or self.used_mb + mb + oldest[1] <= self.budget_mb
+
+    @contextlib.contextmanager
+    def reserve(self, mb):
+        ticket = (object(), mb)
+        with self._condition:
+            self._waiting.append(ticket)
+            self._condition.wait_for(lambda: self._admissible(ticket))
+            self._waiting.remove(ticket)
+            self.used_mb += mb
+            self.running += 1
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.used_mb -= mb
+                self.running -= 1
+                self._condition.notify_all()
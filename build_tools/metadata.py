@@ -0,0 +1,93 @@
+"""
+Chart Metadata Reader
+
+Reads the CHART_METADATA dictionary of a chart script from its syntax tree,
+without executing any of the script's code. Results are cached per file and
+reused as long as the file's mtime and size are unchanged.
+
+Usage:
+    from build_tools.metadata import read_chart_metadata
+
+    metadata = read_chart_metadata(py_file)
+    url = metadata.get('url')
+"""
+
+import ast
+from pathlib import Path
+
+
+METADATA_NAME = 'CHART_METADATA'
+
+# What ast.parse/literal_eval raise on sources or literals they cannot read
+_LITERAL_ERRORS = (ValueError, TypeError, SyntaxError, MemoryError, RecursionError)
+
+# path -> (mtime_ns, size, metadata)
+_cache = {}
+
+
+def _assigned_value(tree):
+    """Return the value node of the last top-level CHART_METADATA assignment."""
+    value = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            if any(isinstance(t, ast.Name) and t.id == METADATA_NAME for t in node.targets):
+                value = node.value
+        elif isinstance(node, ast.AnnAssign):
+            if isinstance(node.target, ast.Name) and node.target.id == METADATA_NAME:
+                value = node.value
+    return value
+
+
+def parse_chart_metadata(source, filename='<chart>'):
+    """
+    Extract CHART_METADATA from chart source code.
+
+    Only literal values are read. In a dict display, keys whose values are
+    not literals (e.g. computed strings) are skipped instead of failing the
+    whole dictionary.
+
+    Returns
+    -------
+    metadata : dict
+        Empty if the script has no (literal) CHART_METADATA
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except _LITERAL_ERRORS:
+        return {}
+
+    value = _assigned_value(tree)
+    if value is None:
+        return {}
+
+    if isinstance(value, ast.Dict):
+        metadata = {}
+        for key, item in zip(value.keys, value.values):
+            if key is None:   # **spread
+                continue
+            try:
+                metadata[ast.literal_eval(key)] = ast.literal_eval(item)
+            except _LITERAL_ERRORS:   # e.g. an unhashable key
+                continue
+        return metadata
+
+    try:
+        metadata = ast.literal_eval(value)
+    except _LITERAL_ERRORS:
+        return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def read_chart_metadata(py_file):
+    """Return CHART_METADATA of a chart script (cached by mtime and size)."""
+    py_file = Path(py_file)
+    stat = py_file.stat()
+    key = str(py_file.resolve())
+
+    cached = _cache.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return dict(cached[2])
+
+    metadata = parse_chart_metadata(py_file.read_bytes(), filename=str(py_file))
+    _cache[key] = (stat.st_mtime_ns, stat.st_size, metadata)
+    return dict(metadata)
@@ -0,0 +1,142 @@
+"""
+Unchanged Output Guard
+
+Leaves chart outputs untouched when a rebuild renders the same picture, so
+their mtimes (and everything keyed on them: metainfo, QR checks, QuantLet
+sync, git) only move when a chart really changed.
+
+``install()`` patches ``Figure.savefig``: the figure is rendered into memory,
+compared with the existing file and only written (atomically) if it differs:
+- PNG: identical bytes, or identical decoded pixels (mode, size and every
+  pixel value), so encoder or metadata differences do not count as changes
+- PDF: identical bytes, or identical content once the volatile parts are
+  removed (CreationDate/ModDate, Creator/Producer, /ID and the xref offsets)
+- other formats: identical bytes
+
+Every save is logged as written or unchanged; ``take_log()`` returns and
+clears the log of the chart that just ran. Enabled with "skip_unchanged"
+in build_config.json.
+"""
+
+import hashlib
+import io
+import os
+import re
+from pathlib import Path
+
+
+# PDF parts that change between identical renders
+PDF_VOLATILE = re.compile(
+    rb'/(CreationDate|ModDate|Creator|Producer) *\((?:[^()\\]|\\.)*\)'
+    rb'|/ID *\[[^\]]*\]'
+    rb'|\bxref\b.*?(?=trailer)'
+    rb'|\bstartxref\s+\d+',
+    re.DOTALL
+)
+
+_installed = False
+_log = []
+
+
+def png_digest(data):
+    """Digest of the decoded pixels of a PNG (mode, size and pixel values)."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        digest = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+        digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def pdf_digest(data):
+    """Digest of a PDF without dates, producer strings, file ID and xref offsets."""
+    return hashlib.sha256(PDF_VOLATILE.sub(b'', data)).hexdigest()
+
+
+CONTENT_DIGESTS = {
+    'png': png_digest,
+    'pdf': pdf_digest,
+}
+
+
+def same_content(path, data, fmt):
+    """True if ``path`` already holds ``data`` (or an equivalent rendering of it)."""
+    try:
+        old = Path(path).read_bytes()
+    except OSError:
+        return False
+    if old == data:
+        return True
+    digest = CONTENT_DIGESTS.get(fmt)
+    if digest is None:
+        return False
+    try:
+        return digest(old) == digest(data)
+    except Exception:
+        # Unreadable old file: replace it
+        return False
+
+
+def write_if_changed(path, data, fmt):
+    """Write ``data`` to ``path`` unless it is unchanged; return True if written."""
+    path = Path(path)
+    if same_content(path, data, fmt):
+        return False
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def take_log():
+    """
+    Saves since the last call, as {'written': [...], 'unchanged': [...]}
+    (absolute paths).
+    """
+    log = {'written': [], 'unchanged': []}
+    for path, written in _log:
+        log['written' if written else 'unchanged'].append(path)
+    _log.clear()
+    return log
+
+
+def is_installed():
+    return _installed
+
+
+def install():
+    """Patch Figure.savefig in this process (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    import matplotlib
+    from matplotlib.figure import Figure
+
+    savefig = Figure.savefig
+
+    def guarded_savefig(self, fname, *args, **kwargs):
+        if not isinstance(fname, (str, os.PathLike)):
+            return savefig(self, fname, *args, **kwargs)
+
+        # Same file name rules as savefig: the suffix gives the format, and a
+        # missing suffix (with no explicit format) is added from savefig.format
+        path = Path(fname)
+        fmt = kwargs.get('format')
+        if fmt is None:
+            fmt = path.suffix.lstrip('.')
+            if not fmt:
+                fmt = matplotlib.rcParams['savefig.format']
+                path = Path(f"{os.fspath(fname).rstrip('.')}.{fmt}")
+        kwargs['format'] = fmt
+
+        buffer = io.BytesIO()
+        result = savefig(self, buffer, *args, **kwargs)
+        written = write_if_changed(path, buffer.getvalue(), fmt.lower())
+        _log.append((str(path.resolve()), written))
+        return result
+
+    Figure.savefig = guarded_savefig
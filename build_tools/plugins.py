@@ -0,0 +1,269 @@
+"""
+Chart Plugins
+
+A chart script is a plugin when it defines, at module level, a literal
+CHART_METADATA and a ``build`` function, and draws nothing on import:
+
+    CHART_METADATA = {'title': ..., 'url': ...}
+
+    def build(output_dir='.', formats=('pdf', 'png'), dpi=300):
+        fig, ax = plt.subplots()
+        ...
+        paths = [os.path.join(output_dir, f'my_chart.{fmt}') for fmt in formats]
+        for path, fmt in zip(paths, formats):
+            fig.savefig(path, format=fmt, bbox_inches='tight', dpi=dpi)
+        plt.close(fig)
+        return paths
+
+    if __name__ == '__main__':
+        build()
+
+Plugins stay plain matplotlib scripts (they are shipped to QuantLet as is)
+and still run with ``python my_chart.py``. Importing one is cheap, so tests
+and tools can reuse its data functions, and the build asks it for exactly
+the formats and resolution in "export_formats" (build_config.json).
+
+Whether a script is a plugin is decided from its syntax tree, so discovery
+never executes chart code: it needs the top-level ``build``, a CHART_METADATA
+that metadata.parse_chart_metadata reads, and no pyplot calls or figure
+saves at module level. Other scripts (e.g. drawing at module level) are run
+through a shim with the same ``build`` interface: the script runs in its
+own folder and writes the formats it always wrote, which are then copied to
+``output_dir`` if that is somewhere else.
+
+Usage:
+    python -m build_tools.plugins                       # plugin / legacy per chart
+    python -m build_tools.plugins xor_problem --out /tmp/x --formats png --dpi 100
+
+    from build_tools.plugins import ChartPlugin
+
+    chart = ChartPlugin(py_file)
+    chart.metadata, chart.is_plugin
+    paths = chart.build('/tmp/out', ['png'], 150)
+"""
+
+import argparse
+import ast
+import runpy
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from .cache import find_outputs
+from .config import PROJECT_ROOT, load_config
+from .metadata import parse_chart_metadata, read_chart_metadata
+from .registry import load_index
+
+
+ENTRY_POINT = 'build'
+
+# Calls that draw wherever they are made, and pyplot attributes that only configure
+DRAWING_CALLS = {'savefig', 'show'}
+CONFIG_ATTRS = {'rc', 'rcParams', 'style'}
+
+# path -> (mtime_ns, size, is_plugin)
+_cache = {}
+
+
+def _pyplot_names(tree):
+    """Names the top-level imports bind to pyplot (plt, ...) or matplotlib."""
+    names = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.update(alias.asname or alias.name.split('.')[0] for alias in node.names
+                         if alias.name.split('.')[0] == 'matplotlib')
+        elif isinstance(node, ast.ImportFrom) and node.module in ('matplotlib', 'matplotlib.pyplot'):
+            names.update(alias.asname or alias.name for alias in node.names
+                         if node.module == 'matplotlib.pyplot' or alias.name == 'pyplot')
+    return names
+
+
+def _is_main_guard(node):
+    """True for ``if __name__ == '__main__':``."""
+    test = node.test if isinstance(node, ast.If) else None
+    return (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name)
+            and test.left.id == '__name__')
+
+
+def draws_on_import(tree):
+    """
+    True if top-level code (outside functions, classes and the main guard)
+    calls pyplot or saves/shows a figure. Configuring pyplot (rc, rcParams,
+    style) does not count.
+    """
+    pyplot = _pyplot_names(tree)
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef,
+                             ast.Import, ast.ImportFrom)) or _is_main_guard(node):
+            continue
+        for call in ast.walk(node):
+            if not isinstance(call, ast.Call):
+                continue
+            func, chain = call.func, []
+            while isinstance(func, ast.Attribute):
+                chain.insert(0, func.attr)
+                func = func.value
+            if chain and chain[-1] in DRAWING_CALLS:
+                return True
+            if (isinstance(func, ast.Name) and func.id in pyplot
+                    and not (chain and chain[0] in CONFIG_ATTRS)):
+                return True
+    return False
+
+
+def follows_protocol(source, filename='<chart>'):
+    """
+    True if the source defines a literal CHART_METADATA and a top-level
+    ``build`` function, and draws nothing on import.
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except (SyntaxError, ValueError):
+        return False
+    if not any(isinstance(node, ast.FunctionDef) and node.name == ENTRY_POINT
+               for node in tree.body):
+        return False
+    return bool(parse_chart_metadata(source, filename)) and not draws_on_import(tree)
+
+
+def is_plugin(py_file):
+    """True if a chart script follows the plugin protocol (cached by mtime and size)."""
+    py_file = Path(py_file)
+    try:
+        stat = py_file.stat()
+    except OSError:
+        return False
+    cached = _cache.get(py_file)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    value = follows_protocol(py_file.read_text(encoding='utf-8'), str(py_file))
+    _cache[py_file] = (stat.st_mtime_ns, stat.st_size, value)
+    return value
+
+
+def build_args(formats=None, dpi=None):
+    """Formats and dpi of a build (defaults from "export_formats" in build_config.json)."""
+    configured = load_config().get('export_formats', {'pdf': 300, 'png': 300})
+    formats = list(configured) if formats is None else [fmt.lstrip('.') for fmt in formats]
+    dpi = max(configured.get(fmt, 300) for fmt in formats) if dpi is None else dpi
+    return formats, dpi
+
+
+def load_plugin(py_file):
+    """
+    Import a plugin chart without running its build.
+
+    Returns
+    -------
+    namespace : dict
+        Module globals of the chart (its ``build``, data functions, ...)
+    """
+    py_file = Path(py_file).resolve()
+    sys.path.insert(0, str(py_file.parent))
+    try:
+        return runpy.run_path(str(py_file), run_name=f"chart_{py_file.stem}")
+    finally:
+        sys.path.remove(str(py_file.parent))
+
+
+def run_plugin(py_file, output_dir, formats=None, dpi=None):
+    """Import a plugin chart and call its ``build``; returns the written paths."""
+    formats, dpi = build_args(formats, dpi)
+    namespace = load_plugin(py_file)
+    paths = namespace[ENTRY_POINT](str(output_dir), formats, dpi)
+    return [Path(path) for path in paths or []]
+
+
+def run_legacy(py_file, output_dir):
+    """
+    Shim for scripts that draw at import time: run the script in its own
+    folder and copy what it wrote to ``output_dir``.
+    """
+    from .chartexec import run_chart_script
+
+    py_file = Path(py_file).resolve()
+    started_at = time.time()
+    ok, output = run_chart_script(py_file)
+    if not ok:
+        raise RuntimeError(f"{py_file.name} failed:\n{output}")
+
+    paths = find_outputs(py_file.parent, since=started_at - 1)
+    output_dir = Path(output_dir).resolve()
+    if output_dir != py_file.parent:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        paths = [Path(shutil.copy2(path, output_dir / path.name)) for path in paths]
+    return paths
+
+
+class ChartPlugin:
+    """One chart script behind the plugin interface (plugin or legacy shim)."""
+
+    def __init__(self, py_file):
+        self.py_file = Path(py_file).resolve()
+        self.name = self.py_file.stem
+
+    @property
+    def metadata(self):
+        return read_chart_metadata(self.py_file)
+
+    @property
+    def is_plugin(self):
+        return is_plugin(self.py_file)
+
+    def build(self, output_dir=None, formats=None, dpi=None):
+        """
+        Build the chart into ``output_dir`` (default: the chart folder).
+
+        Legacy scripts ignore ``formats`` and ``dpi``.
+
+        Returns
+        -------
+        paths : list of Path
+            Written files
+        """
+        output_dir = self.py_file.parent if output_dir is None else Path(output_dir)
+        if self.is_plugin:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            return run_plugin(self.py_file, output_dir, formats, dpi)
+        return run_legacy(self.py_file, output_dir)
+
+
+def discover(project_root=PROJECT_ROOT, groups=None):
+    """ChartPlugin of every chart script in the chart index (no chart code is run)."""
+    index = load_index(project_root)
+    return [ChartPlugin(chart.script) for chart in index.charts(groups=groups, with_script=True)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List chart plugins or build one chart through its plugin interface')
+    parser.add_argument('chart', nargs='?',
+                        help='Chart to build (folder name); without it, list all charts')
+    parser.add_argument('--out', default=None,
+                        help='Output folder (default: the chart folder)')
+    parser.add_argument('--formats', nargs='+', default=None,
+                        help='Formats to write (default: build_config.json)')
+    parser.add_argument('--dpi', type=float, default=None,
+                        help='Resolution (default: build_config.json)')
+    args = parser.parse_args()
+
+    charts = discover()
+    if args.chart is None:
+        plugins = [chart for chart in charts if chart.is_plugin]
+        for chart in charts:
+            kind = 'PLUGIN' if chart.is_plugin else 'LEGACY'
+            print(f"  [{kind}] {chart.name}: {chart.metadata.get('title', '')}")
+        print(f"\n{len(plugins)} of {len(charts)} charts are plugins")
+        return
+
+    matches = [chart for chart in charts if chart.name == args.chart]
+    if not matches:
+        parser.error(f"unknown chart {args.chart!r}")
+    import matplotlib
+    matplotlib.use('Agg')
+    for path in matches[0].build(args.out, args.formats, args.dpi):
+        print(f"  [OK] {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""
+Chart Build Profiling
+
+Per-chart wall time, CPU time and peak memory, with the wall time split
+into phases:
+- import: time spent in import statements
+- draw: building and laying out the figure (pyplot functions, Figure and
+  Axes methods, including tight_layout and explicit draws)
+- savefig: writing the output files (Figure.savefig, including its draws)
+- compute: everything else (numpy, scipy, sklearn, plain python)
+
+Phases are measured by wrapping these entry points in the process that runs
+the chart (a warm worker, or the chart subprocess); only the outermost call
+counts, so time inside savefig is never also counted as draw. matplotlib
+itself is imported before the chart starts, as in a warm worker (the
+startup and import cost of a fresh interpreter is profiled by
+build_tools.startup). Peak RSS is measured per chart by resetting the
+kernel's high-water mark before the run (Linux); elsewhere it is the peak
+of the whole worker process.
+
+Each profiled build writes a JSON report to .build/profiles/ (the last
+"profile_history" runs are kept) and is compared with the previous report:
+charts whose wall time or peak memory grew by more than
+"profile_regression_pct" percent (and by at least "profile_min_seconds" /
+"profile_min_mb") are flagged as regressions.
+
+Usage:
+    python generate_all_new_charts.py --profile --force
+    python -m build_tools.profiling [--top 15]   # show the latest report
+"""
+
+import argparse
+import builtins
+import contextlib
+import functools
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .cache import environment_fingerprint, relative_key
+from .config import PROJECT_ROOT, load_config
+
+
+PROFILE_DIR = PROJECT_ROOT / '.build' / 'profiles'
+PHASES = ['import', 'compute', 'draw', 'savefig']
+
+# Profiler of the chart currently running in this process (None = not profiling)
+_active = None
+_installed = False
+
+
+def reset_peak_rss():
+    """Reset the peak RSS of this process (Linux); False if unsupported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    if resource is None:
+        return 0.0
+    # ru_maxrss is in kB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if peak < 1 << 32 else peak / (1024 * 1024)
+
+
+def _timed(phase, func):
+    """Wrap ``func`` so its time is added to ``phase`` of the active profiler."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None or profiler.phase is not None:
+            return func(*args, **kwargs)
+        profiler.phase = phase
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.phases[phase] += time.perf_counter() - start
+            profiler.phase = None
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+def _wrap_class(cls):
+    """Wrap the public methods a class defines itself (savefig -> savefig, rest -> draw)."""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_') or not callable(attr) or isinstance(attr, (type, staticmethod, classmethod)):
+            continue
+        if getattr(attr, '__profiled__', False):
+            continue
+        setattr(cls, name, _timed('savefig' if name == 'savefig' else 'draw', attr))
+
+
+def install_hooks():
+    """Install the phase hooks in this process (once; they are inert when not profiling)."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    builtins.__import__ = _timed('import', builtins.__import__)
+
+    import matplotlib.pyplot as plt
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+
+    classes = set()
+    targets = [Figure, Axes]
+    if 'mpl_toolkits.mplot3d' in sys.modules:
+        from mpl_toolkits.mplot3d import Axes3D
+        targets.append(Axes3D)
+    for target in targets:
+        classes.update(cls for cls in target.__mro__
+                       if cls.__module__.startswith(('matplotlib.figure', 'matplotlib.axes', 'mpl_toolkits')))
+    for cls in classes:
+        _wrap_class(cls)
+
+    for name, func in list(vars(plt).items()):
+        if (not name.startswith('_') and callable(func) and not isinstance(func, type)
+                and getattr(func, '__module__', None) == 'matplotlib.pyplot'):
+            setattr(plt, name, _timed('savefig' if name == 'savefig' else 'draw', func))
+
+
+class ChartProfiler:
+    """Measures one chart run; use ``measure()`` around the run, then ``result()``."""
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.phase = None
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_rss_mb = 0.0
+        self.peak_rss_scope = 'chart'
+
+    @contextlib.contextmanager
+    def measure(self):
+        global _active
+        install_hooks()
+        if not reset_peak_rss():
+            self.peak_rss_scope = 'process'
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        _active = self
+        try:
+            yield self
+        finally:
+            _active = None
+            self.wall = time.perf_counter() - wall_start
+            self.cpu = time.process_time() - cpu_start
+            self.peak_rss_mb = peak_rss_mb()
+
+    def result(self):
+        phases = dict(self.phases)
+        phases['compute'] = max(0.0, self.wall - sum(phases.values()))
+        return {
+            'wall': round(self.wall, 4),
+            'cpu': round(self.cpu, 4),
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'peak_rss_scope': self.peak_rss_scope,
+            'phases': {phase: round(phases[phase], 4) for phase in PHASES},
+        }
+
+
+def profile_dir(project_root=PROJECT_ROOT):
+    project_root = Path(project_root).resolve()
+    return PROFILE_DIR if project_root == PROJECT_ROOT else project_root / '.build' / 'profiles'
+
+
+def write_report(results, project_root=PROJECT_ROOT, **info):
+    """
+    Write the profiles of a build to .build/profiles/<timestamp>.json.
+
+    Parameters
+    ----------
+    results : list of ChartResult
+        Results that carry a profile (cached or unprofiled ones are left out)
+    **info
+        Extra top-level fields (e.g. backend, jobs)
+
+    Returns
+    -------
+    path : Path
+    """
+    project_root = Path(project_root).resolve()
+    charts = {}
+    for result in results:
+        if result.profile:
+            charts[relative_key(result.script, project_root)] = dict(result.profile, ok=result.ok)
+
+    report = dict(info, created=datetime.now().isoformat(timespec='seconds'),
+                  environment=environment_fingerprint(), charts=charts)
+
+    directory = profile_dir(project_root)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+
+    keep = load_config().get('profile_history', 20)
+    for old in sorted(directory.glob('*.json'))[:-keep]:
+        old.unlink()
+    return path
+
+
+def load_reports(project_root=PROJECT_ROOT, count=None):
+    """Profile reports, newest first."""
+    reports = []
+    for path in sorted(profile_dir(project_root).glob('*.json'), reverse=True)[:count]:
+        try:
+            with open(path) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        report['path'] = str(path)
+        reports.append(report)
+    return reports
+
+
+def compare_reports(current, previous, config=None):
+    """
+    Compare two reports chart by chart.
+
+    Returns
+    -------
+    changes : list of tuple
+        (chart, metric, old, new, 'regression' | 'improvement') for every chart
+        built successfully in both reports whose wall time or peak RSS moved
+        beyond the configured thresholds
+    """
+    config = load_config() if config is None else config
+    ratio = 1 + config.get('profile_regression_pct', 25) / 100
+    minimum = {'wall': config.get('profile_min_seconds', 0.5),
+               'peak_rss_mb': config.get('profile_min_mb', 50)}
+
+    changes = []
+    for chart, new in sorted(current['charts'].items()):
+        old = previous['charts'].get(chart)
+        if not old or not old.get('ok') or not new.get('ok'):
+            continue
+        for metric in ('wall', 'peak_rss_mb'):
+            # A process-wide peak is not comparable with a per-chart one
+            if metric == 'peak_rss_mb' and not old.get('peak_rss_scope') == new.get('peak_rss_scope') == 'chart':
+                continue
+            before, after = old[metric], new[metric]
+            if abs(after - before) < minimum[metric]:
+                continue
+            if after > before * ratio:
+                changes.append((chart, metric, before, after, 'regression'))
+            elif before > after * ratio:
+                changes.append((chart, metric, before, after, 'improvement'))
+    return changes
+
+
+def print_profile(report, top=10):
+    """Print the slowest and most memory-hungry charts of a report."""
+    charts = report['charts']
+    if not charts:
+        print("  (no profiled charts)")
+        return
+
+    total = {phase: sum(c['phases'][phase] for c in charts.values()) for phase in PHASES}
+    wall = sum(c['wall'] for c in charts.values())
+    print(f"  Charts: {len(charts)}, wall {wall:.1f}s, cpu {sum(c['cpu'] for c in charts.values()):.1f}s")
+    print("  Phases: " + ", ".join(f"{phase} {total[phase]:.1f}s" for phase in PHASES))
+
+    print(f"\n  Slowest {min(top, len(charts))}:")
+    print(f"    {'wall':>6} {'cpu':>6} {'import':>6} {'compute':>7} {'draw':>6} {'save':>6}  chart")
+    for name, c in sorted(charts.items(), key=lambda item: -item[1]['wall'])[:top]:
+        p = c['phases']
+        print(f"    {c['wall']:6.2f} {c['cpu']:6.2f} {p['import']:6.2f} {p['compute']:7.2f} "
+              f"{p['draw']:6.2f} {p['savefig']:6.2f}  {name}")
+
+    print(f"\n  Peak memory (top {min(top, len(charts))}):")
+    for name, c in sorted(charts.items(), key=lambda item: -item[1]['peak_rss_mb'])[:top]:
+        print(f"    {c['peak_rss_mb']:7.0f} MB  {name}")
+
+
+def print_comparison(changes, previous):
+    """Print regressions and improvements against ``previous``."""
+    print(f"\n  Compared with {Path(previous['path']).name} ({previous.get('created', '?')}):")
+    if not changes:
+        print("    no significant changes")
+        return
+    for chart, metric, before, after, kind in changes:
+        label = 'REGRESSION' if kind == 'regression' else 'FASTER' if metric == 'wall' else 'SMALLER'
+        unit = 's' if metric == 'wall' else ' MB'
+        print(f"    [{label}] {chart}: {metric} {before:.2f}{unit} -> {after:.2f}{unit}")
+
+
+def report_build(results, project_root=PROJECT_ROOT, top=10, **info):
+    """Write the report of a profiled build, print it and compare with the previous run."""
+    path = write_report(results, project_root, **info)
+    reports = load_reports(project_root, count=2)
+
+    print(f"\n{'='*60}")
+    print(f"Build profile: {path}")
+    print("=" * 60)
+    print_profile(reports[0], top)
+
+    changes = []
+    if len(reports) > 1:
+        changes = compare_reports(reports[0], reports[1])
+        print_comparison(changes, reports[1])
+    return path, changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the latest chart build profile')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Charts listed per table')
+    args = parser.parse_args()
+
+    reports = load_reports(count=2)
+    if not reports:
+        print("No profile reports yet (run generate_all_new_charts.py --profile)")
+        sys.exit(1)
+
+    print(f"Build profile: {reports[0]['path']}")
+    print("=" * 60)
+    print_profile(reports[0], args.top)
+    if len(reports) > 1:
+        print_comparison(compare_reports(reports[0], reports[1]), reports[1])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+"""
+Selective Rasterization
+
+Dense fills make large vector PDFs: contourf levels, 3D plot_surface
+polygons and big scatters are written path by path. pdflatex is then slow
+to include them and PDF viewers are slow to render the slides.
+``install()`` patches ``Figure.savefig`` so that for vector formats (pdf,
+svg, eps, ps) every artist above a complexity threshold is drawn as an
+image at a target dpi. Text, axes, ticks, legends and annotations stay
+vector. PNG output is unaffected.
+
+- complexity() counts the vertices, points or polygons an artist writes
+  to a vector file. Only collections, lines and patches of an Axes are
+  candidates.
+- a raster layer is not always smaller: a full-panel fill at a high dpi
+  can take more bytes than its paths. With "rasterize_if_smaller" both
+  versions are rendered in memory and the smaller one is written. This
+  only happens for figures that have a layer above the threshold.
+- "rasterize_threshold", "rasterize_dpi" and "rasterize_if_smaller" in
+  build_config.json set the defaults. A chart overrides them with the same
+  keys in CHART_METADATA: 'rasterize': False keeps the chart fully vector,
+  and 'rasterize_dpi': 100, 'rasterize_if_smaller': False always rasterize
+  its dense layers, e.g. a 3D surface that viewers are slow to draw.
+- artists a chart rasterizes itself are left as they are
+
+Enabled with "rasterize" in build_config.json; the chart build installs
+the hook in every worker. Changing the settings rebuilds all charts
+(the policy is part of the build cache key).
+
+``report`` runs charts with the hook in measuring mode. Every vector save
+is rendered with and without the policy, and the bytes saved are
+printed. The chart outputs are not written.
+
+Usage:
+    python -m build_tools.rasterize report [chart.py ...]
+    python -m build_tools.rasterize stats chart.py
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+from .config import PROJECT_ROOT, load_config
+from .metadata import read_chart_metadata
+
+
+VECTOR_FORMATS = ('pdf', 'svg', 'svgz', 'eps', 'ps')
+DEFAULT_THRESHOLD = 5000
+DEFAULT_DPI = 150
+
+_settings = {'threshold': DEFAULT_THRESHOLD, 'dpi': DEFAULT_DPI, 'if_smaller': True}
+_measure = False
+_installed = False
+_log = []
+
+
+def policy_fingerprint(config=None):
+    """The configured policy as a string (part of the chart cache key)."""
+    config = load_config() if config is None else config
+    if not config.get('rasterize'):
+        return 'rasterize=off'
+    return (f"rasterize={config.get('rasterize_threshold', DEFAULT_THRESHOLD)}"
+            f"@{config.get('rasterize_dpi', DEFAULT_DPI)}"
+            f"{'/if-smaller' if config.get('rasterize_if_smaller', True) else ''}")
+
+
+def config_settings(config=None):
+    """Default settings from build_config.json."""
+    config = load_config() if config is None else config
+    return {'threshold': config.get('rasterize_threshold', DEFAULT_THRESHOLD),
+            'dpi': config.get('rasterize_dpi', DEFAULT_DPI),
+            'if_smaller': config.get('rasterize_if_smaller', True)}
+
+
+def chart_settings(py_file=None, defaults=None):
+    """
+    Rasterization settings of a chart: the defaults with its CHART_METADATA override.
+
+    Returns
+    -------
+    settings : dict or None
+        {'threshold': ..., 'dpi': ..., 'if_smaller': ...}, or None if the
+        chart stays vector
+    """
+    settings = dict(_settings if defaults is None else defaults)
+    if py_file is None:
+        return settings
+    metadata = read_chart_metadata(py_file)
+    if metadata.get('rasterize', True) is False:
+        return None
+    settings.update((key, metadata[f'rasterize_{key}']) for key in settings
+                    if f'rasterize_{key}' in metadata)
+    return settings
+
+
+def complexity(artist):
+    """Vertices, points or polygons ``artist`` writes to a vector file."""
+    from matplotlib.collections import Collection, QuadMesh
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+
+    if isinstance(artist, QuadMesh):
+        return artist.get_coordinates()[..., 0].size
+    if isinstance(artist, Collection):
+        # 3D collections hold their geometry in 3D until they are projected
+        faces = getattr(artist, '_faces', None)
+        if faces is not None:
+            return faces.shape[0] * faces.shape[1]
+        segments = getattr(artist, '_segments3d', None)
+        if segments is not None:
+            return sum(len(segment) for segment in segments)
+        points = getattr(artist, '_offsets3d', None)
+        if points is not None:
+            return len(points[0])
+        vertices = sum(len(path.vertices) for path in artist.get_paths())
+        offsets = artist.get_offsets()
+        # Offsets draw the same marker path once per point (scatter)
+        return vertices + (len(offsets) if len(offsets) > 1 else 0)
+    if isinstance(artist, Line2D):
+        points = len(artist.get_xydata())
+        has_markers = artist.get_marker() not in (None, 'None', 'none', '', ' ')
+        return points * (2 if has_markers else 1)
+    if isinstance(artist, Patch):
+        return len(artist.get_path().vertices)
+    return 0
+
+
+def candidates(fig):
+    """Collections, lines and patches of every Axes (not text, axes, legends or spines)."""
+    for ax in fig.axes:
+        yield from ax.collections
+        yield from ax.lines
+        yield from ax.patches
+
+
+def rasterize_dense(fig, threshold):
+    """
+    Rasterize the artists of ``fig`` above ``threshold``.
+
+    Returns
+    -------
+    rasterized : list of (artist, complexity)
+        Artists switched to rasterized by this call
+    """
+    rasterized = []
+    for artist in candidates(fig):
+        if artist.get_rasterized():
+            continue
+        count = complexity(artist)
+        if count > threshold:
+            artist.set_rasterized(True)
+            rasterized.append((artist, count))
+    return rasterized
+
+
+def _save_format(fname, kwargs):
+    """Output format of a savefig call (same rules as savefig)."""
+    import matplotlib
+
+    fmt = kwargs.get('format')
+    if fmt is None and isinstance(fname, (str, os.PathLike)):
+        fmt = Path(fname).suffix.lstrip('.')
+    return (fmt or matplotlib.rcParams['savefig.format']).lower()
+
+
+def _current_chart():
+    """Chart script being run (chartexec and ``python chart.py`` set sys.argv[0])."""
+    script = Path(sys.argv[0]) if sys.argv and sys.argv[0] else None
+    if script is None or script.suffix != '.py' or not script.exists():
+        return None
+    return script.resolve()
+
+
+def take_log():
+    """Vector saves since the last call: dicts with the rasterized artists and sizes."""
+    log = list(_log)
+    _log.clear()
+    return log
+
+
+def install(threshold=None, dpi=None, if_smaller=None, measure=False):
+    """
+    Patch Figure.savefig in this process (idempotent).
+
+    With ``measure`` vector saves are rendered with and without the policy
+    into memory and logged (see take_log()) instead of being written.
+    """
+    global _installed, _measure
+    _measure = measure
+    for key, value in (('threshold', threshold), ('dpi', dpi), ('if_smaller', if_smaller)):
+        if value is not None:
+            _settings[key] = value
+    if _installed:
+        return
+    _installed = True
+
+    from matplotlib.figure import Figure
+
+    savefig = Figure.savefig
+
+    def render(fig, fmt, args, kwargs):
+        buffer = io.BytesIO()
+        savefig(fig, buffer, *args, **{**kwargs, 'format': fmt})
+        return buffer.getvalue()
+
+    def rasterizing_savefig(self, fname, *args, **kwargs):
+        fmt = _save_format(fname, kwargs)
+        if fmt not in VECTOR_FORMATS:
+            return None if _measure else savefig(self, fname, *args, **kwargs)
+        chart = _current_chart()
+        settings = chart_settings(chart)
+        rasterized = rasterize_dense(self, settings['threshold']) if settings else []
+        if not rasterized and not _measure:
+            return savefig(self, fname, *args, **kwargs)
+
+        if_smaller = settings['if_smaller'] if settings else True
+        mixed_kwargs = {**kwargs, 'dpi': settings['dpi']} if rasterized else kwargs
+        try:
+            if not (_measure or if_smaller):
+                return savefig(self, fname, *args, **mixed_kwargs)
+            mixed = render(self, fmt, args, mixed_kwargs)
+        finally:
+            # Leave the figure as the chart built it (later saves decide again)
+            for artist, _ in rasterized:
+                artist.set_rasterized(False)
+        vector = render(self, fmt, args, kwargs) if rasterized else mixed
+        keep = mixed if len(mixed) < len(vector) or not if_smaller else vector
+
+        if _measure:
+            _log.append({'chart': str(chart) if chart else None, 'format': fmt,
+                         'vector_bytes': len(vector), 'bytes': len(keep),
+                         'mixed_bytes': len(mixed), 'kept': 'mixed' if keep is mixed else 'vector',
+                         'rasterized': [(type(artist).__name__, count) for artist, count in rasterized]})
+            return None
+        if hasattr(fname, 'write'):
+            fname.write(keep)
+        else:
+            with open(fname, 'wb') as f:
+                f.write(keep)
+
+    Figure.savefig = rasterizing_savefig
+
+
+def report(scripts):
+    """
+    Run charts with the hook in measuring mode.
+
+    Returns
+    -------
+    entries : list of dict
+        One per vector save: chart, format, vector_bytes, bytes, rasterized
+    """
+    from .chartexec import run_chart_script
+
+    install(**config_settings(), measure=True)
+    entries = []
+    for script in scripts:
+        ok, output = run_chart_script(script)
+        log = take_log()
+        if not ok:
+            print(f"[FAIL] {script}\n{output}")
+        for entry in log:
+            entry['chart'] = str(script)
+        entries.extend(log)
+    return entries
+
+
+def print_report(entries):
+    """Print the bytes each chart's vector outputs save with the policy, largest first."""
+    def kb(size):
+        return f"{size / 1024:.0f} KB"
+
+    entries = sorted(entries, key=lambda e: e['vector_bytes'] - e['bytes'], reverse=True)
+    print(f"  {'chart':36} {'vector':>8} {'mixed':>8} {'saved':>8}  rasterized")
+    for entry in entries:
+        name = Path(entry['chart']).stem
+        artists = ', '.join(f"{kind}({count})" for kind, count in entry['rasterized']) or '-'
+        if entry['rasterized'] and entry['kept'] == 'vector':
+            artists += ' [kept vector]'
+        print(f"  {name[:36]:36} {kb(entry['vector_bytes']):>8} {kb(entry['mixed_bytes']):>8} "
+              f"{kb(entry['vector_bytes'] - entry['bytes']):>8}  {artists}")
+
+    before = sum(e['vector_bytes'] for e in entries)
+    after = sum(e['bytes'] for e in entries)
+    changed = sum(1 for e in entries if e['kept'] == 'mixed' and e['rasterized'])
+    print("=" * 60)
+    print(f"{len(entries)} vector outputs, {changed} written with rasterized layers")
+    if before:
+        print(f"Total: {kb(before)} -> {kb(after)} ({100 * (before - after) / before:.0f}% saved)")
+
+
+def print_stats(fig_artists):
+    """Print the complexity of every candidate artist, largest first."""
+    for name, count in sorted(fig_artists, key=lambda item: item[1], reverse=True):
+        print(f"  {count:>9}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Selective rasterization of dense chart layers')
+    sub = parser.add_subparsers(dest='command', required=True)
+    report_parser = sub.add_parser('report', help='Bytes saved per chart (outputs are not written)')
+    report_parser.add_argument('charts', nargs='*', help='Chart scripts (default: all pipeline charts)')
+    report_parser.add_argument('--json', metavar='FILE', help='Also write the entries as JSON')
+    stats_parser = sub.add_parser('stats', help='Complexity of every artist a chart saves')
+    stats_parser.add_argument('chart')
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        if args.charts:
+            scripts = [Path(chart).resolve() for chart in args.charts]
+        else:
+            from .runner import find_chart_scripts
+            scripts = find_chart_scripts(PROJECT_ROOT)
+        print("=" * 60)
+        print(f"Rasterization report ({len(scripts)} charts)")
+        print("=" * 60)
+        entries = report(scripts)
+        print_report(entries)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(entries, f, indent=1)
+        return
+
+    from matplotlib.figure import Figure
+    from .chartexec import run_chart_script
+
+    seen = []
+    original = Figure.savefig
+
+    def recording_savefig(fig, fname, *a, **kw):
+        if _save_format(fname, kw) in VECTOR_FORMATS and not seen:
+            seen.extend((f"{type(artist).__name__} on {type(artist.axes).__name__}",
+                         complexity(artist)) for artist in candidates(fig))
+
+    Figure.savefig = recording_savefig
+    try:
+        ok, output = run_chart_script(Path(args.chart).resolve())
+    finally:
+        Figure.savefig = original
+    if not ok:
+        print(output)
+        sys.exit(1)
+    config = load_config()
+    settings = chart_settings(Path(args.chart).resolve(), config_settings(config))
+    print(f"Threshold: {settings['threshold'] if settings else 'off (CHART_METADATA)'}")
+    print_stats(seen)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+Chart Registry
+
+One persisted index of every chart folder in the project, shared by all
+pipeline scripts instead of each of them walking the tree on its own.
+
+For each chart the index stores its folder, group (module), script,
+CHART_METADATA (read from the syntax tree, see metadata.py), output files
+and the mtime/size/hash of the script. A refresh only stats files: a chart
+script is re-hashed and its metadata re-read only when its mtime or size
+changed, and a folder is re-listed only when the folder's own mtime changed.
+
+Usage:
+    from build_tools.registry import load_index
+
+    index = load_index()
+    for chart in index.charts(groups=MODULES):
+        print(chart.name, chart.metadata.get('url'))
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+
+from .cache import file_digest
+from .config import PROJECT_ROOT
+from .metadata import read_chart_metadata
+
+
+INDEX_PATH = PROJECT_ROOT / '.build' / 'chart_index.json'
+INDEX_VERSION = 2
+
+# Groups with charts under <group>/charts/<name>/
+MODULES = [
+    'module1_perceptron',
+    'module2_mlp',
+    'module3_training',
+    'module4_applications',
+    'appendix'
+]
+# Groups with chart folders directly inside (numbered NN_name folders)
+STANDALONE_GROUPS = [
+    'standalone_charts',
+    '.'
+]
+
+OUTPUT_SUFFIXES = ('.pdf', '.png')
+NUMBERED_FOLDER = re.compile(r'^\d\d_')
+
+
+def find_script(chart_dir, files):
+    """Pick the chart script of a folder: <folder>.py, else the first .py file."""
+    py_files = sorted(name for name in files if name.endswith('.py'))
+    if f"{chart_dir.name}.py" in py_files:
+        return f"{chart_dir.name}.py"
+    return py_files[0] if py_files else None
+
+
+class ChartEntry:
+    """One chart folder as stored in the index."""
+
+    def __init__(self, project_root, data):
+        self._root = Path(project_root)
+        self.data = data
+
+    @property
+    def name(self):
+        return self.data['name']
+
+    @property
+    def group(self):
+        return self.data['group']
+
+    @property
+    def dir(self):
+        return self._root / self.data['dir']
+
+    @property
+    def script(self):
+        script = self.data.get('script')
+        return self.dir / script if script else None
+
+    @property
+    def metadata(self):
+        return self.data.get('metadata', {})
+
+    @property
+    def files(self):
+        """Names of all files in the chart folder."""
+        return self.data['files']
+
+    @property
+    def outputs(self):
+        """Paths of the rendered PDF/PNG outputs (QR code excluded)."""
+        return [self.dir / name for name in self.data['outputs']]
+
+    def output(self, suffix):
+        """The <name><suffix> output (e.g. '.pdf') if it exists, else None."""
+        wanted = f"{Path(self.data.get('script') or self.name).stem}{suffix}"
+        return self.dir / wanted if wanted in self.data['outputs'] else None
+
+    def __repr__(self):
+        return f"ChartEntry({self.group}/{self.name})"
+
+
+class ChartIndex:
+    """Persisted, incrementally refreshed index of chart folders."""
+
+    def __init__(self, project_root=PROJECT_ROOT, index_path=INDEX_PATH):
+        self.project_root = Path(project_root)
+        self.index_path = Path(index_path)
+        self.entries = self._load()
+        self.changed = False
+
+    def _load(self):
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != INDEX_VERSION or data.get('root') != str(self.project_root):
+            return {}
+        return data.get('charts', {})
+
+    def save(self):
+        """Write the index atomically (only if something changed)."""
+        if not self.changed and self.index_path.exists():
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(f'.{os.getpid()}.tmp')
+        data = {'version': INDEX_VERSION, 'root': str(self.project_root), 'charts': self.entries}
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self.changed = False
+
+    def _chart_dirs(self):
+        """(group, folder) for every chart folder on disk, in report order."""
+        for group in MODULES:
+            charts_dir = self.project_root / group / 'charts'
+            if charts_dir.is_dir():
+                for chart_dir in sorted(charts_dir.iterdir()):
+                    if chart_dir.is_dir():
+                        yield group, chart_dir
+        for group in STANDALONE_GROUPS:
+            group_dir = self.project_root / group
+            if group_dir.is_dir():
+                for chart_dir in sorted(group_dir.iterdir()):
+                    if chart_dir.is_dir() and NUMBERED_FOLDER.match(chart_dir.name):
+                        yield group, chart_dir
+
+    def _refresh_entry(self, group, chart_dir, old):
+        """Return an up-to-date entry, reusing ``old`` wherever stats are unchanged."""
+        rel_dir = chart_dir.relative_to(self.project_root).as_posix()
+        dir_mtime = chart_dir.stat().st_mtime_ns
+
+        if old and old.get('dir_mtime_ns') == dir_mtime:
+            files = old['files']
+        else:
+            files = sorted(p.name for p in chart_dir.iterdir() if p.is_file())
+
+        entry = {
+            'name': chart_dir.name,
+            'group': group,
+            'dir': rel_dir,
+            'dir_mtime_ns': dir_mtime,
+            'files': files,
+            'script': find_script(chart_dir, files),
+            'outputs': [name for name in files
+                        if name.endswith(OUTPUT_SUFFIXES) and name != 'qr_code.png'],
+        }
+
+        entry['output_stats'] = {}
+        for name in entry['outputs']:
+            stat = (chart_dir / name).stat()
+            entry['output_stats'][name] = [stat.st_mtime_ns, stat.st_size]
+
+        if entry['script']:
+            stat = (chart_dir / entry['script']).stat()
+            script_stat = [stat.st_mtime_ns, stat.st_size]
+            if old and old.get('script') == entry['script'] and old.get('script_stat') == script_stat:
+                entry['script_sha256'] = old['script_sha256']
+                entry['metadata'] = old['metadata']
+            else:
+                py_file = chart_dir / entry['script']
+                entry['script_sha256'] = file_digest(py_file)
+                entry['metadata'] = read_chart_metadata(py_file)
+            entry['script_stat'] = script_stat
+        else:
+            entry['metadata'] = {}
+
+        if entry != old:
+            self.changed = True
+        return entry
+
+    def refresh(self):
+        """Bring the index up to date with the tree (stat-only when nothing changed)."""
+        entries = {}
+        for group, chart_dir in self._chart_dirs():
+            key = chart_dir.relative_to(self.project_root).as_posix()
+            entries[key] = self._refresh_entry(group, chart_dir, self.entries.get(key))
+        if entries.keys() != self.entries.keys():
+            self.changed = True
+        self.entries = entries
+        return self
+
+    def charts(self, groups=None, with_script=False):
+        """Chart entries in report order, optionally filtered by group."""
+        order = {group: i for i, group in enumerate(MODULES + STANDALONE_GROUPS)}
+        entries = [ChartEntry(self.project_root, data) for data in self.entries.values()
+                   if groups is None or data['group'] in groups]
+        if with_script:
+            entries = [entry for entry in entries if entry.script]
+        return sorted(entries, key=lambda e: (order.get(e.group, len(order)), e.data['dir']))
+
+    def get(self, name):
+        """Look up a chart by folder name (first match in report order)."""
+        for entry in self.charts():
+            if entry.name == name:
+                return entry
+        return None
+
+
+def load_index(project_root=PROJECT_ROOT, refresh=True):
+    """Load the chart index, refresh it against the tree and save it."""
+    project_root = Path(project_root).resolve()
+    index_path = INDEX_PATH if project_root == PROJECT_ROOT else project_root / '.build' / 'chart_index.json'
+    index = ChartIndex(project_root, index_path)
+    if refresh:
+        index.refresh()
+        index.save()
+    return index
+
+
+def main():
+    """Print a summary of the chart index."""
+    index = load_index()
+    charts = index.charts()
+    print(f"Chart index: {index.index_path}")
+    print("=" * 60)
+    for group in MODULES + STANDALONE_GROUPS:
+        group_charts = [c for c in charts if c.group == group]
+        if group_charts:
+            with_script = sum(1 for c in group_charts if c.script)
+            print(f"  {group}: {len(group_charts)} charts ({with_script} with scripts)")
+    print(f"\nTotal: {len(charts)} charts")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Reproducible Chart Outputs
+
+Makes a chart build byte-for-byte repeatable, so an unchanged chart produces
+the same PDF/PNG bytes and git, sync_to_quantlet.py and the build cache can
+skip it by hash:
+- SOURCE_DATE_EPOCH (read by matplotlib for the PDF CreationDate) is taken
+  from the environment if set, else from "source_date_epoch" in
+  build_config.json. It is fixed, not derived from git history or mtimes,
+  so shallow clones, rebases and tarball checkouts give the same bytes, and
+  it is part of the build cache key
+- Creator/Producer (PDF) and Software (PNG) metadata are pinned to strings
+  without the matplotlib version, so they only change if the drawing does
+- the global random and numpy.random generators are seeded per chart from
+  the script name before it runs, so results no longer depend on which
+  charts ran before in the same warm worker. Charts that seed themselves
+  keep their own seed; numpy Generator objects must be given a seed
+  explicitly (np.random.default_rng(seed)).
+
+Enabled with "reproducible" in build_config.json.
+
+Usage:
+    from build_tools import reproducible
+
+    with reproducible.chart_run(py_file):
+        ...
+"""
+
+import contextlib
+import os
+import random
+import zlib
+from pathlib import Path
+
+from .config import load_config
+
+
+PINNED_METADATA = {
+    'pdf': {'Creator': 'Matplotlib', 'Producer': 'Matplotlib pdf backend'},
+    'png': {'Software': 'Matplotlib'},
+}
+
+# 2025-01-01 00:00:00 UTC, used when build_config.json has no "source_date_epoch"
+DEFAULT_EPOCH = 1735689600
+
+_installed = False
+
+
+def chart_seed(py_file):
+    """Stable 32-bit seed of a chart (same in this repo and the flattened QuantLet copy)."""
+    return zlib.crc32(Path(py_file).name.encode('utf-8'))
+
+
+def source_date_epoch(config=None):
+    """SOURCE_DATE_EPOCH for chart runs: environment, else build_config.json."""
+    value = os.environ.get('SOURCE_DATE_EPOCH')
+    if value:
+        return int(value)
+    config = load_config() if config is None else config
+    return int(config.get('source_date_epoch', DEFAULT_EPOCH))
+
+
+def _savefig_format(fname, kwargs):
+    fmt = kwargs.get('format')
+    if fmt is None and isinstance(fname, (str, os.PathLike)):
+        fmt = Path(fname).suffix.lstrip('.')
+    if not fmt:
+        import matplotlib
+        fmt = matplotlib.rcParams['savefig.format']
+    return fmt.lower()
+
+
+def install():
+    """Pin savefig metadata in this process (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from matplotlib.figure import Figure
+
+    savefig = Figure.savefig
+
+    def pinned_savefig(self, fname, *args, **kwargs):
+        pinned = PINNED_METADATA.get(_savefig_format(fname, kwargs))
+        if pinned:
+            kwargs['metadata'] = {**pinned, **(kwargs.get('metadata') or {})}
+        return savefig(self, fname, *args, **kwargs)
+
+    Figure.savefig = pinned_savefig
+
+
+@contextlib.contextmanager
+def chart_run(py_file):
+    """Pin metadata, set SOURCE_DATE_EPOCH and seed the global RNGs for one chart run."""
+    import matplotlib
+    import numpy
+
+    install()
+    saved_epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    os.environ['SOURCE_DATE_EPOCH'] = str(source_date_epoch())
+
+    seed = chart_seed(py_file)
+    random.seed(seed)
+    numpy.random.seed(seed)
+    matplotlib.rcParams['svg.hashsalt'] = str(seed)
+    try:
+        yield seed
+    finally:
+        if saved_epoch is None:
+            os.environ.pop('SOURCE_DATE_EPOCH', None)
+        else:
+            os.environ['SOURCE_DATE_EPOCH'] = saved_epoch
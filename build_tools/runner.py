@@ -0,0 +1,453 @@
+"""
+Parallel Chart Runner
+
+Runs chart scripts concurrently, each in its own chart folder, and reports
+the results in a stable order. Two backends are available:
+- "warm": preloaded worker processes (build_tools.workers), the default
+- "subprocess": a fresh python interpreter per chart
+
+Each chart gets the time budget learned from its previous builds
+(build_tools.timeouts); charts that time out or crash are retried at the end
+of the build. Charts run under per-job address-space and CPU limits and are
+started heaviest first, only while their recorded peak memory fits in the
+build's memory budget (build_tools.memory).
+
+Usage:
+    from build_tools.runner import find_chart_scripts, build_charts, print_report
+
+    scripts = find_chart_scripts(project_root)
+    results = build_charts(scripts, jobs=8)
+    print_report(results, project_root)
+"""
+
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+
+from .cache import ChartCache, find_outputs, relative_key
+from .config import PROJECT_ROOT, load_config, resolve_jobs
+from .memory import ChartMemory, MemoryGate, memory_budget_mb
+from .registry import MODULES, load_index
+from .store import ArtifactStore
+from .timeouts import ChartTimings, retry_budget, retry_delay, run_command
+from .trace import span
+from .workers import WarmWorkerPool
+from .workqueue import WorkQueue, drain
+
+
+ChartResult = namedtuple('ChartResult',
+                         ['script', 'ok', 'returncode', 'elapsed', 'message', 'outputs', 'cached',
+                          'profile', 'unchanged', 'killed', 'attempts', 'peak_mb'],
+                         defaults=((), False, None, (), False, 1, None))
+
+
+def find_chart_scripts(project_root=PROJECT_ROOT, modules=MODULES):
+    """Return the chart scripts <module>/charts/<name>/<name>.py in module order (from the chart index)."""
+    index = load_index(project_root)
+    return [chart.script for chart in index.charts(groups=modules, with_script=True)
+            if chart.script.name == f"{chart.name}.py"]
+
+
+def chart_env():
+    """Environment for chart subprocesses (non-interactive backend, chart_helpers and build_tools importable)."""
+    env = dict(os.environ)
+    env['MPLBACKEND'] = 'Agg'
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get('PYTHONPATH')]))
+    return env
+
+
+def chart_command(py_file, export_hook=False, skip_unchanged=False, reproducible=False,
+                  profile=False, info_out=None, lazy_imports=False, limits=False, rasterize=False):
+    """Command line for a chart subprocess (via build_tools.chartexec when hooks are needed)."""
+    flags = [('--export-hook', export_hook), ('--skip-unchanged', skip_unchanged),
+             ('--reproducible', reproducible), ('--profile', profile),
+             ('--lazy-imports', lazy_imports), ('--limits', limits), ('--rasterize', rasterize)]
+    if not any(enabled for _, enabled in flags):
+        return [sys.executable, py_file.name]
+    command = [sys.executable, '-m', 'build_tools.chartexec', py_file.name]
+    command += [flag for flag, enabled in flags if enabled]
+    if info_out:
+        command += ['--info-out', str(info_out)]
+    return command
+
+
+def read_info(path):
+    """Load and remove the run information written by a chart subprocess ({} if none)."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+def chart_outputs(py_file, info, started_at):
+    """
+    Outputs of a successful chart run, and those of them left unchanged.
+
+    Taken from the savefig log when the unchanged-output guard ran (untouched
+    files keep their old mtime), else from the files modified since the start.
+    """
+    logged = info.get('outputs')
+    if logged is None:
+        return find_outputs(py_file.parent, since=started_at - 1), ()
+    existing = set(find_outputs(py_file.parent))
+    outputs = sorted(set(Path(p) for p in logged['written'] + logged['unchanged']) & existing)
+    unchanged = tuple(sorted(set(Path(p) for p in logged['unchanged']) & existing))
+    return outputs, unchanged
+
+
+def run_chart(py_file, timeout=30, export_hook=False, profile=False, reproducible=False,
+              skip_unchanged=False, lazy_imports=False, limits=False, rasterize=False):
+    """
+    Run a single chart script with its folder as working directory.
+
+    The working directory is passed to the child process, so the
+    parent's cwd is never changed and scripts can run side by side. The
+    child runs in its own process group, which is killed on timeout.
+    """
+    py_file = Path(py_file)
+    started_at = time.time()
+    start = time.perf_counter()
+
+    command = chart_command(py_file, export_hook, skip_unchanged, reproducible, profile,
+                            lazy_imports=lazy_imports, limits=limits, rasterize=rasterize)
+    env = chart_env()
+    info_out = None
+    if command[1:2] == ['-m']:
+        fd, info_out = tempfile.mkstemp(prefix='chart_info_', suffix='.json')
+        os.close(fd)
+        command += ['--info-out', info_out]
+
+    try:
+        result = run_command(command, py_file.parent, timeout, env)
+    except subprocess.TimeoutExpired:
+        if info_out:
+            Path(info_out).unlink(missing_ok=True)
+        return ChartResult(py_file, False, None, time.perf_counter() - start,
+                           f"Timeout (>{timeout:.0f}s)", killed=True)
+    except Exception as e:
+        if info_out:
+            Path(info_out).unlink(missing_ok=True)
+        return ChartResult(py_file, False, None, time.perf_counter() - start, str(e))
+
+    elapsed = time.perf_counter() - start
+    info = read_info(info_out) if info_out else {}
+    if result.returncode == 0:
+        outputs, unchanged = chart_outputs(py_file, info, started_at)
+        return ChartResult(py_file, True, 0, elapsed, '', outputs,
+                           profile=info.get('profile'), unchanged=unchanged,
+                           peak_mb=info.get('peak_rss_mb'))
+
+    # A negative return code means the chart was killed by a signal (OOM,
+    # ...); one killed for its CPU limit would exceed it again, so it is
+    # not retried
+    error_msg = result.stderr.strip() or result.stdout.strip()
+    cpu_limit = hasattr(signal, 'SIGXCPU') and result.returncode == -signal.SIGXCPU
+    if cpu_limit:
+        error_msg = 'CPU limit exceeded'
+    return ChartResult(py_file, False, result.returncode, elapsed, error_msg[-300:],
+                       profile=info.get('profile'), killed=result.returncode < 0 and not cpu_limit)
+
+
+def run_chart_warm(pool, py_file, timeout=30, profile=False):
+    """Run a single chart on a warm worker from ``pool``."""
+    py_file = Path(py_file)
+    started_at = time.time()
+
+    ok, output, elapsed, info = pool.run(py_file, timeout, profile)
+    if ok:
+        outputs, unchanged = chart_outputs(py_file, info, started_at)
+        return ChartResult(py_file, True, 0, elapsed, '', outputs,
+                           profile=info.get('profile'), unchanged=unchanged,
+                           peak_mb=info.get('peak_rss_mb'))
+    return ChartResult(py_file, False, 1, elapsed, output.strip()[-300:],
+                       profile=info.get('profile'), killed=bool(info.get('killed')))
+
+
+def run_with_budget(run, py_file, timings):
+    """
+    ``run(py_file, timeout)`` with the chart's learned time budget; the time
+    of a successful run is added to ``timings``.
+    """
+    result = run(py_file, timings.budget(py_file))
+    if result.ok:
+        timings.record(py_file, result.elapsed)
+    return result
+
+
+def open_store(config):
+    """The shared artifact store if "store_outputs" is on and it can be opened, else None."""
+    if not config.get('store_outputs'):
+        return None
+    try:
+        return ArtifactStore(config=config)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def close_store(store):
+    """Apply the store's size budget to what this build recorded, then close it."""
+    store.evict()
+    store.close()
+
+
+def build_charts(scripts, jobs=None, timeout=None, on_result=None, cache=None, backend=None,
+                 profile=False, queue=False, force=False):
+    """
+    Build charts in parallel and return their results in input order.
+
+    Parameters
+    ----------
+    scripts : list of Path
+        Chart scripts to run
+    jobs : int, optional
+        Number of charts built at the same time. Defaults to build_config.json
+        ("jobs": 0 means one per CPU core).
+    timeout : float, optional
+        Same timeout in seconds for every chart. Defaults to the budget each
+        chart learned from its previous builds (build_tools.timeouts).
+    on_result : callable, optional
+        Called with each ChartResult as soon as it finishes (completion order)
+    cache : ChartCache, optional
+        Charts whose inputs are unchanged are skipped (reported as cached),
+        successful builds are recorded and the cache is saved at the end.
+        With "store_outputs", outputs are also kept in the shared artifact
+        store and restored from it when the same inputs were built before
+        (in any checkout).
+    backend : {'warm', 'subprocess'}, optional
+        How charts are executed. Defaults to build_config.json.
+    profile : bool, optional
+        Measure every chart that is built (ChartResult.profile, see
+        build_tools.profiling)
+    queue : bool, optional
+        Share the work with other builds running at the same time through
+        the SQLite queue of build_tools.workqueue. Charts built by another
+        build are reported as cached.
+    force : bool, optional
+        Build every chart: neither the cache nor the artifact store is
+        consulted (results are still recorded in both)
+
+    Returns
+    -------
+    results : list of ChartResult
+        One result per script, in the same order as ``scripts``. Charts that
+        timed out or crashed are retried ("retries" in build_config.json);
+        ChartResult.attempts counts the runs.
+    """
+    config = load_config()
+    jobs = resolve_jobs(config['jobs'] if jobs is None else jobs)
+    backend = config['backend'] if backend is None else backend
+
+    scripts = list(scripts)
+    results = [None] * len(scripts)
+    pending = []
+    store = open_store(config) if cache is not None else None
+
+    for index, script in enumerate(scripts):
+        fresh = cache is not None and not force and cache.is_fresh(script)
+        restored = None
+        if not fresh and store is not None and not force:
+            restored = store.restore_outputs(cache.key(script), Path(script).parent)
+            if restored:
+                cache.record(script, restored)
+        if fresh or restored:
+            results[index] = ChartResult(Path(script), True, 0, 0.0, '', restored or (),
+                                         cached=True)
+            if on_result:
+                on_result(results[index])
+        else:
+            pending.append(index)
+
+    if not pending:
+        if cache is not None:
+            cache.save()
+        if store is not None:
+            store.close()
+        return results
+
+    warm_pool = None
+    if backend == 'warm':
+        warm_pool = WarmWorkerPool.from_config(min(jobs, len(pending)), config)
+        run = partial(run_chart_warm, warm_pool, profile=profile)
+    elif backend == 'subprocess':
+        run = partial(run_chart, export_hook=config['export_hook'], profile=profile,
+                      reproducible=config['reproducible'],
+                      skip_unchanged=config['skip_unchanged'],
+                      rasterize=config.get('rasterize', False),
+                      lazy_imports=bool(config.get('lazy_imports')),
+                      limits=bool(config.get('memory_limit_mb') or config.get('cpu_limit')))
+    else:
+        raise ValueError(f"Unknown chart backend: {backend}")
+
+    timings = ChartTimings(config=config)
+    memory = ChartMemory(config=config)
+    gate = MemoryGate(memory_budget_mb(config))
+    positions = {relative_key(script): index for index, script in enumerate(scripts)}
+
+    def budget(script, attempt):
+        base = timings.budget(script) if timeout is None else timeout
+        return retry_budget(base, attempt, config)
+
+    def run_gated(script, timeout):
+        with gate.reserve(memory.estimate(script)):
+            with span(Path(script).parent.name, 'chart', backend=backend,
+                      budget=round(timeout, 1)) as info:
+                result = run(script, timeout)
+                info.update(ok=result.ok, peak_mb=result.peak_mb)
+                return result
+
+    def finish(result):
+        if result.ok:
+            timings.record(result.script, result.elapsed)
+            if result.peak_mb:
+                memory.record(result.script, result.peak_mb)
+        if cache is not None:
+            if result.ok and result.outputs:
+                cache.record(result.script, result.outputs)
+                if store is not None and not result.cached:
+                    store.record_outputs(cache.key(result.script), result.outputs)
+            else:
+                cache.invalidate(result.script)
+        index = positions.get(relative_key(result.script))
+        if index is not None:
+            results[index] = result
+            if on_result:
+                on_result(result)
+
+    if queue:
+        try:
+            _build_from_queue([scripts[index] for index in pending], run_gated, budget, jobs,
+                              config, cache, finish)
+        finally:
+            if warm_pool is not None:
+                warm_pool.close()
+            timings.save()
+            memory.save()
+            if cache is not None:
+                cache.save()
+            if store is not None:
+                close_store(store)
+        return results
+
+    # Each task blocks on its own worker or child interpreter, so threads
+    # are enough to keep `jobs` chart processes busy at once. Charts that
+    # were killed are retried only once everything else has finished, so a
+    # few hanging charts do not hold up the rest of the build. Heavy charts
+    # are submitted first; the memory gate lets lighter ones fill the rest
+    # of the budget around them.
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            for attempt in range(1, config['retries'] + 2):
+                time.sleep(retry_delay(attempt, config))
+                pending.sort(key=lambda index: -memory.estimate(scripts[index]))
+                futures = {pool.submit(run_gated, scripts[index],
+                                       budget(scripts[index], attempt)): index
+                           for index in pending}
+                pending = []
+                for future in as_completed(futures):
+                    index = futures[future]
+                    result = future.result()._replace(attempts=attempt)
+                    if result.killed and attempt <= config['retries']:
+                        pending.append(index)
+                        continue
+                    finish(result)
+                if not pending:
+                    break
+    finally:
+        if warm_pool is not None:
+            warm_pool.close()
+
+    timings.save()
+    memory.save()
+    if cache is not None:
+        cache.save()
+    if store is not None:
+        close_store(store)
+
+    return results
+
+
+def _build_from_queue(scripts, run, budget, jobs, config, cache, finish):
+    """Build ``scripts`` through the shared queue; ``finish`` gets every final result."""
+    keys = cache if cache is not None else ChartCache()
+    with WorkQueue(config=config) as shared:
+        shared.enqueue([(script, keys.key(script)) for script in scripts])
+        ran = set()
+
+        def finished_here(result):
+            ran.add(relative_key(result.script))
+            finish(result)
+
+        drain(shared, scripts, run, budget, jobs, config, finished_here)
+
+        for script, (owner, attempts, data) in shared.results(scripts).items():
+            if relative_key(script) in ran:
+                continue
+            script = Path(script)
+            outputs = [script.parent / name for name in data['outputs']]
+            unchanged = tuple(script.parent / name for name in data['unchanged'])
+            message = data['message'] or f"built by {owner}"
+            finish(ChartResult(script, data['ok'], data['returncode'], data['elapsed'], message,
+                               outputs, cached=data['ok'], unchanged=unchanged,
+                               attempts=attempts))
+
+
+def chart_group(py_file, project_root=PROJECT_ROOT):
+    """Return the top-level folder a chart belongs to (e.g. 'module2_mlp')."""
+    try:
+        return Path(py_file).resolve().relative_to(Path(project_root).resolve()).parts[0]
+    except ValueError:
+        return Path(py_file).parent.parent.name
+
+
+def print_report(results, project_root=PROJECT_ROOT):
+    """Print results grouped by module in input order, followed by totals."""
+    current_group = None
+    success = 0
+    cached = 0
+    unchanged = 0
+    failed = []
+
+    for result in results:
+        group = chart_group(result.script, project_root)
+        if group != current_group:
+            print(f"\n=== {group} ===")
+            current_group = group
+
+        name = result.script.parent.name
+        if result.cached:
+            print(f"  [CACHED] {name}")
+            cached += 1
+        elif result.ok:
+            all_unchanged = result.unchanged and len(result.unchanged) == len(result.outputs)
+            note = ', unchanged' if all_unchanged else ''
+            note += f", attempt {result.attempts}" if result.attempts > 1 else ''
+            print(f"  [OK] {name} ({result.elapsed:.1f}s{note})")
+            success += 1
+            unchanged += bool(all_unchanged)
+        else:
+            last_line = result.message.splitlines()[-1] if result.message else 'unknown error'
+            attempts = f" ({result.attempts} attempts)" if result.attempts > 1 else ''
+            print(f"  [FAIL] {name}{attempts}: {last_line[:100]}")
+            failed.append(name)
+
+    print(f"\n{'='*60}")
+    print(f"Chart generation complete!")
+    print(f"  Success: {success} ({unchanged} with all outputs unchanged)")
+    print(f"  Unchanged (cached): {cached}")
+    print(f"  Failed: {len(failed)}")
+    for name in failed:
+        print(f"    - {name}")
+
+    return success, failed
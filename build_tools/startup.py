@@ -0,0 +1,359 @@
+"""
+Chart Startup Profiler
+
+Much of a chart's build time in a fresh interpreter is startup: importing
+matplotlib, mpl_toolkits.mplot3d, scipy.ndimage or sklearn, and loading the
+matplotlib font cache. This runs every chart once in a fresh
+``python -X importtime`` process, as ``python <chart>.py`` would run it,
+and splits its wall time into:
+- interpreter: process start up to the first line of the chart
+- imports: time spent importing modules from the chart on (sum of the
+  importtime self times); font_manager is its share for
+  matplotlib.font_manager, which loads the font cache when imported
+- run: the rest (compute, drawing, saving)
+
+The chart runs with a temporary working folder, so its outputs are
+discarded and the checkout is left untouched.
+
+Per chart the direct imports of the script are listed with their
+cumulative cost; across charts the import time is aggregated per module
+and per top-level package. Imports whose names a chart never uses are
+flagged, as they are pure startup cost.
+
+With --lazy the charts run under the lazy import layer (build_tools.lazy,
+modules in "lazy_imports"). Eager and lazy runs are saved separately in
+.build/startup/, and once both exist the difference per chart is shown.
+
+Usage:
+    python -m build_tools.startup                  # all charts, eager imports
+    python -m build_tools.startup --lazy           # ... with the lazy layer
+    python -m build_tools.startup xor_problem --top 5
+    python -m build_tools.startup --report         # show the saved runs only
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from .cache import relative_key
+from .config import PROJECT_ROOT, load_config
+from .registry import load_index
+from .timeouts import ChartTimings, run_command
+
+
+STARTUP_DIR = PROJECT_ROOT / '.build' / 'startup'
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+CHART_START = 'chart-startup-start'
+CHART_END = 'chart-startup-end'
+
+# Runs the chart the way `python chart.py` does (outputs go to the folder in
+# argv[2]), after marking on stderr where interpreter startup ends
+# (importtime lines before it are not the chart's)
+BOOTSTRAP = (
+    "import sys, time\n"
+    "from build_tools import lazy\n"
+    "lazy.install(sys.argv[3:])\n"
+    f"sys.stderr.write('{CHART_START} %r\\n' % time.time()); sys.stderr.flush()\n"
+    "try:\n"
+    "    lazy.run_script(sys.argv[1], sys.argv[2])\n"
+    "finally:\n"
+    f"    sys.stderr.write('{CHART_END} %r\\n' % time.time()); sys.stderr.flush()\n"
+)
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``-X importtime`` output of a bootstrapped chart run.
+
+    Returns
+    -------
+    imports : list of tuple
+        (module, self seconds, cumulative seconds, depth) of every module
+        imported after the chart started, in completion order
+    marks : dict
+        Epoch times of CHART_START / CHART_END (missing if not reached)
+    """
+    imports = []
+    marks = {}
+    started = False
+    for line in stderr.splitlines():
+        if line.startswith((CHART_START, CHART_END)):
+            name, _, value = line.partition(' ')
+            marks[name] = float(value)
+            started = True
+            continue
+        match = IMPORTTIME_LINE.match(line)
+        if match and started:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us) / 1e6, int(cumulative_us) / 1e6,
+                            (len(indent) - 1) // 2))
+    return imports, marks
+
+
+def unused_imports(source):
+    """
+    Top-level imports of a script whose bound names are never used.
+
+    Returns
+    -------
+    unused : list of tuple
+        (module, name) per unused binding, e.g. ('mpl_toolkits.mplot3d', 'Axes3D')
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+
+    bound = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                bound.append((alias.name, alias.asname or alias.name.split('.')[0]))
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for alias in node.names:
+                if alias.name != '*':
+                    bound.append((node.module, alias.asname or alias.name))
+
+    used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    return [(module, name) for module, name in bound if name not in used]
+
+
+def chart_startup(py_file, lazy=(), timeout=60, project_root=PROJECT_ROOT):
+    """
+    Run one chart in a fresh ``-X importtime`` interpreter and break down its startup.
+
+    Parameters
+    ----------
+    lazy : list of str
+        Modules imported lazily (build_tools.lazy); empty for a plain run
+
+    Returns
+    -------
+    profile : dict
+        'ok', 'total', 'interpreter', 'imports', 'font_manager', 'run' (seconds),
+        'direct' ([module, cumulative] imported by the chart itself, slowest
+        first), 'modules' ({module: self seconds}) and 'unused'
+        ([module, name, cumulative] for unused imports the chart itself loaded)
+    """
+    py_file = Path(py_file).resolve()
+    env = dict(os.environ, MPLBACKEND='Agg')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(Path(project_root).resolve()),
+                                                      env.get('PYTHONPATH')]))
+
+    with tempfile.TemporaryDirectory(prefix='chart_startup_') as output_dir:
+        command = [sys.executable, '-X', 'importtime', '-c', BOOTSTRAP, str(py_file), output_dir,
+                   *lazy]
+        started = time.time()
+        try:
+            result = run_command(command, output_dir, timeout, env)
+            ok, stderr = result.returncode == 0, result.stderr
+        except subprocess.TimeoutExpired as e:
+            ok, stderr = False, e.stderr or ''
+            if isinstance(stderr, bytes):
+                stderr = stderr.decode(errors='replace')
+        total = time.time() - started
+
+    imports, marks = parse_importtime(stderr)
+    chart_start = marks.get(CHART_START, started)
+    chart_end = marks.get(CHART_END, started + total)
+    import_time = sum(seconds for _, seconds, _, _ in imports)
+
+    modules = {}
+    for module, seconds, _, _ in imports:
+        modules[module] = round(modules.get(module, 0.0) + seconds, 4)
+    direct = sorted(((module, seconds) for module, _, seconds, depth in imports if depth == 0),
+                    key=lambda item: -item[1])
+
+    # Only imports that executed because of this statement cost anything
+    own = dict(direct)
+    unused = []
+    for module, name in unused_imports(py_file.read_text(encoding='utf-8')):
+        cost = own.get(module, own.get(f"{module}.{name}", 0.0))
+        if cost > 0:
+            unused.append([module, name, round(cost, 4)])
+
+    return {
+        'ok': ok,
+        'total': round(total, 4),
+        'interpreter': round(chart_start - started, 4),
+        'imports': round(import_time, 4),
+        'font_manager': round(modules.get('matplotlib.font_manager', 0.0), 4),
+        'run': round(max(0.0, chart_end - chart_start - import_time), 4),
+        'direct': [[module, round(seconds, 4)] for module, seconds in direct],
+        'modules': modules,
+        'unused': unused,
+    }
+
+
+def profile_charts(scripts, lazy=(), jobs=1, project_root=PROJECT_ROOT, on_result=None):
+    """
+    Startup profile of every chart (see chart_startup), keyed like the build cache.
+
+    Charts run one at a time by default: parallel runs compete for the CPU
+    and disk and inflate each other's startup.
+    """
+    timings = ChartTimings(project_root=project_root)
+    project_root = Path(project_root).resolve()
+
+    def profile(script):
+        # Startup comes on top of the learned budget, which is warm-worker time
+        result = chart_startup(script, lazy, timings.budget(script) + 30, project_root)
+        if on_result:
+            on_result(script, result)
+        return relative_key(script, project_root), result
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        return dict(executor.map(profile, scripts))
+
+
+def report_path(lazy, project_root=PROJECT_ROOT):
+    project_root = Path(project_root).resolve()
+    directory = STARTUP_DIR if project_root == PROJECT_ROOT else project_root / '.build' / 'startup'
+    return directory / f"{'lazy' if lazy else 'eager'}.json"
+
+
+def save_report(charts, lazy, project_root=PROJECT_ROOT):
+    """Write a startup run to .build/startup/eager.json or lazy.json (merged per chart)."""
+    path = report_path(lazy, project_root)
+    report = load_report(lazy, project_root) or {'charts': {}}
+    report['charts'].update(charts)
+    report.update(created=datetime.now().isoformat(timespec='seconds'),
+                  python=sys.version.split()[0], lazy_imports=list(lazy))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+    return path
+
+
+def load_report(lazy, project_root=PROJECT_ROOT):
+    """A saved startup run, None if there is none."""
+    try:
+        with open(report_path(lazy, project_root)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def print_report(report, top=10):
+    """Print the slowest charts to start and the most expensive imports of a run."""
+    charts = report['charts']
+    if not charts:
+        print("  (no charts)")
+        return
+
+    totals = {key: sum(c[key] for c in charts.values())
+              for key in ('total', 'interpreter', 'imports', 'font_manager', 'run')}
+    print(f"  Charts: {len(charts)}, wall {totals['total']:.1f}s: interpreter "
+          f"{totals['interpreter']:.1f}s, imports {totals['imports']:.1f}s "
+          f"(font manager {totals['font_manager'] * 1000:.0f}ms), run {totals['run']:.1f}s")
+    if report.get('lazy_imports'):
+        print(f"  Lazy: {', '.join(report['lazy_imports'])}")
+
+    print(f"\n  Slowest to start ({min(top, len(charts))}):")
+    print(f"    {'total':>6} {'interp':>6} {'import':>6} {'run':>6}  chart: top imports")
+    for name, c in sorted(charts.items(), key=lambda item: -item[1]['imports'])[:top]:
+        heaviest = ', '.join(f"{module} {seconds * 1000:.0f}ms" for module, seconds in c['direct'][:3])
+        status = '' if c['ok'] else ' [FAIL]'
+        print(f"    {c['total']:6.2f} {c['interpreter']:6.2f} {c['imports']:6.2f} {c['run']:6.2f}  "
+              f"{name}{status}: {heaviest}")
+
+    modules, packages = {}, {}
+    for c in charts.values():
+        for module, seconds in c['modules'].items():
+            modules[module] = modules.get(module, 0.0) + seconds
+            package = module.split('.')[0]
+            packages[package] = packages.get(package, 0.0) + seconds
+
+    print(f"\n  Import time per package (all charts):")
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"    {seconds:7.2f}s  {package}")
+    print(f"\n  Slowest modules (self time, all charts):")
+    for module, seconds in sorted(modules.items(), key=lambda item: -item[1])[:top]:
+        print(f"    {seconds:7.2f}s  {module}")
+
+    # A module some chart gets through another import (numpy via matplotlib)
+    # is loaded anyway, so not importing it saves nothing
+    pulled_in = set()
+    for c in charts.values():
+        pulled_in.update(set(c['modules']) - {module for module, _ in c['direct']})
+    unused = [(name, module, imported, cost) for name, c in sorted(charts.items())
+              for module, imported, cost in c.get('unused', []) if module not in pulled_in]
+    if unused:
+        print(f"\n  Unused imports that cost startup time:")
+        for name, module, imported, cost in unused:
+            print(f"    [UNUSED] {name}: {imported} from {module} ({cost * 1000:.0f}ms)")
+
+
+def print_comparison(eager, lazy):
+    """Print the startup saved per chart by the lazy layer."""
+    common = sorted(set(eager['charts']) & set(lazy['charts']))
+    if not common:
+        return
+    print(f"\n  Lazy vs eager imports ({', '.join(lazy.get('lazy_imports', [])) or 'none'}):")
+    saved_total = 0.0
+    for name in common:
+        before, after = eager['charts'][name]['imports'], lazy['charts'][name]['imports']
+        saved_total += before - after
+        if abs(before - after) >= 0.01:
+            print(f"    {before:6.2f}s -> {after:6.2f}s  {name}")
+    print(f"    imports {saved_total:.2f}s less over {len(common)} charts"
+          if saved_total >= 0 else f"    imports {-saved_total:.2f}s more over {len(common)} charts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile interpreter startup and import time of charts')
+    parser.add_argument('charts', nargs='*',
+                        help='Only these charts (folder names); default: all')
+    parser.add_argument('--lazy', action='store_true',
+                        help='Run with the lazy import layer ("lazy_imports" in build_config.json)')
+    parser.add_argument('--report', action='store_true',
+                        help='Only show the saved runs')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Rows per table')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Charts profiled at the same time (default: 1, for stable timings)')
+    args = parser.parse_args()
+
+    if not args.report:
+        lazy = load_config().get('lazy_imports', []) if args.lazy else []
+        index = load_index()
+        charts = index.charts(with_script=True)
+        if args.charts:
+            charts = [chart for chart in charts if chart.name in args.charts]
+        print(f"Profiling startup of {len(charts)} charts ({'lazy' if lazy else 'eager'} imports)...")
+
+        def progress(script, result):
+            status = 'OK' if result['ok'] else 'FAIL'
+            print(f"  [{status}] {script.parent.name} ({result['total']:.2f}s, "
+                  f"imports {result['imports']:.2f}s)")
+
+        results = profile_charts([chart.script for chart in charts], lazy, args.jobs,
+                                 on_result=progress)
+        path = save_report(results, lazy)
+        print(f"\nSaved {path}")
+
+    reports = {mode: load_report(mode) for mode in (False, True)}
+    shown = reports[args.lazy] or reports[not args.lazy]
+    if shown is None:
+        print("No startup profile yet (run python -m build_tools.startup)")
+        sys.exit(1)
+
+    print(f"\n{'='*60}")
+    print(f"Chart startup ({'lazy' if shown is reports[True] else 'eager'} imports, {shown['created']})")
+    print("=" * 60)
+    print_report(shown, args.top)
+    if reports[False] and reports[True]:
+        print_comparison(reports[False], reports[True])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+"""
+Shared Artifact Store
+
+A content-addressed store for build outputs and backups, outside the
+checkout (default ~/.cache/neural-networks-introduction/store, or
+$NN_ARTIFACT_STORE, or "store_dir" in build_config.json) so every checkout
+on the machine shares it:
+- files are stored once per content hash (objects/ab/abcd...<suffix>), no
+  matter how many charts, checkouts or backups refer to them
+- chart outputs are recorded under the chart's input hash (ChartCache.key);
+  a chart whose inputs were already built in any checkout is restored from
+  the store instead of being rendered again ("store_outputs")
+- backups and archived files are recorded with their checkout and path and
+  can be restored by id
+- the store is kept under "store_budget_mb" by evicting the least recently
+  used chart outputs after every chart build. The outputs of a chart are
+  evicted together, so a chart is either restored completely or rebuilt.
+  Backups and archived files are never evicted (they are the only copy)
+
+``gc`` also cleans up what the other tools leave behind in the checkout:
+the temp_quantlet staging folder, the temp/ aux folders of
+scripts/compile_slides.py and previous/*.backup_* copies of
+quantlet_tools/remove_chart_branding.py (archived). Other files are only
+archived when they match a glob pattern listed in "gc_archive". Files git
+tracks are never archived. The dated module PDFs, for example, are read
+by scripts/merge_pdfs.py.
+
+Usage:
+    python -m build_tools.store                # size, budget, refs
+    python -m build_tools.store gc [--dry-run] [--budget MB]
+    python -m build_tools.store list [--kind backup|archive|output]
+    python -m build_tools.store restore ID [DEST]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .cache import file_digest, relative_key
+from .config import PROJECT_ROOT, load_config
+
+
+STORE_ENV = 'NN_ARTIFACT_STORE'
+DEFAULT_STORE = Path('~/.cache/neural-networks-introduction/store')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    digest TEXT PRIMARY KEY,
+    suffix TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,         -- output | backup | archive
+    key TEXT,                   -- chart input hash (outputs only)
+    checkout TEXT NOT NULL,
+    path TEXT NOT NULL,         -- output name, or path relative to the checkout
+    digest TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS output_refs ON refs (key, path) WHERE kind = 'output';
+"""
+
+
+def store_dir(config=None):
+    """Location of the store: $NN_ARTIFACT_STORE, "store_dir", or the user cache."""
+    if os.environ.get(STORE_ENV):
+        return Path(os.environ[STORE_ENV]).expanduser()
+    config = load_config() if config is None else config
+    if config.get('store_dir'):
+        return Path(config['store_dir']).expanduser()
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    if cache_home:
+        return Path(cache_home) / DEFAULT_STORE.parent.name / DEFAULT_STORE.name
+    return DEFAULT_STORE.expanduser()
+
+
+class ArtifactStore:
+    """Content-addressed files plus an SQLite index of what refers to them."""
+
+    def __init__(self, root=None, project_root=PROJECT_ROOT, config=None):
+        config = load_config() if config is None else config
+        self.root = Path(root) if root is not None else store_dir(config)
+        self.project_root = Path(project_root).resolve()
+        self.budget = config['store_budget_mb'] * 1024 * 1024
+        self._lock = threading.Lock()
+
+        (self.root / 'objects').mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.root / 'store.sqlite', timeout=60,
+                                   isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def object_path(self, digest, suffix=''):
+        return self.root / 'objects' / digest[:2] / f"{digest}{suffix}"
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def put(self, path):
+        """Store a file (once per content) and return its digest."""
+        path = Path(path)
+        digest = file_digest(path)
+        target = self.object_path(digest, path.suffix)
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, target)
+        self._execute('INSERT INTO objects (digest, suffix, size, last_used) VALUES (?, ?, ?, ?) '
+                      'ON CONFLICT (digest) DO UPDATE SET last_used = excluded.last_used',
+                      (digest, path.suffix, target.stat().st_size, time.time()))
+        return digest
+
+    def get(self, digest, dest):
+        """Copy an object to ``dest``; False if it is no longer in the store."""
+        rows = self._execute('SELECT suffix FROM objects WHERE digest = ?', (digest,))
+        if not rows or not self.object_path(digest, rows[0][0]).exists():
+            return False
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        shutil.copyfile(self.object_path(digest, rows[0][0]), tmp_path)
+        os.replace(tmp_path, dest)
+        self._execute('UPDATE objects SET last_used = ? WHERE digest = ?', (time.time(), digest))
+        return True
+
+    def _add_ref(self, kind, path, digest, key=None):
+        self._execute('INSERT OR REPLACE INTO refs (kind, key, checkout, path, digest, created) '
+                      'VALUES (?, ?, ?, ?, ?, ?)',
+                      (kind, key, str(self.project_root), path, digest, time.time()))
+
+    def record_outputs(self, key, outputs):
+        """Store the outputs of a chart built from inputs with hash ``key`` (replacing earlier ones)."""
+        self._execute("DELETE FROM refs WHERE kind = 'output' AND key = ?", (key,))
+        for output in outputs:
+            self._add_ref('output', Path(output).name, self.put(output), key)
+
+    def restore_outputs(self, key, chart_dir):
+        """
+        Copy the outputs recorded for ``key`` into ``chart_dir``.
+
+        Returns
+        -------
+        outputs : list of Path or None
+            None if the store does not hold a complete set of outputs
+        """
+        rows = self._execute("SELECT path, digest FROM refs WHERE kind = 'output' AND key = ?", (key,))
+        if not rows:
+            return None
+        outputs = []
+        for name, digest in rows:
+            dest = Path(chart_dir) / name
+            if dest.exists() and file_digest(dest) == digest:
+                outputs.append(dest)
+            elif self.get(digest, dest):
+                outputs.append(dest)
+            else:
+                return None
+        return sorted(outputs)
+
+    def archive(self, path, kind='archive', remove=True):
+        """Store a file as a backup/archive of this checkout, then delete it."""
+        path = Path(path)
+        digest = self.put(path)
+        self._add_ref(kind, relative_key(path, self.project_root), digest)
+        if remove:
+            path.unlink()
+        return digest
+
+    def refs(self, kind=None):
+        """(id, kind, checkout, path, digest, created) of every ref, newest first."""
+        sql = 'SELECT id, kind, checkout, path, digest, created FROM refs'
+        params = ()
+        if kind:
+            sql += ' WHERE kind = ?'
+            params = (kind,)
+        return self._execute(sql + ' ORDER BY created DESC, id DESC', params)
+
+    def restore(self, ref_id, dest=None):
+        """Restore a backup/archive ref to ``dest`` (default: where it came from)."""
+        rows = self._execute('SELECT checkout, path, digest FROM refs WHERE id = ?', (ref_id,))
+        if not rows:
+            raise KeyError(f"No store entry with id {ref_id}")
+        checkout, path, digest = rows[0]
+        if dest is None:
+            dest = Path(checkout) / path
+        elif Path(dest).is_dir() or str(dest).endswith(('/', os.sep)):
+            dest = Path(dest) / Path(path).name
+        dest = Path(dest)
+        if not self.get(digest, dest):
+            raise FileNotFoundError(f"Entry {ref_id} was evicted from the store")
+        return dest
+
+    def size(self):
+        rows = self._execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects')
+        return rows[0]
+
+    def evict(self, budget=None, dry_run=False):
+        """
+        Remove least recently used objects until the store fits ``budget`` bytes.
+
+        Only chart outputs are evicted: objects a backup or archive ref
+        points to are kept, so the store can stay above the budget. All
+        output refs of a chart key go with any one of its objects, so
+        restore_outputs() never returns part of a chart's outputs.
+
+        Returns
+        -------
+        evicted : list of (digest, size)
+        """
+        budget = self.budget if budget is None else budget
+        count, total = self.size()
+        evicted = []
+        for digest, suffix, size in self._execute(
+                "SELECT digest, suffix, size FROM objects WHERE digest NOT IN "
+                "(SELECT digest FROM refs WHERE kind != 'output') ORDER BY last_used"):
+            if total <= budget:
+                break
+            if not dry_run:
+                self.object_path(digest, suffix).unlink(missing_ok=True)
+                self._execute('DELETE FROM objects WHERE digest = ?', (digest,))
+                self._execute("DELETE FROM refs WHERE kind = 'output' AND key IN "
+                              "(SELECT key FROM refs WHERE kind = 'output' AND digest = ?)", (digest,))
+            evicted.append((digest, size))
+            total -= size
+        return evicted
+
+
+def tracked_files(project_root=PROJECT_ROOT):
+    """Files git tracks in the checkout (empty set outside a git checkout)."""
+    project_root = Path(project_root)
+    try:
+        result = subprocess.run(['git', 'ls-files', '-z'], cwd=project_root,
+                                capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return set()
+    if result.returncode != 0:
+        return set()
+    return {(project_root / name).resolve()
+            for name in result.stdout.decode('utf-8', 'replace').split('\0') if name}
+
+
+def workspace_garbage(project_root=PROJECT_ROOT, patterns=()):
+    """
+    Leftovers of other tools in the checkout.
+
+    ``patterns`` are extra glob patterns (relative to the checkout) of files
+    to archive ("gc_archive"). Files git tracks are never archived.
+
+    Returns
+    -------
+    remove : list of Path
+        Folders that are only scratch space (deleted)
+    archive : list of Path
+        Files worth keeping out of the tree (moved into the store)
+    """
+    project_root = Path(project_root)
+    remove = []
+    if (project_root / 'temp_quantlet').is_dir():
+        remove.append(project_root / 'temp_quantlet')
+    remove.extend(sorted(p for p in project_root.glob('*/temp') if p.is_dir()))
+
+    candidates = set(project_root.glob('**/previous/*.backup_*'))
+    for pattern in patterns:
+        candidates.update(path for path in project_root.glob(pattern) if path.is_file())
+    tracked = tracked_files(project_root)
+    archive = sorted(path for path in candidates if path.resolve() not in tracked)
+    return remove, archive
+
+
+def gc(store, budget=None, dry_run=False):
+    """Clean the checkout, then evict store objects beyond the budget."""
+    project_root = store.project_root
+    remove, archive = workspace_garbage(project_root, load_config().get('gc_archive', []))
+    prefix = 'WOULD ' if dry_run else ''
+
+    for folder in remove:
+        print(f"  [{prefix}REMOVE] {folder.relative_to(project_root)}/")
+        if not dry_run:
+            shutil.rmtree(folder)
+    for path in archive:
+        print(f"  [{prefix}ARCHIVE] {path.relative_to(project_root)}")
+        if not dry_run:
+            kind = 'backup' if '.backup_' in path.name else 'archive'
+            store.archive(path, kind)
+            if path.parent.name == 'previous' and not any(path.parent.iterdir()):
+                path.parent.rmdir()
+
+    evicted = store.evict(budget, dry_run)
+    count, total = store.size()
+    print(f"\nStore: {count} objects, {total / 1e6:.1f} MB"
+          f" (budget {(store.budget if budget is None else budget) / 1e6:.0f} MB)")
+    if evicted:
+        freed = sum(size for _, size in evicted)
+        print(f"  {'Would evict' if dry_run else 'Evicted'} {len(evicted)} least recently used objects "
+              f"({freed / 1e6:.1f} MB)")
+    return remove, archive, evicted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared artifact store and garbage collection')
+    commands = parser.add_subparsers(dest='command')
+    gc_parser = commands.add_parser('gc', help='Clean the checkout and apply the size budget')
+    gc_parser.add_argument('--dry-run', action='store_true',
+                           help='Only show what would be removed, archived or evicted')
+    gc_parser.add_argument('--budget', type=float, default=None,
+                           help='Size budget in MB (default: build_config.json)')
+    list_parser = commands.add_parser('list', help='List stored backups, archives and outputs')
+    list_parser.add_argument('--kind', choices=['backup', 'archive', 'output'], default=None)
+    restore_parser = commands.add_parser('restore', help='Restore a stored file by id')
+    restore_parser.add_argument('id', type=int)
+    restore_parser.add_argument('dest', nargs='?', default=None,
+                                help='Target file or folder (default: original location)')
+    args = parser.parse_args()
+
+    with ArtifactStore() as store:
+        if args.command == 'gc':
+            print("=" * 60)
+            print(f"Garbage collection ({store.root})")
+            print("=" * 60)
+            budget = None if args.budget is None else args.budget * 1024 * 1024
+            gc(store, budget, args.dry_run)
+        elif args.command == 'list':
+            for ref_id, kind, checkout, path, digest, created in store.refs(args.kind):
+                when = datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M')
+                print(f"  {ref_id:5d} [{kind.upper()}] {when} {path} ({digest[:10]}, {checkout})")
+        elif args.command == 'restore':
+            print(f"  [OK] {store.restore(args.id, args.dest)}")
+        else:
+            count, total = store.size()
+            print(f"Artifact store: {store.root}")
+            print(f"  {count} objects, {total / 1e6:.1f} MB of {store.budget / 1e6:.0f} MB")
+            kinds = {}
+            for _, kind, *_ in store.refs():
+                kinds[kind] = kinds.get(kind, 0) + 1
+            for kind, n in sorted(kinds.items()):
+                print(f"  {kind}: {n} refs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Per-Chart Time Budgets and Process-Group Kills
+
+A fixed timeout is too short for the slow 3D charts when the machine is
+busy, and far too long for a quick chart that hangs. The budget of each
+chart is therefore learned from the wall times of its last successful builds
+(.build/chart_timings.json, "timeout_history" runs per chart):
+
+    budget = timeout_factor * slowest recent run, within [timeout_min, timeout_max]
+
+Charts without history get the configured "timeout". A chart that times out
+(or whose worker dies) is retried up to "retries" times after the rest of the
+build has finished: retry n waits retry_backoff * 2**(n - 1) seconds and
+doubles the budget of the previous attempt (never beyond timeout_max).
+
+Chart subprocesses run in their own process group (session), so a timeout
+kills the chart together with anything it started.
+
+Usage:
+    from build_tools.timeouts import ChartTimings, run_command
+
+    timings = ChartTimings()
+    result = run_command([sys.executable, 'chart.py'], cwd, timings.budget(py_file))
+    timings.record(py_file, elapsed)
+    timings.save()
+"""
+
+import json
+import os
+import signal
+import subprocess
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .cache import relative_key
+from .config import PROJECT_ROOT, load_config
+from .trace import command_span
+
+
+TIMINGS_PATH = PROJECT_ROOT / '.build' / 'chart_timings.json'
+
+
+def kill_process_group(pid):
+    """Kill a process and every process in its group (just the process on Windows)."""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_command(command, cwd, timeout, env=None):
+    """
+    subprocess.run(command, capture_output=True, text=True) in a new process group.
+
+    On timeout (or an interrupt) the whole group is killed before the
+    exception is raised, so no grandchildren are left running. The run is a
+    'subprocess' span of build_tools.trace.
+    """
+    posix = os.name == 'posix'
+    with command_span(command, cwd) as info, \
+            subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, text=True,
+                             start_new_session=posix) as process:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except BaseException:
+            if posix:
+                kill_process_group(process.pid)
+            else:
+                process.kill()
+            process.communicate()
+            raise
+        info['returncode'] = process.returncode
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+def retry_budget(budget, attempt, config):
+    """Time budget of the given attempt (1 = first run): doubled per retry, capped."""
+    return min(budget * 2 ** (attempt - 1), max(budget, config['timeout_max']))
+
+
+def retry_delay(attempt, config):
+    """Seconds to wait before the given attempt."""
+    return config['retry_backoff'] * 2 ** (attempt - 2) if attempt > 1 else 0.0
+
+
+class ChartTimings:
+    """Recent wall times of successful chart builds and the budgets learned from them."""
+
+    def __init__(self, path=TIMINGS_PATH, project_root=PROJECT_ROOT, config=None):
+        self.path = Path(path)
+        self.project_root = Path(project_root)
+        self.config = load_config() if config is None else config
+        self._lock = threading.Lock()
+        self.entries = self._load()
+        self._recorded = {}   # key -> times recorded since the last save
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get('charts', {})
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """
+        Write the timings atomically.
+
+        The times recorded by this process are appended to the histories on
+        disk, so builds running side by side (build_tools.workqueue) keep
+        each other's runs.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        with self._lock, open(self.path.with_suffix('.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._load()
+            for key, times in self._recorded.items():
+                history = entries.setdefault(key, [])
+                history.extend(times)
+                del history[:-self.config['timeout_history']]
+            self._recorded = {}
+            self.entries = entries
+            with open(tmp_path, 'w') as f:
+                json.dump({'charts': entries}, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def record(self, py_file, elapsed):
+        """Add the wall time of a successful build."""
+        key = relative_key(py_file, self.project_root)
+        with self._lock:
+            history = self.entries.setdefault(key, [])
+            history.append(round(elapsed, 3))
+            del history[:-self.config['timeout_history']]
+            self._recorded.setdefault(key, []).append(round(elapsed, 3))
+
+    def budget(self, py_file):
+        """Time budget of a chart in seconds."""
+        history = self.entries.get(relative_key(py_file, self.project_root))
+        if not history:
+            return self.config['timeout']
+        budget = self.config['timeout_factor'] * max(history)
+        return min(max(budget, self.config['timeout_min']), self.config['timeout_max'])
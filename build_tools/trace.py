@@ -0,0 +1,348 @@
+"""
+Build Tracing
+
+A small span API for the course build. When the environment variable
+NN_TRACE names a file, every span (stage, chart, graph node, subprocess)
+is appended to it as a Chrome trace event; scripts, chart subprocesses and
+warm workers inherit the variable, so one release (charts, QR codes,
+metainfo, merge_tex_files.py, split_into_lectures.py, branding, pdflatex,
+sync_to_quantlet.py) ends up on one timeline, one lane per process and
+thread. Open the file in https://ui.perfetto.dev or chrome://tracing.
+Without NN_TRACE spans cost a dictionary lookup. A relative NN_TRACE is
+made absolute when build_tools.trace is imported, before charts are
+started in their own folders; ``run`` warns about trace files found in
+chart folders.
+
+The file is in the JSON array format, written one event per line, so
+processes can append to it concurrently (the closing bracket is optional
+for the viewers and added by load_trace).
+
+The report lists the stages, the slowest spans, time per category/name
+(e.g. all pdflatex or git calls), the average concurrency and the critical
+path: the chain of innermost spans, walked back from the one that ends
+last, that the wall time is waiting on. Gaps on that path are untraced
+serial work.
+
+Usage:
+    python -m build_tools.trace run -o build.trace.json -- python generate_all_new_charts.py
+    NN_TRACE=release.trace.json ./release.sh         # several scripts, one trace
+    python -m build_tools.trace report release.trace.json [--top 15]
+
+    from build_tools.trace import span, traced, run
+
+    @traced('generate_metainfo')
+    def main(): ...
+
+    with span('copy charts', cat='sync', charts=len(charts)):
+        ...
+    run(['git', 'push'], check=True)                 # subprocess.run in a span
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from .config import PROJECT_ROOT
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+TRACE_ENV = 'NN_TRACE'
+
+_lock = threading.Lock()
+_named = set()   # (pid, tid) whose process/thread name was written
+
+
+def trace_path():
+    """
+    File spans are written to, None when tracing is off.
+
+    A relative NN_TRACE is resolved against the current directory and
+    written back to the environment, so subprocesses started in another
+    folder (e.g. charts in their chart folder) append to the same file.
+    """
+    path = os.environ.get(TRACE_ENV)
+    if not path:
+        return None
+    if not os.path.isabs(path):
+        path = os.environ[TRACE_ENV] = os.path.abspath(path)
+    return path
+
+
+# Before this process changes directory or starts any subprocess
+trace_path()
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def _append(path, events):
+    """Append events to the trace file (one write per call, locked across processes)."""
+    text = ''.join(json.dumps(event, separators=(',', ':')) + ',\n' for event in events)
+    with _lock, open(path, 'a', encoding='utf-8') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        if f.tell() == 0:
+            text = '[\n' + text
+        f.write(text)
+
+
+def _names(pid, tid):
+    """Metadata events naming this process and thread in the viewer (once each)."""
+    events = []
+    if (pid, None) not in _named:
+        _named.add((pid, None))
+        argv = sys.argv[:2] if sys.argv and sys.argv[0] == '-m' else sys.argv[:1]
+        label = ' '.join(Path(arg).name for arg in argv) or 'python'
+        events.append({'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0,
+                       'args': {'name': f"{label} ({pid})"}})
+    if (pid, tid) not in _named:
+        _named.add((pid, tid))
+        events.append({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid,
+                       'args': {'name': threading.current_thread().name}})
+    return events
+
+
+def emit(name, cat, start_us, end_us, args=None):
+    """Write one finished span (a complete 'X' event); no-op when tracing is off."""
+    path = trace_path()
+    if path is None:
+        return
+    pid, tid = os.getpid(), threading.get_ident()
+    event = {'ph': 'X', 'name': name, 'cat': cat, 'pid': pid, 'tid': tid,
+             'ts': start_us, 'dur': max(0, end_us - start_us)}
+    if args:
+        event['args'] = {key: value if isinstance(value, (int, float, bool)) or value is None
+                         else str(value) for key, value in args.items()}
+    try:
+        _append(path, _names(pid, tid) + [event])
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def span(name, cat='stage', **args):
+    """
+    Trace the enclosed block.
+
+    Yields a dict; keys added to it while the block runs (e.g. a return
+    code) are stored with the span. Exceptions are recorded as 'error'.
+    """
+    if trace_path() is None:
+        yield {}
+        return
+    start = _now_us()
+    try:
+        yield args
+    except BaseException as e:
+        args['error'] = type(e).__name__
+        raise
+    finally:
+        emit(name, cat, start, _now_us(), args)
+
+
+def traced(name=None, cat='stage'):
+    """Decorator: run the function inside a span (named after it by default)."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def command_span(command, cwd=None):
+    """span() for a subprocess: named after the program, with its command line."""
+    argv = [str(arg) for arg in command] if not isinstance(command, str) else command.split()
+    return span(Path(argv[0]).name, 'subprocess', argv=' '.join(argv)[:300], cwd=cwd)
+
+
+def run(command, **kwargs):
+    """subprocess.run in a 'subprocess' span (records the return code)."""
+    with command_span(command, kwargs.get('cwd')) as info:
+        result = subprocess.run(command, **kwargs)
+        info['returncode'] = result.returncode
+        return result
+
+
+def load_trace(path):
+    """
+    Read a trace file (complete or still being appended to).
+
+    Returns
+    -------
+    events : list of dict
+    """
+    text = Path(path).read_text(encoding='utf-8').strip()
+    if text.startswith('{'):
+        return json.loads(text).get('traceEvents', [])
+    text = text.rstrip(',')
+    if not text.endswith(']'):
+        text += ']'
+    return json.loads(text)
+
+
+def innermost(spans):
+    """Spans that contain no other span (of any process)."""
+    ordered = sorted(spans, key=lambda s: (s['ts'], -s['dur']))
+    leaves = []
+    for i, outer in enumerate(ordered):
+        end = outer['ts'] + outer['dur']
+        contains = False
+        for inner in ordered[i + 1:]:
+            if inner['ts'] > end:
+                break
+            if inner['ts'] + inner['dur'] <= end and inner is not outer:
+                contains = True
+                break
+        if not contains:
+            leaves.append(outer)
+    return leaves
+
+
+def critical_path(spans, slack_us=1000):
+    """
+    Chain of innermost spans the build's end waits on.
+
+    Starting from the innermost span that ends last, repeatedly step to the
+    innermost span that ended last before the current one started (within
+    ``slack_us``).
+
+    Returns
+    -------
+    path : list of dict
+        Spans in time order
+    """
+    leaves = sorted(innermost(spans), key=lambda s: s['ts'] + s['dur'])
+    if not leaves:
+        return []
+    path = [leaves[-1]]
+    while True:
+        start = path[-1]['ts']
+        before = [s for s in leaves if s['ts'] + s['dur'] <= start + slack_us and s['ts'] < start]
+        if not before:
+            break
+        path.append(max(before, key=lambda s: s['ts'] + s['dur']))
+    return path[::-1]
+
+
+def print_report(events, top=10):
+    """Print stages, slowest spans, totals per name, concurrency and the critical path."""
+    spans = [e for e in events if e.get('ph') == 'X']
+    if not spans:
+        print("  (no spans)")
+        return
+    names = {e['pid']: e['args']['name'] for e in events
+             if e.get('ph') == 'M' and e.get('name') == 'process_name'}
+    first = min(s['ts'] for s in spans)
+    wall = (max(s['ts'] + s['dur'] for s in spans) - first) / 1e6
+    leaves = innermost(spans)
+    busy = sum(s['dur'] for s in leaves) / 1e6
+    print(f"  Wall {wall:.1f}s, {len(spans)} spans in {len({s['pid'] for s in spans})} processes, "
+          f"average concurrency {busy / wall if wall else 0:.2f}")
+
+    def label(s):
+        return f"{s['name']} [{s['cat']}]"
+
+    stages = sorted((s for s in spans if s['cat'] == 'stage'), key=lambda s: s['ts'])
+    if stages:
+        print(f"\n  Stages:")
+        for s in stages:
+            offset = (s['ts'] - first) / 1e6
+            print(f"    +{offset:7.1f}s {s['dur'] / 1e6:7.1f}s  {s['name']}  "
+                  f"({names.get(s['pid'], s['pid'])})")
+
+    totals = {}
+    for s in spans:
+        if s['cat'] == 'stage':
+            continue
+        key = (s['cat'], s['name'])
+        count, seconds = totals.get(key, (0, 0.0))
+        totals[key] = (count + 1, seconds + s['dur'] / 1e6)
+    if totals:
+        print(f"\n  Time per name:")
+        for (cat, name), (count, seconds) in sorted(totals.items(), key=lambda item: -item[1][1])[:top]:
+            print(f"    {seconds:7.1f}s {count:5d}x  {name} [{cat}]")
+
+    print(f"\n  Slowest spans:")
+    for s in sorted(spans, key=lambda s: -s['dur'])[:top]:
+        print(f"    {s['dur'] / 1e6:7.1f}s  {label(s)}")
+
+    path = critical_path(spans)
+    on_path = sum(s['dur'] for s in path) / 1e6
+    print(f"\n  Critical path ({len(path)} spans, {on_path:.1f}s of {wall:.1f}s traced):")
+    shown = sorted(path, key=lambda s: -s['dur'])[:top]
+    for s in path:
+        if s in shown:
+            print(f"    +{(s['ts'] - first) / 1e6:7.1f}s {s['dur'] / 1e6:7.1f}s  {label(s)}")
+    if len(path) > len(shown):
+        print(f"    ... {len(path) - len(shown)} shorter spans")
+
+
+def stray_traces(project_root=PROJECT_ROOT):
+    """Trace files in chart folders (written by a process that did not resolve NN_TRACE)."""
+    from .registry import load_index
+
+    index = load_index(project_root)
+    return [path for chart in index.charts() for path in sorted(chart.dir.glob('*.trace.json'))]
+
+
+def stray_traces(project_root=PROJECT_ROOT):
+    """Trace files in chart folders (written by a process that did not resolve NN_TRACE)."""
+    from .registry import load_index
+
+    index = load_index(project_root)
+    return [path for chart in index.charts() for path in sorted(chart.dir.glob('*.trace.json'))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trace build scripts and summarize traces')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='Run a command with tracing on')
+    run_parser.add_argument('-o', '--output', default='build.trace.json',
+                            help='Trace file (replaced; default: build.trace.json)')
+    run_parser.add_argument('--top', type=int, default=10, help='Rows per table')
+    run_parser.add_argument('cmd', nargs=argparse.REMAINDER,
+                            help='Command to run (after --)')
+    report_parser = commands.add_parser('report', help='Summarize a trace file')
+    report_parser.add_argument('trace')
+    report_parser.add_argument('--top', type=int, default=10, help='Rows per table')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        cmd = args.cmd[1:] if args.cmd[:1] == ['--'] else args.cmd
+        if not cmd:
+            parser.error('no command given')
+        path = Path(args.output).resolve()
+        path.unlink(missing_ok=True)
+        os.environ[TRACE_ENV] = str(path)
+        with span(' '.join(Path(arg).name if i == 0 else arg for i, arg in enumerate(cmd)),
+                  'run') as info:
+            info['returncode'] = subprocess.run(cmd).returncode
+        trace_file, returncode = path, info['returncode']
+        for stray in stray_traces():
+            print(f"  [WARN] trace file in a chart folder: {stray}")
+    else:
+        trace_file, returncode = Path(args.trace), 0
+
+    print(f"\n{'='*60}")
+    print(f"Trace: {trace_file}")
+    print("=" * 60)
+    print_report(load_trace(trace_file), args.top)
+    sys.exit(returncode)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Chart Watch Mode
+
+Watches the chart scripts of module*/charts, appendix/charts and
+standalone_charts and rebuilds a chart as soon as its script is saved, on a
+pool of warm workers that stays up for the whole session. With --lectures
+the lectures/*.tex that include a rebuilt chart are recompiled as well
+(through the course build graph, so only out-of-date lectures run).
+
+Changes are detected by polling file stats (no extra dependency); bursts
+of saves are debounced into one rebuild. Saving a chart_helpers module
+rebuilds every watched chart that imports the package. New chart folders are picked up
+through the chart index every few seconds.
+
+Usage:
+    python -m build_tools.watch                  # rebuild charts on save
+    python -m build_tools.watch --lectures       # ... and affected lectures
+    python -m build_tools.watch xor_problem      # only watch some charts
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .cache import ChartCache, helper_files, uses_helpers
+from .config import PROJECT_ROOT, load_config, resolve_jobs
+from .graph import course_graph, dependents, execute, select
+from .registry import MODULES, load_index
+from .runner import chart_group, run_chart_warm, run_with_budget
+from .timeouts import ChartTimings
+from .workers import WarmWorkerPool
+
+
+WATCHED_GROUPS = MODULES + ['standalone_charts']
+RESCAN_SECONDS = 5.0
+
+
+def watched_scripts(project_root=PROJECT_ROOT, names=None):
+    """Chart scripts to watch, optionally only the charts called ``names``."""
+    index = load_index(project_root)
+    charts = index.charts(groups=WATCHED_GROUPS, with_script=True)
+    if names:
+        charts = [chart for chart in charts if chart.name in names]
+    return [chart.script for chart in charts]
+
+
+def charts_to_rebuild(changed, scripts):
+    """Changed chart scripts, plus the charts importing chart_helpers if a helper changed."""
+    helpers = set(helper_files())
+    charts = [s for s in changed if s not in helpers]
+    if len(charts) < len(changed):
+        charts += [s for s in scripts if s not in helpers and s not in charts and uses_helpers(s)]
+    return charts
+
+
+def snapshot(scripts):
+    """(mtime_ns, size) of every script; None for scripts that disappeared."""
+    stats = {}
+    for script in scripts:
+        try:
+            stat = script.stat()
+            stats[script] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stats[script] = None
+    return stats
+
+
+def changed_scripts(before, after):
+    """Scripts that are new or whose stats changed (deleted ones are ignored)."""
+    return [script for script, stat in after.items()
+            if stat is not None and before.get(script) != stat]
+
+
+def wait_for_changes(scripts, stats, interval, debounce, rescan):
+    """
+    Poll until scripts change and then stay quiet for ``debounce`` seconds.
+
+    Returns
+    -------
+    changed : list of Path
+    stats : dict
+        Snapshot after the changes
+    scripts : list of Path
+        Watched scripts (the set is refreshed every RESCAN_SECONDS)
+    """
+    changed = []
+    last_change = None
+    last_scan = time.monotonic()
+
+    while True:
+        time.sleep(interval)
+        if time.monotonic() - last_scan > RESCAN_SECONDS:
+            scripts = rescan()
+            last_scan = time.monotonic()
+
+        current = snapshot(scripts)
+        new = changed_scripts(stats, current)
+        stats = current
+        if new:
+            changed.extend(s for s in new if s not in changed)
+            last_change = time.monotonic()
+        elif changed and time.monotonic() - last_change >= debounce:
+            return changed, stats, scripts
+
+
+def rebuild_charts(pool, scripts, cache, jobs, timings, project_root=PROJECT_ROOT):
+    """Rebuild ``scripts`` on the warm pool and print one line per chart."""
+    run = lambda py_file, timeout: run_chart_warm(pool, py_file, timeout)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(lambda s: run_with_budget(run, s, timings), scripts))
+
+    for result in results:
+        label = f"{chart_group(result.script, project_root)}/{result.script.parent.name}"
+        if result.ok:
+            if result.outputs:
+                cache.record(result.script, result.outputs)
+            note = ', unchanged' if result.unchanged and len(result.unchanged) == len(result.outputs) else ''
+            print(f"  [OK] {label} ({result.elapsed:.1f}s{note})")
+        else:
+            cache.invalidate(result.script)
+            last_line = result.message.splitlines()[-1] if result.message else 'unknown error'
+            print(f"  [FAIL] {label}: {last_line[:100]}")
+    cache.save()
+    timings.save()
+    return results
+
+
+def rebuild_lectures(pool, scripts, cache, jobs, timings, project_root=PROJECT_ROOT):
+    """Recompile the lectures/*.tex that include any of ``scripts``."""
+    run = lambda py_file, timeout: run_chart_warm(pool, py_file, timeout)
+    graph = course_graph(project_root, cache, lambda py_file: run_with_budget(run, py_file, timings))
+    chart_nodes = [f"chart:{chart_group(s, project_root)}/{s.stem}" for s in scripts]
+    chart_nodes = [name for name in chart_nodes if name in graph]
+    lectures = [name for name in dependents(graph, chart_nodes) if name.startswith('pdf:lectures/')]
+    if not lectures:
+        return {}
+
+    def report(name, state, message=''):
+        if state in ('built', 'failed') and name.startswith('pdf:'):
+            detail = f": {message.strip().splitlines()[-1][:100]}" if state == 'failed' and message.strip() else ''
+            print(f"  [{'OK' if state == 'built' else 'FAIL'}] {name}{detail}")
+
+    status = execute(graph, select(graph, lectures), jobs=jobs, on_event=report)
+    cache.save()
+    return status
+
+
+def watch(names=None, lectures=False, jobs=None, project_root=PROJECT_ROOT):
+    """Run the watch loop until interrupted."""
+    config = load_config()
+    jobs = resolve_jobs(config['jobs'] if jobs is None else jobs)
+    timings = ChartTimings(config=config)
+    interval = config['watch_interval']
+    debounce = config['watch_debounce']
+
+    rescan = lambda: watched_scripts(project_root, names) + helper_files()
+    scripts = rescan()
+    stats = snapshot(scripts)
+    cache = ChartCache()
+
+    print("=" * 60)
+    print(f"Watching {len(scripts) - len(helper_files())} chart scripts"
+          f"{' (+ affected lectures)' if lectures else ''} - Ctrl+C to stop")
+    print("=" * 60)
+
+    pool = WarmWorkerPool.from_config(jobs, config)
+    try:
+        while True:
+            changed, stats, scripts = wait_for_changes(scripts, stats, interval, debounce, rescan)
+            changed = charts_to_rebuild(changed, scripts)
+            start = time.perf_counter()
+            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] {len(changed)} changed")
+            results = rebuild_charts(pool, changed, cache, jobs, timings, project_root)
+            if lectures:
+                rebuild_lectures(pool, [r.script for r in results if r.ok], cache, jobs, timings,
+                                 project_root)
+            print(f"  done in {time.perf_counter() - start:.1f}s")
+            # Outputs written by the charts do not count as new changes
+            stats = snapshot(scripts)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild charts (and lectures) when chart scripts change')
+    parser.add_argument('charts', nargs='*',
+                        help='Only watch these charts (folder names)')
+    parser.add_argument('--lectures', action='store_true',
+                        help='Also recompile the lectures/*.tex that include a rebuilt chart')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Warm workers (default: build_config.json)')
+    args = parser.parse_args()
+
+    watch(names=args.charts or None, lectures=args.lectures, jobs=args.jobs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Warm Chart Worker Pool
+
+Long-lived worker processes that import matplotlib (Agg backend), numpy and
+other heavy modules once, then execute chart scripts in-process. This removes
+interpreter startup, import and font cache lookup from every chart build.
+
+With ``export_hook`` the worker installs build_tools.export, so charts that
+save one figure in several formats measure its layout only once. With
+``skip_unchanged`` it installs build_tools.outputs, so outputs that render
+the same are not rewritten. With ``rasterize`` it installs
+build_tools.rasterize, so dense layers of vector outputs are drawn as
+images. With ``reproducible`` every chart runs under
+build_tools.reproducible.chart_run.
+
+A worker retires after ``max_jobs`` charts or when its resident memory grows
+beyond ``max_rss_mb``; the pool starts a fresh worker in its place. A worker
+that crashes or times out is replaced the same way. Every worker leads its
+own process group, so a timed-out worker is killed together with anything
+its chart started.
+
+With ``lazy`` the worker imports those modules lazily (build_tools.lazy):
+preloaded modules among them are only loaded by the first chart that
+imports them, so workers whose charts never do skip their import.
+
+With ``limits`` (address space MB, CPU seconds) every chart runs under
+those resource limits (build_tools.memory); a chart that exceeds its CPU
+time takes its worker down with SIGXCPU and is reported as failed, not
+retried.
+
+Usage:
+    from build_tools.workers import WarmWorkerPool
+
+    with WarmWorkerPool(jobs=4) as pool:
+        ok, output, elapsed, info = pool.run(py_file, timeout=30)
+"""
+
+import importlib
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+from .memory import config_limits
+from .timeouts import kill_process_group
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_PRELOAD = [
+    'numpy',
+    'matplotlib.pyplot',
+    'matplotlib.patches',
+]
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        if resource is None:
+            return 0.0
+        # ru_maxrss is in kB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 if peak < 1 << 32 else peak / (1024 * 1024)
+
+
+def preload_modules(names):
+    """Import the Agg backend and the given modules; missing optional ones are ignored."""
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+    matplotlib.use('Agg')
+
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+    # Build the font lookup cache once instead of in every chart
+    from matplotlib import font_manager
+    font_manager.findfont(font_manager.FontProperties())
+
+
+def _worker_main(conn, preload, max_jobs, max_rss_mb, export_hook=False, skip_unchanged=False,
+                 reproducible=False, lazy=(), limits=(0, 0), rasterize=False):
+    """Worker loop: receive (chart path, profile), run it, send (ok, output, retire, info)."""
+    from .chartexec import install_hooks, run_chart_job
+    from .lazy import install as install_lazy
+
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    install_lazy(lazy)
+    preload_modules(preload)
+    install_hooks(export_hook, skip_unchanged, rasterize)
+    conn.send('ready')
+    jobs_done = 0
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        py_file, profile = job
+        ok, output, info = run_chart_job(py_file, profile, reproducible, limits)
+        jobs_done += 1
+        retire = jobs_done >= max_jobs or current_rss_mb() > max_rss_mb
+        conn.send((ok, output, retire, info))
+        if retire:
+            break
+
+    conn.close()
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, preload, max_jobs, max_rss_mb, export_hook, skip_unchanged,
+                 reproducible, lazy, limits, rasterize):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, preload, max_jobs, max_rss_mb, export_hook, skip_unchanged,
+                  reproducible, lazy, limits, rasterize),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout=120):
+        """Wait until the worker has finished preloading (not counted as job time)."""
+        if not self.ready:
+            if not self.conn.poll(timeout):
+                raise OSError('worker did not start')
+            self.conn.recv()
+            self.ready = True
+
+    def stop(self, timeout=5):
+        """Ask the worker to exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def kill(self):
+        """Kill the worker and its process group."""
+        if hasattr(os, 'killpg'):
+            kill_process_group(self.process.pid)
+        # Also covers a worker killed before it had its own group
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WarmWorkerPool:
+    """
+    Pool of preloaded chart workers.
+
+    ``run`` is thread-safe: up to ``jobs`` threads can each run a chart on
+    their own worker at the same time.
+    """
+
+    def __init__(self, jobs, preload=None, max_jobs=25, max_rss_mb=1500, export_hook=False,
+                 skip_unchanged=False, reproducible=False, lazy=(), limits=(0, 0), rasterize=False):
+        self._context = multiprocessing.get_context('spawn')
+        self._preload = DEFAULT_PRELOAD if preload is None else list(preload)
+        self._max_jobs = max_jobs
+        self._max_rss_mb = max_rss_mb
+        self._export_hook = export_hook
+        self._skip_unchanged = skip_unchanged
+        self._reproducible = reproducible
+        self._lazy = list(lazy)
+        self._limits = tuple(limits)
+        self._rasterize = rasterize
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        for _ in range(jobs):
+            self._idle.put(self._spawn())
+
+    @classmethod
+    def from_config(cls, jobs, config):
+        """Pool with the worker settings of build_config.json."""
+        return cls(jobs, preload=config['preload'],
+                   max_jobs=config['worker_max_jobs'],
+                   max_rss_mb=config['worker_max_rss_mb'],
+                   export_hook=config['export_hook'],
+                   skip_unchanged=config['skip_unchanged'],
+                   reproducible=config['reproducible'],
+                   lazy=config.get('lazy_imports', []),
+                   limits=config_limits(config),
+                   rasterize=config.get('rasterize', False))
+
+    def _spawn(self):
+        worker = _Worker(self._context, self._preload, self._max_jobs,
+                         self._max_rss_mb, self._export_hook, self._skip_unchanged,
+                         self._reproducible, self._lazy, self._limits, self._rasterize)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker):
+        with self._lock:
+            self._workers.remove(worker)
+        return self._spawn()
+
+    def run(self, py_file, timeout=None, profile=False):
+        """
+        Run one chart on an idle worker.
+
+        With ``profile`` the worker measures the run (build_tools.profiling).
+
+        Returns
+        -------
+        ok : bool
+        output : str
+            Captured output, or the reason the job failed
+        elapsed : float
+            Wall time in seconds, excluding the wait for an idle worker
+        info : dict
+            Run information of a finished chart (see chartexec.run_chart_job),
+            or {'killed': 'timeout' | 'crash'} if the worker timed out or died
+            ({} if it was killed for exceeding its CPU limit)
+        """
+        worker = self._idle.get()
+
+        try:
+            worker.wait_ready()
+            start = time.perf_counter()
+            worker.conn.send((str(py_file), profile))
+            if not worker.conn.poll(timeout):
+                worker.kill()
+                worker = self._replace(worker)
+                return (False, f"Timeout (>{timeout:.0f}s)", time.perf_counter() - start,
+                        {'killed': 'timeout'})
+
+            ok, output, retire, info = worker.conn.recv()
+            if retire:
+                worker.process.join(5)
+                worker = self._replace(worker)
+            return ok, output, time.perf_counter() - start, info
+
+        except (EOFError, OSError) as e:
+            # Worker died mid-job (segfault, OOM kill, CPU limit, ...)
+            worker.process.join(1)
+            exitcode = worker.process.exitcode
+            worker.kill()
+            worker = self._replace(worker)
+            if hasattr(signal, 'SIGXCPU') and exitcode == -signal.SIGXCPU:
+                return False, f"CPU limit exceeded ({self._limits[1]}s)", 0.0, {}
+            return False, f"Worker crashed (exit code {exitcode}): {e}", 0.0, {'killed': 'crash'}
+
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        """Stop all workers."""
+        for worker in list(self._workers):
+            worker.stop()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
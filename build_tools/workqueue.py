@@ -0,0 +1,340 @@
+"""
+Shared Chart Build Queue
+
+Lets several builds on one machine (different terminals, CI shards) share
+their chart work through a SQLite file (.build/build_queue.sqlite), so no
+chart is rendered twice:
+- every build enqueues the charts it needs, keyed by chart path and input
+  hash (ChartCache.key); a chart already queued by another build is joined,
+  not queued again
+- builds claim charts one at a time with a lease ("queue_lease" seconds);
+  a heartbeat thread renews the leases of its own charts every
+  "queue_heartbeat" seconds
+- a lease that is not renewed (its build was killed) expires and the chart
+  is taken over by another build
+- a build does not only run its own charts: while it waits for charts
+  claimed by others it picks up whatever is pending (work stealing), and it
+  finishes once all of its own charts are done
+- charts that timed out or crashed go back to the queue with a retry delay
+  (see build_tools.timeouts)
+
+Results of charts built by another build are read back from the queue
+(outputs, time, error), so every build reports and caches all of its charts.
+
+Usage:
+    python generate_all_new_charts.py --queue      # in several terminals
+    python -m build_tools.workqueue                # show the queue
+    python -m build_tools.workqueue --clear        # empty it
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+
+from .cache import relative_key
+from .config import PROJECT_ROOT, load_config
+from .timeouts import retry_delay
+
+
+QUEUE_PATH = PROJECT_ROOT / '.build' / 'build_queue.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    chart TEXT PRIMARY KEY,     -- chart script relative to the project root
+    key TEXT NOT NULL,          -- input hash the job builds (ChartCache.key)
+    state TEXT NOT NULL,        -- pending | leased | done | failed
+    owner TEXT,                 -- build holding the lease / that finished it
+    lease_until REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    queued REAL NOT NULL,
+    finished REAL,
+    result TEXT                 -- JSON, see WorkQueue.complete
+)
+"""
+
+
+def builder_id():
+    """Name of this build process in the queue (host, pid and a random suffix)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """
+    One build's connection to the shared queue.
+
+    Thread-safe: the runner's threads claim and complete jobs through the
+    same instance. Use as a context manager to run the heartbeat.
+    """
+
+    def __init__(self, path=QUEUE_PATH, project_root=PROJECT_ROOT, config=None):
+        config = load_config() if config is None else config
+        self.path = Path(path)
+        self.project_root = Path(project_root)
+        self.owner = builder_id()
+        self.lease = config['queue_lease']
+        self.heartbeat = config['queue_heartbeat']
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(SCHEMA)
+
+    def _transaction(self, func):
+        """Run ``func(db)`` in an immediate (write-locked) transaction."""
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                value = func(self._db)
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+            return value
+
+    def chart(self, py_file):
+        return relative_key(py_file, self.project_root)
+
+    def enqueue(self, jobs):
+        """
+        Queue charts for building.
+
+        Parameters
+        ----------
+        jobs : list of (Path, str)
+            Chart script and its input hash
+
+        A chart queued or running for the same inputs is joined; one finished
+        for the same inputs since this build started is reused. Anything else
+        (new chart, changed inputs, result older than this build) is queued.
+        """
+        now = time.time()
+
+        def add(db):
+            for py_file, key in jobs:
+                chart = self.chart(py_file)
+                row = db.execute('SELECT key, state, finished FROM jobs WHERE chart = ?',
+                                 (chart,)).fetchone()
+                if row is not None and row[0] == key:
+                    if row[1] in ('pending', 'leased'):
+                        continue
+                    if row[2] is not None and row[2] >= self.started:
+                        continue
+                db.execute('INSERT OR REPLACE INTO jobs (chart, key, state, queued) '
+                           "VALUES (?, ?, 'pending', ?)", (chart, key, now))
+
+        self._transaction(add)
+
+    def claim(self):
+        """
+        Lease the next runnable chart (pending, or leased with an expired lease).
+
+        Returns
+        -------
+        job : tuple or None
+            (script Path, attempt number), None if nothing is runnable now
+        """
+        def take(db):
+            now = time.time()
+            row = db.execute(
+                "SELECT chart, attempts FROM jobs WHERE not_before <= ? AND "
+                "(state = 'pending' OR (state = 'leased' AND lease_until < ?)) "
+                "ORDER BY queued, chart LIMIT 1", (now, now)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE jobs SET state = 'leased', owner = ?, lease_until = ?, "
+                       "attempts = attempts + 1 WHERE chart = ?",
+                       (self.owner, now + self.lease, row[0]))
+            return self.project_root / row[0], row[1] + 1
+
+        return self._transaction(take)
+
+    def complete(self, result):
+        """Store the result of a chart this build ran (ignored if the lease was lost)."""
+        data = {
+            'ok': result.ok,
+            'returncode': result.returncode,
+            'elapsed': result.elapsed,
+            'message': result.message,
+            'outputs': [Path(p).name for p in result.outputs],
+            'unchanged': [Path(p).name for p in result.unchanged],
+        }
+        state = 'done' if result.ok else 'failed'
+        self._transaction(lambda db: db.execute(
+            'UPDATE jobs SET state = ?, finished = ?, result = ? WHERE chart = ? AND owner = ?',
+            (state, time.time(), json.dumps(data), self.chart(result.script), self.owner)))
+
+    def fail(self, py_file, message, elapsed=0.0):
+        """Mark a chart this build still holds as failed (e.g. after an exception in the build)."""
+        data = {'ok': False, 'returncode': None, 'elapsed': elapsed, 'message': message,
+                'outputs': [], 'unchanged': []}
+        self._transaction(lambda db: db.execute(
+            "UPDATE jobs SET state = 'failed', finished = ?, result = ? "
+            "WHERE chart = ? AND owner = ? AND state = 'leased'",
+            (time.time(), json.dumps(data), self.chart(py_file), self.owner)))
+
+    def release(self, py_file, delay=0.0):
+        """Put a chart this build holds back in the queue, runnable after ``delay`` seconds."""
+        self._transaction(lambda db: db.execute(
+            "UPDATE jobs SET state = 'pending', owner = NULL, lease_until = NULL, "
+            "not_before = ? WHERE chart = ? AND owner = ?",
+            (time.time() + delay, self.chart(py_file), self.owner)))
+
+    def results(self, scripts):
+        """
+        Results of finished charts among ``scripts``.
+
+        Returns
+        -------
+        results : dict
+            Script -> (owner, attempts, result dict), only for done/failed charts
+        """
+        found = {}
+        with self._lock:
+            for py_file in scripts:
+                row = self._db.execute(
+                    "SELECT owner, attempts, result FROM jobs WHERE chart = ? "
+                    "AND state IN ('done', 'failed')", (self.chart(py_file),)).fetchone()
+                if row is not None:
+                    found[py_file] = (row[0], row[1], json.loads(row[2]))
+        return found
+
+    def renew(self):
+        """Extend the leases of every chart this build is running."""
+        self._transaction(lambda db: db.execute(
+            "UPDATE jobs SET lease_until = ? WHERE owner = ? AND state = 'leased'",
+            (time.time() + self.lease, self.owner)))
+
+    def _beat(self):
+        while not self._stop.wait(self.heartbeat):
+            try:
+                self.renew()
+            except sqlite3.Error:
+                pass
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        # Give up charts this build still holds (e.g. after Ctrl+C)
+        self._transaction(lambda db: db.execute(
+            "UPDATE jobs SET state = 'pending', owner = NULL, lease_until = NULL "
+            "WHERE owner = ? AND state = 'leased'", (self.owner,)))
+        self._db.close()
+
+
+def drain(queue, scripts, run, budget, jobs, config, on_finished):
+    """
+    Build ``scripts`` together with the other builds sharing ``queue``.
+
+    Parameters
+    ----------
+    run : callable
+        ``run(py_file, timeout)`` -> ChartResult
+    budget : callable
+        ``budget(py_file, attempt)`` -> timeout in seconds
+    on_finished : callable
+        Called with each final ChartResult of a chart this build ran
+        (including charts stolen from other builds)
+
+    An exception while building a chart fails that chart with the
+    traceback as its message (see WorkQueue.fail) instead of ending the
+    thread with the lease still held.
+
+    Returns once every chart in ``scripts`` is done or failed, whoever ran it.
+    """
+    wanted = set(scripts)
+    poll = config['queue_poll']
+
+    def waiting():
+        return len(queue.results(wanted)) < len(wanted)
+
+    def work():
+        while True:
+            job = queue.claim()
+            if job is None:
+                if not waiting():
+                    return
+                time.sleep(poll)
+                continue
+            py_file, attempt = job
+            start = time.perf_counter()
+            try:
+                result = run(py_file, budget(py_file, attempt))._replace(attempts=attempt)
+                if result.killed and attempt <= config['retries']:
+                    queue.release(py_file, retry_delay(attempt + 1, config))
+                    continue
+                queue.complete(result)
+                on_finished(result)
+            except Exception:
+                queue.fail(py_file, traceback.format_exc().strip()[-300:],
+                           time.perf_counter() - start)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def print_queue(path=QUEUE_PATH):
+    """Print every chart in the queue with its state."""
+    db = sqlite3.connect(path, timeout=60)
+    db.execute(SCHEMA)
+    rows = db.execute('SELECT chart, state, owner, attempts, lease_until, result '
+                      'FROM jobs ORDER BY queued, chart').fetchall()
+    db.close()
+
+    now = time.time()
+    counts = {}
+    for chart, state, owner, attempts, lease_until, result in rows:
+        if state == 'leased' and lease_until < now:
+            state = 'expired'
+        counts[state] = counts.get(state, 0) + 1
+        detail = ''
+        if state in ('done', 'failed'):
+            detail = f" {json.loads(result)['elapsed']:.1f}s"
+        if owner:
+            detail += f" by {owner}"
+        print(f"  [{state.upper()}] {chart} (attempt {attempts}){detail}")
+    print(f"\n{len(rows)} charts: " + ', '.join(f"{n} {s}" for s, n in sorted(counts.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show or clear the shared chart build queue')
+    parser.add_argument('--clear', action='store_true',
+                        help='Remove every job (only when no build is running)')
+    args = parser.parse_args()
+
+    if args.clear:
+        for suffix in ('', '-wal', '-shm'):
+            Path(f"{QUEUE_PATH}{suffix}").unlink(missing_ok=True)
+        print(f"Removed {QUEUE_PATH}")
+        return
+    if not QUEUE_PATH.exists():
+        print("No build queue yet (run generate_all_new_charts.py --queue)")
+        return
+    print(f"Build queue: {QUEUE_PATH}")
+    print("=" * 60)
+    print_queue()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+Shared Chart Helpers
+
+Rendering code used by several chart scripts. Charts import it like any
+other package and carry no path setup of their own:
+
+    from chart_helpers.boundary import boundary_grid, plot_boundary
+
+The build puts the project root on the path of every chart run (the
+PYTHONPATH of chart subprocesses, sys.path in warm workers). To run a chart
+by hand, start it from the project root with PYTHONPATH=. or through
+``python -m build_tools.plugins <chart>``. sync_to_quantlet.py copies the
+package into every QuantLet folder whose chart imports it, so the folders
+stay self-contained there.
+
+Charts that import the package are rebuilt when any of its modules changes
+(build_tools.cache).
+"""
@@ -0,0 +1,148 @@
+"""
+Batched Per-Point Artists
+
+Charts often mark single points inside Python loops: ax.plot(i, y, 'o')
+per day, ax.scatter([x], [y]) per misclassified sample, one highlight ring
+per point. Each call creates its own artist, which is drawn separately and
+written to the PDF as a separate object. A PointBatch collects these
+points instead and draws them in flush(). Points that share marker shape,
+zorder and legend label become one scatter (PathCollection). Color, size
+and edge width can differ per point, so the artist count depends on the
+number of panels and marker shapes, not on the number of points.
+
+- marker() takes the arguments of ax.plot(x, y, marker, ...)
+- point() takes the arguments of ax.scatter(x, y, ...)
+- ring() draws an unfilled highlight circle around a point
+- label() collects text; flush() draws one Text artist per label.
+  matplotlib has no batched text artist, and drawing labels as glyph
+  outlines in a single collection made PDFs far larger than Text does
+
+x and y can be scalars (inside a loop) or arrays. Used as a context
+manager, the batch is flushed when the block ends.
+
+Usage:
+    from chart_helpers.batching import PointBatch
+
+    with PointBatch(ax) as points:
+        for i, correct in enumerate(hits):
+            points.marker(i, 1, 'o' if correct else 'x', color='green' if correct else 'red',
+                          size=8, edgewidth=2)
+            if not correct:
+                points.ring(i, 1, size=200, color=mlred, linewidth=2)
+"""
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.colors import to_rgba_array
+from matplotlib.markers import MarkerStyle
+
+
+def _rgba(color, alpha, count):
+    """(count, 4) colors; ``alpha`` overrides the color alpha, as for a scatter."""
+    colors = to_rgba_array(color)
+    if len(colors) == 1:
+        colors = np.repeat(colors, count, axis=0)
+    if alpha is not None:
+        colors[:, 3] = np.where(colors[:, 3] > 0, alpha, 0)
+    return colors
+
+
+class PointBatch:
+    """
+    Per-point markers, rings and labels of one Axes, drawn together by flush().
+
+    Parameters
+    ----------
+    ax : Axes
+        Axes the points are drawn on
+    """
+
+    def __init__(self, ax):
+        self.ax = ax
+        self._groups = {}  # (marker, zorder, label) -> list of point arrays
+        self._labels = []  # (x, y, text, kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+    def point(self, x, y, s=None, color='C0', marker='o', edgecolor='face', linewidth=None,
+              alpha=None, zorder=1, label=None):
+        """
+        Add points like ax.scatter(x, y, s, c=color, marker, edgecolors, linewidths, alpha).
+
+        ``s`` is the marker area in points**2 (default rcParams['lines.markersize']**2).
+        ``edgecolor='face'`` uses the fill color. Unfilled markers ('x', '+')
+        are drawn in ``color``, as scatter does.
+        """
+        x, y = np.broadcast_arrays(np.atleast_1d(np.asarray(x, dtype=float)),
+                                   np.atleast_1d(np.asarray(y, dtype=float)))
+        count = x.size
+        face = _rgba(color, alpha, count)
+        filled = MarkerStyle(marker).is_filled()
+        if not filled or (isinstance(edgecolor, str) and edgecolor == 'face'):
+            edge = face.copy()
+        else:
+            edge = _rgba(edgecolor, alpha, count)
+        if s is None:
+            s = rcParams['lines.markersize'] ** 2
+        if linewidth is None:
+            linewidth = rcParams['lines.linewidth'] if not filled else rcParams['patch.linewidth']
+
+        part = {'x': x.ravel(), 'y': y.ravel(), 'face': face, 'edge': edge,
+                's': np.broadcast_to(np.asarray(s, dtype=float), count).ravel(),
+                'linewidth': np.broadcast_to(np.asarray(linewidth, dtype=float), count).ravel(),
+                'filled': filled}
+        self._groups.setdefault((marker, zorder, label), []).append(part)
+
+    def marker(self, x, y, marker='o', color='C0', size=None, edgecolor=None, edgewidth=None,
+               alpha=None, zorder=2, label=None):
+        """
+        Add markers like ax.plot(x, y, marker, color=color, markersize=size,
+        markeredgecolor=edgecolor, markeredgewidth=edgewidth).
+
+        ``size`` is the marker diameter in points, as ``markersize``.
+        """
+        if size is None:
+            size = rcParams['lines.markersize']
+        if edgewidth is None:
+            edgewidth = rcParams['lines.markeredgewidth']
+        self.point(x, y, s=np.square(size), color=color, marker=marker,
+                   edgecolor='face' if edgecolor is None else edgecolor,
+                   linewidth=edgewidth, alpha=alpha, zorder=zorder, label=label)
+
+    def ring(self, x, y, size=200, color='red', linewidth=2, alpha=None, zorder=1, label=None):
+        """Add unfilled highlight circles of area ``size`` (points**2) around points."""
+        self.point(x, y, s=size, color='none', marker='o', edgecolor=color, linewidth=linewidth,
+                   alpha=alpha, zorder=zorder, label=label)
+
+    def label(self, x, y, text, **kwargs):
+        """Add a text label; ``kwargs`` as for ax.text."""
+        self._labels.append((x, y, text, kwargs))
+
+    def flush(self):
+        """
+        Draw and forget the collected points and labels.
+
+        Returns
+        -------
+        artists : list
+            One PathCollection per (marker, zorder, label) group, then the Text artists
+        """
+        artists = []
+        for (marker, zorder, label), parts in self._groups.items():
+            def joined(name):
+                return np.concatenate([part[name] for part in parts])
+            face, edge = joined('face'), joined('edge')
+            kwargs = {'edgecolors': edge} if parts[0]['filled'] else {}
+            artists.append(self.ax.scatter(joined('x'), joined('y'), s=joined('s'), c=face,
+                                           marker=marker, linewidths=joined('linewidth'),
+                                           zorder=zorder, label=label, **kwargs))
+        for x, y, text, kwargs in self._labels:
+            artists.append(self.ax.text(x, y, text, **kwargs))
+        self._groups = {}
+        self._labels = []
+        return artists
@@ -0,0 +1,144 @@
+"""
+Adaptive Decision Boundary Grids
+
+Classifier charts shade the regions of a model and draw its decision
+boundary on a fine grid. Evaluating the model on every cell of a dense
+np.meshgrid is mostly wasted: away from the boundary whole blocks of cells
+get the same class. boundary_grid() builds the same fine grid with far
+fewer model calls:
+- the model is evaluated on a coarse grid (every 2**levels fine cells)
+- each level halves the spacing, and only cells whose corners disagree
+  (plus ``margin`` cells around them) are evaluated at the new points;
+  the other points take the class of their cell
+- points are evaluated in vectorized chunks of ``chunk_size`` rows
+
+The result is a full-resolution label array for contourf/contour, equal to
+the dense grid except for class regions smaller than the coarse spacing
+that no coarse point hits (raise ``margin`` or lower ``levels`` for models
+with such islands).
+
+The model is any callable mapping an (n, 2) array of points to n labels or
+scores, or an sklearn-like object with ``predict``. Scores are turned into
+classes with ``threshold`` (score > threshold).
+
+Usage:
+    from chart_helpers.boundary import boundary_grid, plot_boundary
+
+    grid = boundary_grid(lambda p: model.predict(scaler.transform(p)),
+                         (x_min, x_max), (y_min, y_max), step=0.01)
+    plot_boundary(ax, grid, colors=[mlred, mlgreen], line_color=mlpurple)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+
+BoundaryGrid = namedtuple('BoundaryGrid', ['xx', 'yy', 'labels', 'evaluated'])
+
+
+def as_predictor(model, threshold=None):
+    """Function mapping (n, 2) points to n class labels."""
+    predict = model.predict if hasattr(model, 'predict') else model
+    if not callable(predict):
+        raise TypeError(f"Expected a callable or a model with predict(), got {type(model).__name__}")
+    if threshold is None:
+        return lambda points: np.asarray(predict(points)).reshape(len(points))
+    return lambda points: (np.asarray(predict(points)).reshape(len(points)) > threshold).astype(int)
+
+
+def evaluate(predict, points, chunk_size=65536):
+    """``predict`` over ``points`` in chunks of ``chunk_size`` rows."""
+    if len(points) == 0:
+        return np.empty(0)
+    return np.concatenate([predict(points[start:start + chunk_size])
+                           for start in range(0, len(points), chunk_size)])
+
+
+def _grid_axis(limits, step, stride):
+    """Fine grid coordinates from limits[0] in steps of ``step``, a multiple of ``stride`` cells long."""
+    low, high = limits
+    cells = max(1, int(np.ceil((high - low) / step / stride))) * stride
+    return low + step * np.arange(cells + 1)
+
+
+def boundary_grid(model, xlim, ylim, step=0.01, levels=4, margin=1, threshold=None,
+                  chunk_size=65536):
+    """
+    Class labels of ``model`` on a fine grid, refined only near the boundary.
+
+    Parameters
+    ----------
+    model : callable or object with predict
+        Maps an (n, 2) array of points to n labels (or scores, see ``threshold``)
+    xlim, ylim : (float, float)
+        Area to cover; the grid may extend up to one coarse cell beyond the
+        upper limits
+    step : float, optional
+        Spacing of the fine grid (as ``h`` of a dense meshgrid)
+    levels : int, optional
+        Refinement levels: the model first sees every 2**levels-th point
+    margin : int, optional
+        Cells refined around every cell the boundary crosses
+    threshold : float, optional
+        Turn scores into classes (score > threshold)
+    chunk_size : int, optional
+        Points per model call
+
+    Returns
+    -------
+    grid : BoundaryGrid
+        ``xx``, ``yy`` and ``labels`` (fine grid, as np.meshgrid) and the
+        number of points ``evaluated`` by the model
+    """
+    predict = as_predictor(model, threshold)
+    stride = 2 ** levels
+    x = _grid_axis(xlim, step, stride)
+    y = _grid_axis(ylim, step, stride)
+
+    rows = np.arange(0, len(y), stride)
+    cols = np.arange(0, len(x), stride)
+    cy, cx = np.meshgrid(y[rows], x[cols], indexing='ij')
+    labels = evaluate(predict, np.column_stack([cx.ravel(), cy.ravel()]),
+                      chunk_size).reshape(cx.shape)
+    evaluated = labels.size
+
+    for level in range(levels):
+        stride //= 2
+        m, n = labels.shape
+
+        # Cells whose four corners disagree, grown by the margin
+        corner = labels[:-1, :-1]
+        active = ((corner != labels[1:, :-1]) | (corner != labels[:-1, 1:])
+                  | (corner != labels[1:, 1:]))
+        for _ in range(margin):
+            grown = active.copy()
+            grown[1:, :] |= active[:-1, :]
+            grown[:-1, :] |= active[1:, :]
+            grown[:, 1:] |= active[:, :-1]
+            grown[:, :-1] |= active[:, 1:]
+            active = grown
+
+        # Next level: known points at even indices, the rest from their cell
+        finer = np.repeat(np.repeat(labels, 2, axis=0), 2, axis=1)[:2 * m - 1, :2 * n - 1]
+        refine = np.zeros(finer.shape, dtype=bool)
+        for a in range(3):
+            for b in range(3):
+                refine[a:a + 2 * (m - 1):2, b:b + 2 * (n - 1):2] |= active
+        refine[::2, ::2] = False
+
+        fine_rows, fine_cols = np.nonzero(refine)
+        points = np.column_stack([x[fine_cols * stride], y[fine_rows * stride]])
+        if len(points):
+            finer[fine_rows, fine_cols] = evaluate(predict, points, chunk_size)
+        evaluated += len(points)
+        labels = finer
+
+    xx, yy = np.meshgrid(x, y)
+    return BoundaryGrid(xx, yy, labels, evaluated)
+
+
+def plot_boundary(ax, grid, colors, line_color, alpha=0.2, linewidth=3):
+    """Shade the class regions of a two-class grid and draw the boundary between them."""
+    ax.contourf(grid.xx, grid.yy, grid.labels, levels=1, colors=colors, alpha=alpha)
+    ax.contour(grid.xx, grid.yy, grid.labels, levels=1, colors=[line_color], linewidths=linewidth)
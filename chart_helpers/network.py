@@ -0,0 +1,232 @@
+"""
+Batched Network Diagrams
+
+Architecture charts used to draw every neuron as its own Circle patch and
+every connection with its own ax.plot call. Each of those artists is drawn
+and written to the PDF separately, so a diagram with a few wide layers
+turns into thousands of artists. This module draws a whole layer of
+neurons as one PatchCollection and a whole set of connections between two
+layers as one LineCollection. The number of artists (and the PDF overhead)
+then depends on the number of layers, not on the number of neurons.
+
+- layer_positions() lays out centered layers
+- neurons() draws the neurons of a layer
+- connect() draws the connections between two layers. ``mask`` selects
+  edges, and ``weights`` can map |w| to line widths (``width_range``) and w
+  to colors (``cmap``)
+- draw_network() draws a full network from layer positions, per-layer
+  styles, active-neuron masks (dropout) and weight matrices
+
+Styles take the same keywords as the functions above. A scalar applies to
+every neuron or edge; an array gives one value per neuron, or an
+(n_src, n_dst) array per edge.
+
+Usage:
+    from chart_helpers.network import draw_network, layer_positions
+
+    layers = layer_positions([4, 6, 6, 2], [1.5, 4, 6.5, 9], center=5, spacing=0.7)
+    draw_network(ax, layers, radius=0.25,
+                 neuron_style={'facecolor': '#0066CC44', 'edgecolor': mlblue, 'linewidth': 2},
+                 edge_style={'color': mlgray, 'linewidth': 0.5, 'alpha': 0.5})
+"""
+
+import numpy as np
+from matplotlib import colormaps, rcParams
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.colors import Normalize, to_rgba_array
+from matplotlib.patches import Circle
+
+
+def layer_positions(sizes, xs, center=5.0, spacing=0.7):
+    """
+    Neuron centers of layers stacked vertically around ``center``.
+
+    Returns
+    -------
+    layers : list of ndarray
+        One (n, 2) array of (x, y) per layer, top neuron first
+    """
+    layers = []
+    for x, n in zip(xs, sizes):
+        y = center + (n - 1) * spacing / 2 - spacing * np.arange(n)
+        layers.append(np.column_stack([np.full(n, float(x)), y]))
+    return layers
+
+
+def _rgba(color, alpha, count):
+    """(count, 4) colors; ``alpha`` overrides the color alpha like Artist.set_alpha."""
+    colors = to_rgba_array(color)
+    if len(colors) == 1:
+        colors = np.repeat(colors, count, axis=0)
+    if alpha is not None:
+        # 'none' stays transparent, as for a patch
+        colors[:, 3] = np.where(colors[:, 3] > 0, np.broadcast_to(alpha, count), 0)
+    return colors
+
+
+def _capstyle(linestyle):
+    solid = linestyle in ('-', 'solid', None)
+    return rcParams['lines.solid_capstyle' if solid else 'lines.dash_capstyle']
+
+
+def neurons(ax, centers, radius=0.3, facecolor='white', edgecolor='black', linewidth=None,
+            linestyle='solid', alpha=None, **kwargs):
+    """
+    Draw circles at ``centers`` as one PatchCollection.
+
+    Parameters
+    ----------
+    ax : Axes
+    centers : (n, 2) array
+        Neuron centers
+    radius : float, optional
+    facecolor, edgecolor : color or list of colors, optional
+    linewidth : float or array, optional
+        Edge width in points (default rcParams['patch.linewidth'])
+    linestyle : str or list, optional
+    alpha : float or array, optional
+        Overrides the alpha of both colors, like Circle(alpha=...)
+    **kwargs
+        Passed to PatchCollection (zorder, hatch, ...)
+
+    Returns
+    -------
+    collection : PatchCollection
+    """
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    collection = PatchCollection([Circle(center, radius) for center in centers],
+                                 facecolors=_rgba(facecolor, alpha, len(centers)),
+                                 edgecolors=_rgba(edgecolor, alpha, len(centers)),
+                                 linewidths=linewidth, linestyles=linestyle, **kwargs)
+    ax.add_collection(collection)
+    return collection
+
+
+def connect(ax, src, dst, inset=0.0, mask=None, weights=None, color='gray', linewidth=1.0,
+            alpha=None, linestyle='solid', cmap=None, width_range=None, weight_levels=16, **kwargs):
+    """
+    Draw the connections from every neuron in ``src`` to every neuron in ``dst`` as one LineCollection.
+
+    Parameters
+    ----------
+    ax : Axes
+    src, dst : (n, 2) and (m, 2) arrays
+        Neuron centers of the two layers
+    inset : float or (float, float), optional
+        Horizontal gap at the source and destination ends (the neuron radii)
+    mask : (n, m) bool array, optional
+        Edges to draw (default all)
+    weights : (n, m) array, optional
+        Edge weights, used by ``width_range`` and ``cmap``
+    color : color, optional
+        Edge color when no ``cmap`` is given
+    linewidth, alpha : float or (n, m) array, optional
+    linestyle : str, optional
+    cmap : str or Colormap, optional
+        Color edges by weight, centered on zero (needs ``weights``)
+    width_range : (float, float), optional
+        Line widths for |w| = 0 and the largest |w| (needs ``weights``)
+    weight_levels : int, optional
+        Weights are rounded to this many levels per sign and edges are drawn
+        grouped by level, so a PDF switches line style once per level instead
+        of once per edge (None keeps exact weights)
+    **kwargs
+        Passed to LineCollection (zorder, ...)
+
+    Returns
+    -------
+    collection : LineCollection
+    """
+    src = np.asarray(src, dtype=float).reshape(-1, 2)
+    dst = np.asarray(dst, dtype=float).reshape(-1, 2)
+    shape = (len(src), len(dst))
+    r_src, r_dst = (inset, inset) if np.isscalar(inset) else inset
+
+    keep = np.ones(shape, dtype=bool) if mask is None else np.broadcast_to(np.asarray(mask, dtype=bool), shape)
+    rows, cols = np.nonzero(keep)
+    segments = np.stack([src[rows] + [r_src, 0], dst[cols] - [r_dst, 0]], axis=1)
+
+    relative = None
+    if weights is not None and (cmap is not None or width_range is not None):
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), shape)
+        relative = weights[rows, cols] / (np.abs(weights).max() or 1.0)
+        if weight_levels:
+            relative = np.round(relative * weight_levels) / weight_levels
+            order = np.argsort(relative, kind='stable')
+            rows, cols, relative, segments = rows[order], cols[order], relative[order], segments[order]
+
+    def per_edge(value):
+        value = np.asarray(value, dtype=float)
+        return value if value.ndim == 0 else np.broadcast_to(value, shape)[rows, cols]
+
+    widths = per_edge(linewidth)
+    colors = _rgba(color, None, len(rows))
+    if relative is not None and width_range is not None:
+        widths = np.interp(np.abs(relative), (0, 1), width_range)
+    if relative is not None and cmap is not None:
+        cmap = colormaps[cmap] if isinstance(cmap, str) else cmap
+        colors = cmap(Normalize(-1, 1)(relative))
+    if alpha is not None:
+        colors[:, 3] = per_edge(alpha)
+
+    collection = LineCollection(segments, colors=colors, linewidths=np.atleast_1d(widths),
+                                linestyles=linestyle, capstyle=_capstyle(linestyle), **kwargs)
+    ax.add_collection(collection)
+    return collection
+
+
+def _layer_style(style, index):
+    """Style of layer ``index`` from a dict (all layers) or a list of dicts (per layer)."""
+    if style is None or isinstance(style, dict):
+        return style
+    return style[index]
+
+
+def draw_network(ax, layers, radius=0.3, weights=None, active=None, neuron_style=None,
+                 edge_style=None, dropped_neuron_style=None, dropped_edge_style=None):
+    """
+    Draw a fully connected network: one collection per layer and per layer pair.
+
+    Parameters
+    ----------
+    ax : Axes
+    layers : list of (n, 2) arrays
+        Neuron centers per layer (see layer_positions)
+    radius : float, optional
+        Neuron radius; connections stop at the circle edges
+    weights : list of (n_l, n_l+1) arrays, optional
+        Weights per layer pair, passed to connect()
+    active : list of bool arrays (or None), optional
+        Active neurons per layer; None means all active. Inactive
+        (dropped) neurons and their connections use the dropped styles
+    neuron_style, edge_style : dict or list of dicts, optional
+        Keywords for neurons() / connect(), one dict for all layers or one
+        per layer (per layer pair for edges)
+    dropped_neuron_style, dropped_edge_style : dict or list of dicts, optional
+        Styles for inactive neurons and connections touching them; None
+        leaves them out
+
+    Returns
+    -------
+    neuron_collections, edge_collections : list, list
+    """
+    active = [np.ones(len(layer), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+              for layer, mask in zip(layers, active or [None] * len(layers))]
+
+    edge_collections = []
+    for l in range(len(layers) - 1):
+        both = active[l][:, None] & active[l + 1][None, :]
+        layer_weights = None if weights is None else weights[l]
+        for mask, style in ((both, edge_style), (~both, dropped_edge_style)):
+            style = _layer_style(style, l)
+            if style is not None and mask.any():
+                edge_collections.append(connect(ax, layers[l], layers[l + 1], inset=radius,
+                                                mask=mask, weights=layer_weights, **style))
+
+    neuron_collections = []
+    for l, layer in enumerate(layers):
+        for mask, style in ((active[l], neuron_style), (~active[l], dropped_neuron_style)):
+            style = _layer_style(style, l)
+            if style is not None and mask.any():
+                neuron_collections.append(neurons(ax, np.asarray(layer)[mask], radius, **style))
+    return neuron_collections, edge_collections
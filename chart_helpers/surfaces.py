@@ -0,0 +1,202 @@
+"""
+Loss Surfaces and Cached Contour Level Sets
+
+The optimizer and loss landscape charts draw the same few loss surfaces,
+several panels per chart. This module holds them as named surfaces and
+computes the contour level sets of a surface once:
+- surface() evaluates a named loss on a grid; results are memoized per
+  process
+- contour() / contourf() draw a surface like ax.contour / ax.contourf, but
+  the levels and level-set polygons are computed once per (surface,
+  levels) and reused by every panel and chart that asks for them, within
+  the process and across builds (pickled under .build/surfaces/, or
+  $NN_SURFACE_CACHE)
+
+Disk entries are keyed by the surface name, parameters and grid, the
+number of levels, this file's content and the matplotlib version, so an
+edited formula or a matplotlib upgrade never reuses stale level sets. The
+returned ContourSet is a regular matplotlib mappable (colorbar works).
+
+Usage:
+    from chart_helpers.surfaces import contour, contourf, register, surface
+
+    bowl = surface('quadratic', (-2, 2), (-2, 2), a=1.0, b=1.0)
+    for ax, cmap in zip(axes, ['Blues', 'Oranges', 'Greens']):
+        contour(ax, bowl, levels=15, colors=mlgray, alpha=0.5)
+        contourf(ax, bowl, levels=15, cmap=cmap, alpha=0.3)
+
+    @register('my_loss')
+    def my_loss(X, Y, scale=1.0):
+        return scale * (X**2 + Y**4)
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+
+CACHE_DIR = Path(os.environ.get('NN_SURFACE_CACHE')
+                 or Path(__file__).resolve().parent.parent / '.build' / 'surfaces')
+
+Surface = namedtuple('Surface', ['name', 'X', 'Y', 'Z', 'key'])
+
+SURFACES = {}    # name -> function
+_surfaces = {}   # key -> Surface
+_level_sets = {}  # (surface key, levels, filled) -> dict
+
+
+def register(name):
+    """Decorator adding ``func(X, Y, **params) -> Z`` as a named surface."""
+    def decorate(func):
+        SURFACES[name] = func
+        return func
+    return decorate
+
+
+@register('quadratic')
+def quadratic(X, Y, a=1.0, b=1.0):
+    """Bowl a*w1^2 + b*w2^2 (elongated for a != b)."""
+    return a * X**2 + b * Y**2
+
+
+@register('rippled_bowl')
+def rippled_bowl(X, Y, amplitude=0.5, frequency=3.0):
+    """Bowl with sinusoidal ripples (local bumps around a clear minimum)."""
+    return (X**2 + Y**2) + amplitude * np.sin(frequency*X) * np.cos(frequency*Y)
+
+
+@register('egg_crate')
+def egg_crate(X, Y):
+    """Shallow bowl with a sine pattern on top."""
+    return (X**2 + Y**2) / 10 + 0.5 * np.sin(X) * np.sin(Y) + 2
+
+
+@register('multimodal')
+def multimodal(X, Y):
+    """Non-convex surface with several local minima."""
+    return (np.sin(X * 2) * np.sin(Y * 2) + 0.1 * (X**2 + Y**2) +
+            0.5 * np.exp(-((X-1)**2 + (Y-1)**2)))
+
+
+@functools.lru_cache(maxsize=None)
+def _source_digest():
+    with open(__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def _disk_path(kind, key):
+    return CACHE_DIR / f"{kind}_{hashlib.sha256(key.encode()).hexdigest()[:24]}.pkl"
+
+
+def _load(path):
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def _store(path, value):
+    """Write atomically (charts build in parallel); a read-only tree is not an error."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def surface(name, xlim=(-3, 3), ylim=(-3, 3), n=100, **params):
+    """
+    A named loss surface on an n x n grid.
+
+    Parameters
+    ----------
+    name : str
+        Registered surface (see SURFACES)
+    xlim, ylim : (float, float)
+        Grid range (np.linspace endpoints)
+    n : int or (int, int), optional
+        Grid points along x and y
+    **params
+        Parameters of the surface function
+
+    Returns
+    -------
+    surface : Surface
+        ``X``, ``Y`` (as np.meshgrid), ``Z`` and the memo ``key``
+    """
+    if name not in SURFACES:
+        raise KeyError(f"Unknown surface {name!r} (available: {', '.join(sorted(SURFACES))})")
+    func = SURFACES[name]
+    nx, ny = (n, n) if np.isscalar(n) else n
+    key = repr((name, sorted(params.items()), tuple(xlim), tuple(ylim), nx, ny, _source_digest()))
+    if key in _surfaces:
+        return _surfaces[key]
+
+    X, Y = np.meshgrid(np.linspace(*xlim, nx), np.linspace(*ylim, ny))
+    result = Surface(name, X, Y, func(X, Y, **params), key)
+    _surfaces[key] = result
+    return result
+
+
+def level_sets(surf, levels=15, filled=False):
+    """
+    Contour levels and level-set polygons of a surface, computed once.
+
+    Returns
+    -------
+    sets : dict
+        ``levels``, ``allsegs`` and ``allkinds`` as in a matplotlib ContourSet
+    """
+    import matplotlib
+    from matplotlib.figure import Figure
+
+    memo = (surf.key, repr(levels), filled)
+    if memo in _level_sets:
+        return _level_sets[memo]
+
+    path = _disk_path('levels', repr(memo + (matplotlib.__version__,)))
+    sets = _load(path)
+    if sets is None:
+        ax = Figure().add_subplot()
+        draw = ax.contourf if filled else ax.contour
+        computed = draw(surf.X, surf.Y, surf.Z, levels=levels)
+        sets = {'levels': computed.levels, 'allsegs': computed.allsegs,
+                'allkinds': computed.allkinds}
+        _store(path, sets)
+    _level_sets[memo] = sets
+    return sets
+
+
+def _draw(ax, surf, levels, filled, kwargs):
+    from matplotlib.contour import ContourSet
+
+    sets = level_sets(surf, levels, filled)
+    result = ContourSet(ax, sets['levels'], sets['allsegs'], sets['allkinds'],
+                        filled=filled, **kwargs)
+    # Same data limits as ax.contour on the grid (line sets may not reach the edges)
+    x0, x1 = surf.X.min(), surf.X.max()
+    y0, y1 = surf.Y.min(), surf.Y.max()
+    result.sticky_edges.x[:] = [x0, x1]
+    result.sticky_edges.y[:] = [y0, y1]
+    ax.update_datalim([(x0, y0), (x1, y1)])
+    ax.autoscale_view(tight=True)
+    return result
+
+
+def contour(ax, surf, levels=15, **kwargs):
+    """ax.contour(X, Y, Z, levels, **kwargs) of a surface from cached level sets."""
+    return _draw(ax, surf, levels, False, kwargs)
+
+
+def contourf(ax, surf, levels=15, **kwargs):
+    """ax.contourf(X, Y, Z, levels, **kwargs) of a surface from cached level sets."""
+    return _draw(ax, surf, levels, True, kwargs)
@@ -1,52 +1,75 @@
 """
 Generate all chart PDFs by running each chart's Python script
+
+Charts are built in parallel (one job per CPU core by default). Charts whose
+script, branding config, logo/QR inputs and numpy/matplotlib versions are
+unchanged since the last successful build are skipped.
+
+With --queue several builds started at the same time (other terminals, CI
+shards) share their charts through a SQLite work queue instead of rendering
+the same charts twice (see build_tools.workqueue).
+
+With --profile every chart that is built is measured (wall/CPU time, peak
+memory, import/compute/draw/savefig phases); the report is written to
+.build/profiles/ and compared with the previous profiled build.
+
+Every run is recorded in the build history (see build_tools.history).
+
+Usage:
+    python generate_all_new_charts.py [--jobs N] [--timeout SECONDS] [--force]
+                                      [--backend warm|subprocess] [--profile] [--queue]
 """
 
-import subprocess
-import os
+import argparse
 from pathlib import Path
 
+from build_tools.cache import ChartCache
+from build_tools.config import load_config, resolve_jobs
+from build_tools.history import record_run
+from build_tools.profiling import report_build
+from build_tools.runner import find_chart_scripts, build_charts, print_report
+from build_tools.trace import traced
+
 project_root = Path(__file__).parent
 
-# All chart directories
-modules = ['module1_perceptron', 'module2_mlp', 'module3_training', 'module4_applications', 'appendix']
-
-success = 0
-failed = 0
-
-for module in modules:
-    charts_dir = project_root / module / 'charts'
-    if not charts_dir.exists():
-        continue
-
-    print(f"\n=== {module} ===")
-
-    for chart_dir in sorted(charts_dir.iterdir()):
-        if not chart_dir.is_dir():
-            continue
-
-        py_file = chart_dir / f"{chart_dir.name}.py"
-        if not py_file.exists():
-            continue
-
-        # Check if PDF already exists
-        pdf_file = chart_dir / f"{chart_dir.name}.pdf"
-
-        try:
-            os.chdir(chart_dir)
-            result = subprocess.run(['python', py_file.name], capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                print(f"  [OK] {chart_dir.name}")
-                success += 1
-            else:
-                print(f"  [FAIL] {chart_dir.name}: {result.stderr[:100]}")
-                failed += 1
-        except Exception as e:
-            print(f"  [ERROR] {chart_dir.name}: {e}")
-            failed += 1
-
-os.chdir(project_root)
-print(f"\n{'='*60}")
-print(f"Chart generation complete!")
-print(f"  Success: {success}")
-print(f"  Failed: {failed}")
+
+@traced('generate_all_new_charts')
+def main():
+    parser = argparse.ArgumentParser(description='Generate all chart PDFs in parallel')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Charts built at the same time (default: build_config.json, 0 = all cores)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Per-chart timeout in seconds (default: build_config.json)')
+    parser.add_argument('--backend', choices=['warm', 'subprocess'], default=None,
+                        help='Preloaded worker pool or fresh interpreter per chart (default: build_config.json)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild every chart, ignoring the build cache and the artifact store')
+    parser.add_argument('--profile', action='store_true',
+                        help='Measure each chart and compare with the previous profiled build')
+    parser.add_argument('--queue', action='store_true',
+                        help='Share the work with other builds running at the same time')
+    args = parser.parse_args()
+
+    scripts = find_chart_scripts(project_root)
+    print(f"Building {len(scripts)} charts...")
+
+    cache = ChartCache()
+
+    config = load_config()
+    backend = args.backend or config['backend']
+    jobs = resolve_jobs(config['jobs'] if args.jobs is None else args.jobs)
+    with record_run('charts', config=config, backend=backend, jobs=jobs, force=args.force,
+                    queue=args.queue) as record:
+        with record.stage('charts'):
+            results = build_charts(scripts, jobs=args.jobs, timeout=args.timeout, cache=cache,
+                                   backend=args.backend, profile=args.profile, queue=args.queue,
+                                   force=args.force)
+        record.charts(results)
+    print_report(results, project_root)
+
+    if args.profile:
+        report_build(results, project_root, backend=backend, jobs=jobs)
+
+
+if __name__ == '__main__':
+    main()
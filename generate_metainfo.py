@@ -10,23 +10,18 @@ Standard QuantLet format:
 - Output
 """
 
-import re
 from pathlib import Path
 
+from build_tools.registry import MODULES, load_index
+from build_tools.trace import traced
 
-def extract_metadata_from_script(py_file):
-    """Extract CHART_METADATA from Python script without executing it."""
-    content = py_file.read_text(encoding='utf-8')
 
-    # Extract title
-    title_match = re.search(r"'title'\s*:\s*'([^']+)'", content)
-    title = title_match.group(1) if title_match else py_file.stem
-
-    # Extract url
-    url_match = re.search(r"'url'\s*:\s*'([^']+)'", content)
-    url = url_match.group(1) if url_match else ''
-
-    return {'title': title, 'url': url}
+def extract_metadata(chart):
+    """CHART_METADATA of a chart, as recorded in the chart index."""
+    return {
+        'title': chart.metadata.get('title', chart.script.stem),
+        'url': chart.metadata.get('url', ''),
+    }
 
 
 def generate_keywords(chart_name, title):
@@ -63,19 +58,17 @@ def generate_keywords(chart_name, title):
     return sorted(keywords)[:8]  # Limit to 8 keywords
 
 
-def create_metainfo(chart_folder, metadata):
+def create_metainfo(chart, metadata):
     """Create metainfo.txt content."""
-    chart_name = chart_folder.name
+    chart_name = chart.name
     title = metadata.get('title', chart_name.replace('_', ' ').title())
 
-    # Find output files
-    outputs = []
-    for ext in ['pdf', 'png']:
-        files = list(chart_folder.glob(f'*.{ext}'))
-        outputs.extend([f.name for f in files if f.name != 'qr_code.png'])
+    # Output files (PDF first, then PNG)
+    outputs = [f.name for ext in ['.pdf', '.png'] for f in chart.outputs if f.suffix == ext]
 
     # Find datafiles (if any)
-    datafiles = list(chart_folder.glob('*.csv')) + list(chart_folder.glob('*.json'))
+    datafiles = [chart.dir / name for ext in ['.csv', '.json']
+                 for name in chart.files if name.endswith(ext)]
 
     keywords = generate_keywords(chart_name, title)
 
@@ -98,16 +91,21 @@ Example: See {chart_name}.py for implementation details
     return metainfo
 
 
+def write_metainfo(chart):
+    """Write metainfo.txt for one chart; returns False if it has no script."""
+    if chart.script is None:
+        print(f"  [SKIP] {chart.name} - no Python file")
+        return False
+    metainfo_path = chart.dir / 'metainfo.txt'
+    metainfo_path.write_text(create_metainfo(chart, extract_metadata(chart)), encoding='utf-8')
+    print(f"  [OK] {chart.name}")
+    return True
+
+
+@traced('generate_metainfo')
 def generate_all_metainfo():
     project_root = Path(__file__).parent
-
-    modules = [
-        'module1_perceptron',
-        'module2_mlp',
-        'module3_training',
-        'module4_applications',
-        'appendix'
-    ]
+    index = load_index(project_root)
 
     generated = 0
     skipped = 0
@@ -117,39 +115,23 @@ def generate_all_metainfo():
 
     # Process numbered chart folders at root
     print("\n--- Numbered chart folders ---")
-    for folder in sorted(project_root.iterdir()):
-        if folder.is_dir() and folder.name[:2].isdigit() and folder.name[2] == '_':
-            py_files = list(folder.glob('*.py'))
-            if py_files:
-                metadata = extract_metadata_from_script(py_files[0])
-                metainfo_path = folder / 'metainfo.txt'
-                metainfo_path.write_text(create_metainfo(folder, metadata), encoding='utf-8')
-                print(f"  [OK] {folder.name}")
-                generated += 1
-            else:
-                print(f"  [SKIP] {folder.name} - no Python file")
-                skipped += 1
+    for chart in index.charts(groups=['.']):
+        if write_metainfo(chart):
+            generated += 1
+        else:
+            skipped += 1
 
     # Process module chart folders
-    for module in modules:
-        charts_dir = project_root / module / 'charts'
-        if not charts_dir.exists():
+    for module in MODULES:
+        charts = index.charts(groups=[module])
+        if not charts:
             continue
 
         print(f"\n--- {module} ---")
-        for chart_folder in sorted(charts_dir.iterdir()):
-            if not chart_folder.is_dir():
-                continue
-
-            py_files = list(chart_folder.glob('*.py'))
-            if py_files:
-                metadata = extract_metadata_from_script(py_files[0])
-                metainfo_path = chart_folder / 'metainfo.txt'
-                metainfo_path.write_text(create_metainfo(chart_folder, metadata), encoding='utf-8')
-                print(f"  [OK] {chart_folder.name}")
+        for chart in charts:
+            if write_metainfo(chart):
                 generated += 1
             else:
-                print(f"  [SKIP] {chart_folder.name} - no Python file")
                 skipped += 1
 
     print("\n" + "=" * 60)
@@ -1,6 +1,9 @@
 """
 Generate QR codes for all chart folders in NeuralNetworks3 project
 
+CHART_METADATA is read from each script's syntax tree (via the chart index);
+chart scripts are never executed.
+
 Usage:
     python generate_qr_codes.py
 
@@ -10,22 +13,16 @@ Requirements:
 
 import qrcode
 from pathlib import Path
-import importlib.util
-import sys
+
+from build_tools.registry import MODULES, load_index
+from build_tools.trace import traced
 
 
+@traced('generate_qr_codes')
 def generate_qr_codes(project_root):
     """Generate QR codes for all chart folders across all modules"""
     project_root = Path(project_root)
-
-    # Module directories to scan
-    modules = [
-        'module1_perceptron',
-        'module2_mlp',
-        'module3_training',
-        'module4_applications',
-        'appendix'
-    ]
+    index = load_index(project_root)
 
     total_generated = 0
     total_skipped = 0
@@ -33,42 +30,30 @@ def generate_qr_codes(project_root):
     print(f"Generating QR codes for project in: {project_root}")
     print("=" * 60)
 
-    for module in modules:
-        charts_dir = project_root / module / 'charts'
-        if not charts_dir.exists():
+    for module in MODULES:
+        charts = index.charts(groups=[module])
+        if not charts:
             print(f"[SKIP] Module {module}: No charts directory found")
             continue
 
         print(f"\n--- {module} ---")
 
-        # Find all chart folders
-        chart_folders = sorted([d for d in charts_dir.iterdir() if d.is_dir()])
-
-        for chart_dir in chart_folders:
-            # Find the Python script in the folder (same name as folder)
-            py_file = chart_dir / f"{chart_dir.name}.py"
-            if not py_file.exists():
-                # Try finding any .py file
-                py_files = list(chart_dir.glob("*.py"))
-                if not py_files:
-                    print(f"  [SKIP] {chart_dir.name}: No Python file found")
-                    total_skipped += 1
-                    continue
-                py_file = py_files[0]
+        for chart in charts:
+            chart_dir = chart.dir
+            py_file = chart.script
+            if py_file is None:
+                print(f"  [SKIP] {chart_dir.name}: No Python file found")
+                total_skipped += 1
+                continue
 
             try:
-                # Load the script to get CHART_METADATA
-                spec = importlib.util.spec_from_file_location("chart", py_file)
-                module_obj = importlib.util.module_from_spec(spec)
-                sys.modules["chart"] = module_obj
-                spec.loader.exec_module(module_obj)
-
-                if not hasattr(module_obj, 'CHART_METADATA'):
+                metadata = chart.metadata
+                if not metadata:
                     print(f"  [SKIP] {chart_dir.name}: No CHART_METADATA found")
                     total_skipped += 1
                     continue
 
-                url = module_obj.CHART_METADATA.get('url', None)
+                url = metadata.get('url', None)
                 if not url:
                     print(f"  [SKIP] {chart_dir.name}: No 'url' in CHART_METADATA")
                     total_skipped += 1
@@ -105,8 +90,6 @@ def generate_qr_codes(project_root):
 
 
 if __name__ == "__main__":
-    import os
-
     # Run from project root
     project_root = Path(__file__).parent
     generate_qr_codes(project_root)
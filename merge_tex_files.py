@@ -11,6 +11,8 @@ import re
 from pathlib import Path
 from datetime import datetime
 
+from build_tools.trace import traced
+
 
 def extract_preamble_and_content(tex_file):
     """Extract preamble and document content from a .tex file."""
@@ -48,6 +50,7 @@ def fix_chart_paths(content, module_folder):
     return content
 
 
+@traced('merge_tex_files')
 def merge_tex_files():
     project_root = Path(__file__).parent
 
@@ -6,6 +6,8 @@ Module 1: The Birth of Neural Computing
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.batching import PointBatch
+
 CHART_METADATA = {
     'title': 'Perceptron Learning Animation',
     'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/perceptron_learning_animation'
@@ -71,13 +73,14 @@ for idx, (ax, weights, title) in enumerate(zip(axes.flat, w_history, titles)):
         ax.fill_between(x_line, -1, y_line, alpha=0.1, color=mlorange)
 
     # Mark misclassified points
-    for x1, x2 in zip(x1_pos, x2_pos):
-        if w1 * x1 + w2 * x2 + b < 0:  # Should be positive
-            ax.scatter([x1], [x2], s=200, facecolors='none', edgecolors=mlred, linewidths=2)
-
-    for x1, x2 in zip(x1_neg, x2_neg):
-        if w1 * x1 + w2 * x2 + b >= 0:  # Should be negative
-            ax.scatter([x1], [x2], s=200, facecolors='none', edgecolors=mlred, linewidths=2)
+    with PointBatch(ax) as points:
+        for x1, x2 in zip(x1_pos, x2_pos):
+            if w1 * x1 + w2 * x2 + b < 0:  # Should be positive
+                points.ring(x1, x2, size=200, color=mlred, linewidth=2)
+
+        for x1, x2 in zip(x1_neg, x2_neg):
+            if w1 * x1 + w2 * x2 + b >= 0:  # Should be negative
+                points.ring(x1, x2, size=200, color=mlred, linewidth=2)
 
     # Title and labels
     ax.set_title(title, fontsize=12, fontweight='bold',
@@ -5,7 +5,8 @@ Module 2: Multi-Layer Perceptrons
 
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.patches import FancyBboxPatch, Circle, Rectangle
+
+from chart_helpers.network import connect, neurons
 
 CHART_METADATA = {
     'title': 'Finance MLP Architecture',
@@ -39,10 +40,9 @@ input_features = [
 ]
 
 input_x = 1.5
-for i, (feature, desc) in enumerate(input_features):
-    y = 8 - i * 1.2
-    circle = Circle((input_x, y), 0.4, fill=True, facecolor='#E6E6FA', edgecolor=mlblue, linewidth=2)
-    ax.add_patch(circle)
+input_nodes = [(input_x, 8 - i * 1.2) for i in range(len(input_features))]
+neurons(ax, input_nodes, radius=0.4, facecolor='#E6E6FA', edgecolor=mlblue, linewidth=2)
+for (feature, desc), (_, y) in zip(input_features, input_nodes):
     ax.text(input_x - 1.2, y, f'{feature}', ha='right', va='center', fontsize=9, color=mlblue)
     ax.text(input_x - 1.2, y - 0.3, f'({desc})', ha='right', va='center', fontsize=7, color=mlgray)
 
@@ -52,10 +52,8 @@ ax.text(input_x, 8.5, '(Financial Features)', ha='center', fontsize=9, color=mlg
 # ==================== HIDDEN LAYER 1 ====================
 hidden1_x = 5
 hidden1_neurons = 8
-for i in range(hidden1_neurons):
-    y = 8.5 - i * 0.9
-    circle = Circle((hidden1_x, y), 0.35, fill=True, facecolor='#FFE4B5', edgecolor=mlorange, linewidth=2)
-    ax.add_patch(circle)
+hidden1_nodes = [(hidden1_x, 8.5 - i * 0.9) for i in range(hidden1_neurons)]
+neurons(ax, hidden1_nodes, radius=0.35, facecolor='#FFE4B5', edgecolor=mlorange, linewidth=2)
 
 ax.text(hidden1_x, 9, 'Hidden 1', ha='center', fontsize=11, fontweight='bold', color=mlorange)
 ax.text(hidden1_x, 8.5, '(8 neurons, ReLU)', ha='center', fontsize=9, color=mlgray)
@@ -63,18 +61,16 @@ ax.text(hidden1_x, 8.5, '(8 neurons, ReLU)', ha='center', fontsize=9, color=mlgr
 # ==================== HIDDEN LAYER 2 ====================
 hidden2_x = 8.5
 hidden2_neurons = 4
-for i in range(hidden2_neurons):
-    y = 6.5 - i * 1.3
-    circle = Circle((hidden2_x, y), 0.35, fill=True, facecolor='#D8BFD8', edgecolor=mlpurple, linewidth=2)
-    ax.add_patch(circle)
+hidden2_nodes = [(hidden2_x, 6.5 - i * 1.3) for i in range(hidden2_neurons)]
+neurons(ax, hidden2_nodes, radius=0.35, facecolor='#D8BFD8', edgecolor=mlpurple, linewidth=2)
 
 ax.text(hidden2_x, 9, 'Hidden 2', ha='center', fontsize=11, fontweight='bold', color=mlpurple)
 ax.text(hidden2_x, 8.5, '(4 neurons, ReLU)', ha='center', fontsize=9, color=mlgray)
 
 # ==================== OUTPUT LAYER ====================
 output_x = 12
-circle = Circle((output_x, 5), 0.5, fill=True, facecolor='#E6FFE6', edgecolor=mlgreen, linewidth=3)
-ax.add_patch(circle)
+output_nodes = [(output_x, 5)]
+neurons(ax, output_nodes, radius=0.5, facecolor='#E6FFE6', edgecolor=mlgreen, linewidth=3)
 ax.text(output_x, 5, '$\\hat{r}$', ha='center', va='center', fontsize=12, fontweight='bold')
 
 ax.text(output_x, 9, 'Output', ha='center', fontsize=11, fontweight='bold', color=mlgreen)
@@ -83,26 +79,13 @@ ax.text(output_x + 1.3, 5, 'Linear\nactivation', ha='left', va='center', fontsiz
 
 # ==================== CONNECTIONS ====================
 # Input to Hidden1
-for i in range(6):
-    y_in = 8 - i * 1.2
-    for j in range(8):
-        y_h1 = 8.5 - j * 0.9
-        ax.plot([input_x + 0.4, hidden1_x - 0.35], [y_in, y_h1],
-                color=mlgray, linewidth=0.3, alpha=0.3)
+connect(ax, input_nodes, hidden1_nodes, inset=(0.4, 0.35), color=mlgray, linewidth=0.3, alpha=0.3)
 
 # Hidden1 to Hidden2
-for i in range(8):
-    y_h1 = 8.5 - i * 0.9
-    for j in range(4):
-        y_h2 = 6.5 - j * 1.3
-        ax.plot([hidden1_x + 0.35, hidden2_x - 0.35], [y_h1, y_h2],
-                color=mlgray, linewidth=0.5, alpha=0.4)
+connect(ax, hidden1_nodes, hidden2_nodes, inset=0.35, color=mlgray, linewidth=0.5, alpha=0.4)
 
 # Hidden2 to Output
-for i in range(4):
-    y_h2 = 6.5 - i * 1.3
-    ax.plot([hidden2_x + 0.35, output_x - 0.5], [y_h2, 5],
-            color=mlgray, linewidth=0.8, alpha=0.5)
+connect(ax, hidden2_nodes, output_nodes, inset=(0.35, 0.5), color=mlgray, linewidth=0.8, alpha=0.5)
 
 # ==================== INFO BOX ====================
 info_text = """Architecture Summary:
@@ -4,10 +4,10 @@ Module 2: Stacking Layers
 """
 
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import Circle, FancyBboxPatch
 import numpy as np
 
+from chart_helpers.network import connect, neurons
+
 CHART_METADATA = {
     'title': 'MLP Architecture 2 3 1',
     'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/mlp_architecture_2_3_1'
@@ -40,43 +40,36 @@ output_x = 12
 input_y = [5.5, 3.5]
 hidden_y = [6.5, 4.5, 2.5]
 output_y = [4.5]
+input_nodes = [(input_x, y) for y in input_y]
+hidden_nodes = [(hidden_x, y) for y in hidden_y]
+output_nodes = [(output_x, y) for y in output_y]
 
 # Draw connections first (so they're behind nodes)
 # Input to Hidden
-for iy in input_y:
-    for hy in hidden_y:
-        ax.plot([input_x + 0.5, hidden_x - 0.5], [iy, hy], color=mlblue, linewidth=1, alpha=0.6)
+connect(ax, input_nodes, hidden_nodes, inset=0.5, color=mlblue, linewidth=1, alpha=0.6)
 
 # Hidden to Output
-for hy in hidden_y:
-    for oy in output_y:
-        ax.plot([hidden_x + 0.5, output_x - 0.5], [hy, oy], color=mlorange, linewidth=1, alpha=0.6)
+connect(ax, hidden_nodes, output_nodes, inset=0.5, color=mlorange, linewidth=1, alpha=0.6)
 
 # Draw input layer
+neurons(ax, input_nodes, radius=0.5, facecolor='#E6E6FA', edgecolor=mlblue, linewidth=2)
 for i, y in enumerate(input_y):
-    circle = Circle((input_x, y), 0.5, fill=True, facecolor='#E6E6FA',
-                    edgecolor=mlblue, linewidth=2)
-    ax.add_patch(circle)
     ax.text(input_x, y, f'$x_{i+1}$', ha='center', va='center', fontsize=14, fontweight='bold')
 
 ax.text(input_x, 1.5, 'Input Layer', ha='center', fontsize=12, fontweight='bold', color=mlblue)
 ax.text(input_x, 0.8, '(2 neurons)', ha='center', fontsize=10, color=mlgray)
 
 # Draw hidden layer
+neurons(ax, hidden_nodes, radius=0.5, facecolor=mllavender, edgecolor=mlpurple, linewidth=2)
 for i, y in enumerate(hidden_y):
-    circle = Circle((hidden_x, y), 0.5, fill=True, facecolor=mllavender,
-                    edgecolor=mlpurple, linewidth=2)
-    ax.add_patch(circle)
     ax.text(hidden_x, y, f'$h_{i+1}$', ha='center', va='center', fontsize=14, fontweight='bold')
 
 ax.text(hidden_x, 1.5, 'Hidden Layer', ha='center', fontsize=12, fontweight='bold', color=mlpurple)
 ax.text(hidden_x, 0.8, '(3 neurons)', ha='center', fontsize=10, color=mlgray)
 
 # Draw output layer
+neurons(ax, output_nodes, radius=0.5, facecolor='#FFE4B5', edgecolor=mlorange, linewidth=2)
 for i, y in enumerate(output_y):
-    circle = Circle((output_x, y), 0.5, fill=True, facecolor='#FFE4B5',
-                    edgecolor=mlorange, linewidth=2)
-    ax.add_patch(circle)
     ax.text(output_x, y, '$y$', ha='center', va='center', fontsize=14, fontweight='bold')
 
 ax.text(output_x, 1.5, 'Output Layer', ha='center', fontsize=12, fontweight='bold', color=mlorange)
@@ -6,6 +6,8 @@ Module 2: Multi-Layer Perceptrons
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.batching import PointBatch
+
 CHART_METADATA = {
     'title': 'MSE Visualization',
     'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/mse_visualization'
@@ -33,9 +35,10 @@ ax.scatter(x, y_true, c=mlblue, s=80, label='True values $y_i$', zorder=5)
 ax.plot(x, y_pred, color=mlpurple, linewidth=2, label='Predictions $\\hat{y}_i$')
 
 # Draw error bars
-for xi, yi, ypi in zip(x[::3], y_true[::3], y_pred[::3]):
-    ax.plot([xi, xi], [yi, ypi], color=mlred, linewidth=2, alpha=0.7)
-    ax.scatter([xi], [(yi + ypi)/2], marker='s', c=mlred, s=30, alpha=0.5)
+with PointBatch(ax) as points:
+    for xi, yi, ypi in zip(x[::3], y_true[::3], y_pred[::3]):
+        ax.plot([xi, xi], [yi, ypi], color=mlred, linewidth=2, alpha=0.7)
+        points.point(xi, (yi + ypi)/2, marker='s', color=mlred, s=30, alpha=0.5)
 
 ax.set_xlabel('$x$', fontsize=11)
 ax.set_ylabel('$y$', fontsize=11)
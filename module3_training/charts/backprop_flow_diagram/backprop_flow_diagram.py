@@ -7,6 +7,8 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 
+from chart_helpers.network import neurons
+
 # Color palette
 mlpurple = '#3333B2'
 mlblue = '#0066CC'
@@ -25,9 +27,9 @@ layer_positions = [1.5, 4, 6.5, 9, 10.5]
 layer_names = ['Input\n$x$', 'Hidden 1\n$h_1$', 'Hidden 2\n$h_2$', 'Output\n$\\hat{y}$', 'Loss\n$L$']
 layer_colors = [mlblue, mlpurple, mlpurple, mlgreen, mlred]
 
+neurons(ax, [(pos, 3) for pos in layer_positions], radius=0.6,
+        facecolor=layer_colors, edgecolor=layer_colors, alpha=0.7)
 for i, (pos, name, color) in enumerate(zip(layer_positions, layer_names, layer_colors)):
-    circle = plt.Circle((pos, 3), 0.6, color=color, alpha=0.7)
-    ax.add_patch(circle)
     ax.text(pos, 3, name, ha='center', va='center', fontsize=9, color='white', fontweight='bold')
 
 # Forward pass arrows (top)
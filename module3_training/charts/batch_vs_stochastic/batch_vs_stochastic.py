@@ -6,6 +6,8 @@ Module 3: Training Neural Networks
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.surfaces import contour, contourf, surface
+
 CHART_METADATA = {
     'title': 'Batch Vs Stochastic',
     'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/batch_vs_stochastic'
@@ -25,14 +27,11 @@ np.random.seed(42)
 # ==================== LEFT: Full Batch GD ====================
 ax = axes[0]
 
-# Contour plot
-x = np.linspace(-2, 2, 100)
-y = np.linspace(-2, 2, 100)
-X, Y = np.meshgrid(x, y)
-Z = X**2 + Y**2
+# Contour plot (same bowl in every panel)
+bowl = surface('quadratic', (-2, 2), (-2, 2))
 
-ax.contour(X, Y, Z, levels=15, colors=mlgray, alpha=0.5)
-ax.contourf(X, Y, Z, levels=15, cmap='Blues', alpha=0.3)
+contour(ax, bowl, levels=15, colors=mlgray, alpha=0.5)
+contourf(ax, bowl, levels=15, cmap='Blues', alpha=0.3)
 
 # Smooth path
 path_x = [1.8]
@@ -55,8 +54,8 @@ ax.text(0, -1.7, 'Smooth but slow\n(uses ALL data)', fontsize=9, ha='center', co
 # ==================== MIDDLE: Mini-Batch GD ====================
 ax = axes[1]
 
-ax.contour(X, Y, Z, levels=15, colors=mlgray, alpha=0.5)
-ax.contourf(X, Y, Z, levels=15, cmap='Oranges', alpha=0.3)
+contour(ax, bowl, levels=15, colors=mlgray, alpha=0.5)
+contourf(ax, bowl, levels=15, cmap='Oranges', alpha=0.3)
 
 # Slightly noisy path
 path_x = [1.8]
@@ -79,8 +78,8 @@ ax.text(0, -1.7, 'Best of both worlds\n(batch size 32-256)', fontsize=9, ha='cen
 # ==================== RIGHT: Stochastic GD ====================
 ax = axes[2]
 
-ax.contour(X, Y, Z, levels=15, colors=mlgray, alpha=0.5)
-ax.contourf(X, Y, Z, levels=15, cmap='Greens', alpha=0.3)
+contour(ax, bowl, levels=15, colors=mlgray, alpha=0.5)
+contourf(ax, bowl, levels=15, cmap='Greens', alpha=0.3)
 
 # Very noisy path
 path_x = [1.8]
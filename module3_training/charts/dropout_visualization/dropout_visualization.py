@@ -5,7 +5,8 @@ Module 3: Training Neural Networks
 
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.patches import Circle, FancyBboxPatch
+
+from chart_helpers.network import draw_network as draw_layers, layer_positions
 
 CHART_METADATA = {
     'title': 'Dropout Visualization',
@@ -35,55 +36,30 @@ def draw_network(ax, title, dropout_mask=None, color=mlpurple):
     ax.axis('off')
     ax.set_title(title, fontsize=11, fontweight='bold', color=color)
 
-    neurons = {}
-    for l, (x, n) in enumerate(zip(layer_x, layer_sizes)):
-        start_y = 5 + (n - 1) * 0.7 / 2
-        for i in range(n):
-            y = start_y - i * 0.7
-            neurons[(l, i)] = (x, y)
-
-            # Check if dropped
-            dropped = False
-            if dropout_mask is not None and l > 0 and l < len(layer_sizes) - 1:
-                dropped = dropout_mask[l - 1][i] if i < len(dropout_mask[l - 1]) else False
-
-            if dropped:
-                # Dropped neuron
-                circle = Circle((x, y), 0.25, fill=True,
-                               facecolor='white', edgecolor=mlgray, linewidth=1, linestyle='--', alpha=0.3)
-                ax.add_patch(circle)
+    layers = layer_positions(layer_sizes, layer_x, center=5, spacing=0.7)
+
+    # Dropout applies to the hidden layers only
+    active = [None] * len(layer_sizes)
+    if dropout_mask is not None:
+        for l in range(1, len(layer_sizes) - 1):
+            active[l] = ~np.array(dropout_mask[l - 1][:layer_sizes[l]], dtype=bool)
+
+    neuron_colors = [mlblue, mlorange, mlorange, mlgreen]
+    draw_layers(ax, layers, radius=0.25, active=active,
+                neuron_style=[{'facecolor': f'{c}44', 'edgecolor': c, 'linewidth': 2}
+                              for c in neuron_colors],
+                edge_style={'color': mlgray, 'linewidth': 0.5, 'alpha': 0.5},
+                dropped_neuron_style={'facecolor': 'white', 'edgecolor': mlgray, 'linewidth': 1,
+                                      'linestyle': '--', 'alpha': 0.3},
+                dropped_edge_style={'color': mlgray, 'linewidth': 0.3, 'alpha': 0.2,
+                                    'linestyle': '--'})
+
+    for l, mask in enumerate(active):
+        if mask is not None:
+            for x, y in layers[l][~mask]:
                 ax.text(x, y, 'X', ha='center', va='center', fontsize=8, color=mlgray)
-            else:
-                # Active neuron
-                facecolor = [mlblue, mlorange, mlorange, mlgreen][l]
-                circle = Circle((x, y), 0.25, fill=True,
-                               facecolor=f'{facecolor}44', edgecolor=facecolor, linewidth=2)
-                ax.add_patch(circle)
-
-    # Draw connections
-    for l in range(len(layer_sizes) - 1):
-        for i in range(layer_sizes[l]):
-            for j in range(layer_sizes[l + 1]):
-                x1, y1 = neurons[(l, i)]
-                x2, y2 = neurons[(l + 1, j)]
-
-                # Check if either neuron is dropped
-                dropped1 = False
-                dropped2 = False
-                if dropout_mask is not None:
-                    if l > 0 and l < len(layer_sizes) - 1:
-                        dropped1 = dropout_mask[l - 1][i] if i < len(dropout_mask[l - 1]) else False
-                    if l + 1 > 0 and l + 1 < len(layer_sizes) - 1:
-                        dropped2 = dropout_mask[l][j] if j < len(dropout_mask[l]) else False
-
-                if dropped1 or dropped2:
-                    ax.plot([x1 + 0.25, x2 - 0.25], [y1, y2], color=mlgray,
-                           linewidth=0.3, alpha=0.2, linestyle='--')
-                else:
-                    ax.plot([x1 + 0.25, x2 - 0.25], [y1, y2], color=mlgray,
-                           linewidth=0.5, alpha=0.5)
-
-    return neurons
+
+    return layers
 
 # ==================== LEFT: Full Network (No Dropout) ====================
 draw_network(axes[0], 'Full Network (Inference)', None, mlblue)
@@ -6,6 +6,8 @@ Module 3: Learning from Mistakes
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.surfaces import contour, contourf, surface
+
 CHART_METADATA = {
     'title': 'Gradient Descent Contour',
     'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/gradient_descent_contour'
@@ -22,17 +24,12 @@ mlgray = '#7F7F7F'
 # Set up figure
 fig, ax = plt.subplots(figsize=(10, 8))
 
-# Create loss surface (quadratic bowl)
-w1 = np.linspace(-3, 3, 100)
-w2 = np.linspace(-3, 3, 100)
-W1, W2 = np.meshgrid(w1, w2)
-
-# Loss function: elongated bowl
-L = 0.5 * W1**2 + 2 * W2**2
+# Loss surface: elongated bowl L = 0.5*w1^2 + 2*w2^2
+bowl = surface('quadratic', (-3, 3), (-3, 3), a=0.5, b=2.0)
 
 # Contour plot
-contours = ax.contour(W1, W2, L, levels=15, colors=mlgray, linewidths=0.5)
-contourf = ax.contourf(W1, W2, L, levels=15, cmap='Blues', alpha=0.3)
+contours = contour(ax, bowl, levels=15, colors=mlgray, linewidths=0.5)
+filled = contourf(ax, bowl, levels=15, cmap='Blues', alpha=0.3)
 
 # Gradient descent path
 np.random.seed(42)
@@ -81,7 +78,7 @@ ax.set_ylabel('Weight $w_2$', fontsize=12)
 ax.set_title('Gradient Descent: Finding the Minimum', fontsize=14, fontweight='bold', color=mlpurple)
 
 # Add colorbar
-cbar = plt.colorbar(contourf, ax=ax, label='Loss L(w)')
+cbar = plt.colorbar(filled, ax=ax, label='Loss L(w)')
 cbar.ax.set_ylabel('Loss Value', fontsize=10)
 
 # Annotations
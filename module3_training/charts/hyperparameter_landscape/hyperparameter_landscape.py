@@ -6,6 +6,8 @@ Module 3: Training Neural Networks
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.batching import PointBatch
+
 CHART_METADATA = {
     'title': 'Hyperparameter Landscape',
     'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/hyperparameter_landscape'
@@ -51,9 +53,10 @@ ax.set_title('Hyperparameter Landscape', fontsize=11, fontweight='bold', color=m
 # Grid search points
 grid_lr = np.linspace(-3.5, -0.5, 5)
 grid_hidden = np.linspace(1.3, 2.7, 5)
-for l in grid_lr:
-    for h in grid_hidden:
-        ax.scatter([l], [h], c='blue', s=30, marker='s', alpha=0.5)
+with PointBatch(ax) as points:
+    for l in grid_lr:
+        for h in grid_hidden:
+            points.point(l, h, color='blue', s=30, marker='s', alpha=0.5)
 
 ax.text(-3.8, 1.1, 'Grid Search\npoints', fontsize=8, color=mlblue)
 
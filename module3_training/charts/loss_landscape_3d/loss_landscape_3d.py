@@ -7,9 +7,14 @@ import matplotlib.pyplot as plt
 import numpy as np
 from mpl_toolkits.mplot3d import Axes3D
 
+from chart_helpers.surfaces import surface
+
 CHART_METADATA = {
     'title': 'Loss Landscape 3D',
-    'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/loss_landscape_3d'
+    'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/loss_landscape_3d',
+    # One image instead of ~19k surface polygons for PDF viewers (build_tools.rasterize)
+    'rasterize_dpi': 100,
+    'rasterize_if_smaller': False
 }
 
 # Colors
@@ -24,14 +29,10 @@ fig = plt.figure(figsize=(14, 6))
 # ==================== LEFT: Simple Convex Loss ====================
 ax1 = fig.add_subplot(121, projection='3d')
 
-w1 = np.linspace(-3, 3, 50)
-w2 = np.linspace(-3, 3, 50)
-W1, W2 = np.meshgrid(w1, w2)
-
 # Simple convex loss (bowl shape)
-L_convex = W1**2 + W2**2
+convex = surface('quadratic', (-3, 3), (-3, 3), n=50)
 
-surf1 = ax1.plot_surface(W1, W2, L_convex, cmap='coolwarm', alpha=0.8, edgecolor='none')
+surf1 = ax1.plot_surface(convex.X, convex.Y, convex.Z, cmap='coolwarm', alpha=0.8, edgecolor='none')
 
 # Mark global minimum
 ax1.scatter([0], [0], [0], c=mlgreen, s=100, marker='*', zorder=10, label='Global minimum')
@@ -46,10 +47,10 @@ ax1.view_init(elev=30, azim=45)
 ax2 = fig.add_subplot(122, projection='3d')
 
 # Non-convex loss (multiple minima)
-L_nonconvex = (np.sin(W1 * 2) * np.sin(W2 * 2) + 0.1 * (W1**2 + W2**2) +
-               0.5 * np.exp(-((W1-1)**2 + (W2-1)**2)))
+nonconvex = surface('multimodal', (-3, 3), (-3, 3), n=50)
 
-surf2 = ax2.plot_surface(W1, W2, L_nonconvex, cmap='coolwarm', alpha=0.8, edgecolor='none')
+surf2 = ax2.plot_surface(nonconvex.X, nonconvex.Y, nonconvex.Z, cmap='coolwarm', alpha=0.8,
+                         edgecolor='none')
 
 # Mark local minima
 local_mins = [(-1.5, -1.5), (0, 0), (1.5, 1.5)]
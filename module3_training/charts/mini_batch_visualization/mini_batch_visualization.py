@@ -6,6 +6,8 @@ CHART_METADATA = {
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.surfaces import contour, surface
+
 # Color palette
 mlpurple = '#3333B2'
 mlblue = '#0066CC'
@@ -19,14 +21,11 @@ fig, axes = plt.subplots(1, 3, figsize=(12, 4))
 np.random.seed(42)
 
 # Create contour for loss landscape
-x = np.linspace(-3, 3, 100)
-y = np.linspace(-3, 3, 100)
-X, Y = np.meshgrid(x, y)
-Z = (X**2 + Y**2) + 0.5 * np.sin(3*X) * np.cos(3*Y)
+landscape = surface('rippled_bowl', (-3, 3), (-3, 3))
 
 # Batch Gradient Descent
 ax1 = axes[0]
-ax1.contour(X, Y, Z, levels=15, colors=mlgray, alpha=0.5)
+contour(ax1, landscape, levels=15, colors=mlgray, alpha=0.5)
 path_x = np.linspace(2.5, 0, 20)
 path_y = 2.5 * np.exp(-0.15 * np.arange(20))
 ax1.plot(path_x, path_y, 'o-', color=mlblue, markersize=4, lw=2)
@@ -38,7 +37,7 @@ ax1.text(0, -2.5, 'Smooth, slow', ha='center', fontsize=9, color=mlblue)
 
 # Mini-batch Gradient Descent
 ax2 = axes[1]
-ax2.contour(X, Y, Z, levels=15, colors=mlgray, alpha=0.5)
+contour(ax2, landscape, levels=15, colors=mlgray, alpha=0.5)
 path_x = [2.5]
 path_y = [2.5]
 for i in range(25):
@@ -52,7 +51,7 @@ ax2.text(0, -2.5, 'Good balance', ha='center', fontsize=9, color=mlgreen)
 
 # Stochastic Gradient Descent
 ax3 = axes[2]
-ax3.contour(X, Y, Z, levels=15, colors=mlgray, alpha=0.5)
+contour(ax3, landscape, levels=15, colors=mlgray, alpha=0.5)
 path_x = [2.5]
 path_y = [2.5]
 for i in range(40):
@@ -6,6 +6,8 @@ Module 3: Training Neural Networks
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.surfaces import contour, contourf, surface
+
 CHART_METADATA = {
     'title': 'Momentum Visualization',
     'url': 'https://github.com/QuantLet/neural-networks-introduction/tree/main/momentum_visualization'
@@ -23,16 +25,13 @@ fig, axes = plt.subplots(1, 2, figsize=(14, 6))
 np.random.seed(42)
 
 # Create elongated loss surface
-x = np.linspace(-3, 3, 100)
-y = np.linspace(-1.5, 1.5, 100)
-X, Y = np.meshgrid(x, y)
-Z = 0.5 * X**2 + 5 * Y**2  # Elongated valley
+valley = surface('quadratic', (-3, 3), (-1.5, 1.5), a=0.5, b=5.0)  # Elongated valley
 
 # ==================== LEFT: Without Momentum ====================
 ax = axes[0]
 
-ax.contour(X, Y, Z, levels=20, colors=mlgray, alpha=0.5)
-ax.contourf(X, Y, Z, levels=20, cmap='Blues', alpha=0.3)
+contour(ax, valley, levels=20, colors=mlgray, alpha=0.5)
+contourf(ax, valley, levels=20, cmap='Blues', alpha=0.3)
 
 # Path without momentum (oscillates in narrow dimension)
 path_x = [-2.5]
@@ -60,8 +59,8 @@ ax.text(0, -1.3, 'Oscillates in steep direction\nSlow progress in flat direction
 # ==================== RIGHT: With Momentum ====================
 ax = axes[1]
 
-ax.contour(X, Y, Z, levels=20, colors=mlgray, alpha=0.5)
-ax.contourf(X, Y, Z, levels=20, cmap='Oranges', alpha=0.3)
+contour(ax, valley, levels=20, colors=mlgray, alpha=0.5)
+contourf(ax, valley, levels=20, cmap='Oranges', alpha=0.3)
 
 # Path with momentum (smoother, faster)
 path_x = [-2.5]
@@ -6,6 +6,8 @@ CHART_METADATA = {
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.network import draw_network
+
 mlpurple = '#3333B2'
 mlblue = '#0066CC'
 mlorange = '#FF7F0E'
@@ -23,17 +25,12 @@ ax1.axis('off')
 
 layers = [[2, 4, 6], [2, 4, 6], [2, 4, 6], [4]]
 x_pos = [1.5, 4, 6.5, 9]
+positions = [np.column_stack([np.full(len(layer), x), layer]) for x, layer in zip(x_pos, layers)]
 
-for i, (x, layer) in enumerate(zip(x_pos, layers)):
-    for y in layer:
-        circle = plt.Circle((x, y), 0.3, color=mlblue, alpha=0.8)
-        ax1.add_patch(circle)
-
-# Draw all connections
-for i in range(len(x_pos)-1):
-    for y1 in layers[i]:
-        for y2 in layers[i+1]:
-            ax1.plot([x_pos[i]+0.3, x_pos[i+1]-0.3], [y1, y2], 'k-', alpha=0.3, lw=1)
+# All neurons and connections
+draw_network(ax1, positions, radius=0.3,
+             neuron_style={'facecolor': mlblue, 'edgecolor': mlblue, 'alpha': 0.8},
+             edge_style={'color': 'k', 'alpha': 0.3, 'linewidth': 1})
 
 ax1.set_title('Standard Network\n(All connections active)', fontsize=11, fontweight='bold')
 
@@ -46,22 +43,16 @@ ax2.axis('off')
 np.random.seed(42)
 dropout_mask = [[True, True, False], [False, True, True], [True, False, True], [True]]
 
-for i, (x, layer, mask) in enumerate(zip(x_pos, layers, dropout_mask)):
-    for y, active in zip(layer, mask):
-        if active:
-            circle = plt.Circle((x, y), 0.3, color=mlgreen, alpha=0.8)
-        else:
-            circle = plt.Circle((x, y), 0.3, color=mlred, alpha=0.3)
-            ax2.plot([x-0.2, x+0.2], [y-0.2, y+0.2], 'r-', lw=2)
-            ax2.plot([x-0.2, x+0.2], [y+0.2, y-0.2], 'r-', lw=2)
-        ax2.add_patch(circle)
+# Only connections between active neurons are drawn
+draw_network(ax2, positions, radius=0.3, active=dropout_mask,
+             neuron_style={'facecolor': mlgreen, 'edgecolor': mlgreen, 'alpha': 0.8},
+             edge_style={'color': 'g', 'alpha': 0.5, 'linewidth': 1},
+             dropped_neuron_style={'facecolor': mlred, 'edgecolor': mlred, 'alpha': 0.3})
 
-# Draw only active connections
-for i in range(len(x_pos)-1):
-    for j, y1 in enumerate(layers[i]):
-        for k, y2 in enumerate(layers[i+1]):
-            if dropout_mask[i][j] and dropout_mask[i+1][k]:
-                ax2.plot([x_pos[i]+0.3, x_pos[i+1]-0.3], [y1, y2], 'g-', alpha=0.5, lw=1)
+for layer, mask in zip(positions, dropout_mask):
+    for x, y in layer[~np.array(mask)]:
+        ax2.plot([x-0.2, x+0.2], [y-0.2, y+0.2], 'r-', lw=2)
+        ax2.plot([x-0.2, x+0.2], [y+0.2, y-0.2], 'r-', lw=2)
 
 ax2.set_title('With Dropout (p=0.3)\n(Random neurons disabled)', fontsize=11, fontweight='bold')
 
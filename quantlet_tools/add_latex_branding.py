@@ -16,11 +16,19 @@ Examples:
 """
 import re
 import ast
+import sys
 import shutil
 import argparse
 from pathlib import Path
 from datetime import datetime
 
+try:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from build_tools.trace import traced
+except ImportError:
+    def traced(name=None, cat='stage'):
+        return lambda func: func
+
 
 def get_repo_name():
     """Get repository name from current directory."""
@@ -126,6 +134,7 @@ def add_branding_to_frame(frame_content, chart_folder, chart_url, logo_path):
     return new_content
 
 
+@traced('add_latex_branding')
 def main():
     """Main execution."""
     parser = argparse.ArgumentParser(description='Add Quantlet branding to LaTeX slides')
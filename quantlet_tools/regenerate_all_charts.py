@@ -3,24 +3,58 @@ Regenerate all chart PDFs without embedded branding.
 
 This script runs each chart Python script to create clean PDFs
 that will receive branding at the LaTeX level instead.
+
+Charts whose inputs are unchanged since their last successful build are
+skipped when the project's build_tools package is available (use --force
+to rebuild everything). Each chart then also gets the time budget learned
+from its previous builds, and a chart that times out is killed together with
+any processes it started.
 """
 import subprocess
+import sys
+import time
 from pathlib import Path
 
+try:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from build_tools.cache import ChartCache, find_outputs
+    from build_tools.runner import chart_env
+    from build_tools.timeouts import ChartTimings, run_command
+except ImportError:
+    ChartCache = None
+    ChartTimings = None
+    chart_env = lambda: None
+
+DEFAULT_TIMEOUT = 30
 
-def regenerate_chart(py_file):
+
+def regenerate_chart(py_file, cache=None, timings=None):
     """Regenerate a single chart PDF."""
     folder_name = py_file.parent.name
+
+    if cache is not None and cache.is_fresh(py_file):
+        print(f"  Unchanged: {folder_name}/{py_file.name} (cached)")
+        return True
+
     print(f"  Regenerating: {folder_name}/{py_file.name}")
+    started_at = time.time()
+    timeout = timings.budget(py_file) if timings is not None else DEFAULT_TIMEOUT
 
     try:
-        result = subprocess.run(
-            ['python', py_file.name],
-            cwd=py_file.parent,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        if timings is not None:
+            result = run_command(['python', py_file.name], py_file.parent, timeout, chart_env())
+        else:
+            result = subprocess.run(
+                ['python', py_file.name],
+                cwd=py_file.parent,
+                env=chart_env(),
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+
+        if result.returncode == 0 and timings is not None:
+            timings.record(py_file, time.time() - started_at)
 
         if result.returncode == 0:
             # Check if PDF was created
@@ -31,11 +65,15 @@ def regenerate_chart(py_file):
                 pdf_files = list(py_file.parent.glob('*.pdf'))
                 if pdf_files:
                     print(f"    -> Success! ({pdf_files[0].name})")
+                    if cache is not None:
+                        cache.record(py_file, find_outputs(py_file.parent, since=started_at - 1))
                     return True
                 else:
                     print(f"    -> WARNING: No PDF found")
                     return False
             print(f"    -> Success! ({pdf_name})")
+            if cache is not None:
+                cache.record(py_file, find_outputs(py_file.parent, since=started_at - 1))
             return True
         else:
             error_msg = result.stderr[:200] if result.stderr else result.stdout[:200]
@@ -43,7 +81,7 @@ def regenerate_chart(py_file):
             return False
 
     except subprocess.TimeoutExpired:
-        print(f"    -> ERROR: Timeout (>30s)")
+        print(f"    -> ERROR: Timeout (>{timeout:.0f}s)")
         return False
     except Exception as e:
         print(f"    -> ERROR: {e}")
@@ -54,6 +92,11 @@ def main():
     """Main execution."""
     print("Regenerating all chart PDFs without embedded branding...\n")
 
+    cache = ChartCache() if ChartCache is not None else None
+    timings = ChartTimings() if ChartTimings is not None else None
+    if cache is not None and '--force' in sys.argv:
+        cache.entries.clear()
+
     # Find all chart folders
     chart_folders = sorted([f for f in Path('.').iterdir()
                            if f.is_dir() and f.name[0:2].isdigit()])
@@ -72,7 +115,7 @@ def main():
     for folder in chart_folders:
         py_files = list(folder.glob('*.py'))
         if py_files:
-            if regenerate_chart(py_files[0]):
+            if regenerate_chart(py_files[0], cache, timings):
                 success_count += 1
             else:
                 failed_charts.append(folder.name)
@@ -80,6 +123,11 @@ def main():
             print(f"  WARNING: No Python file in {folder.name}")
         print()
 
+    if cache is not None:
+        cache.save()
+    if timings is not None:
+        timings.save()
+
     print("="*78)
     print(f"COMPLETE: Regenerated {success_count}/{len(chart_folders)} charts")
 
@@ -5,12 +5,23 @@ This script removes the add_quantlet_branding() calls and related imports
 from all chart Python files, preparing them for LaTeX-level branding.
 
 Keeps CHART_METADATA intact as it's needed for URL extraction.
+
+Originals are backed up into the shared artifact store (deduplicated,
+restorable with `python -m build_tools.store restore ID`) when the project's
+build_tools package is available, else into previous/.
 """
 import re
 import shutil
+import sys
 from pathlib import Path
 from datetime import datetime
 
+try:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from build_tools.store import ArtifactStore
+except ImportError:
+    ArtifactStore = None
+
 
 def remove_branding_from_chart(py_file):
     """Remove branding code block from a chart Python file."""
@@ -27,10 +38,15 @@ def remove_branding_from_chart(py_file):
         return False
 
     # Backup original
-    backup_path = Path('previous') / f"{folder_name}_{py_file.name}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    backup_path.parent.mkdir(exist_ok=True)
-    shutil.copy2(py_file, backup_path)
-    print(f"    -> Backup: {backup_path.name}")
+    if ArtifactStore is not None:
+        with ArtifactStore() as store:
+            digest = store.archive(py_file, 'backup', remove=False)
+        print(f"    -> Backup: artifact store ({digest[:10]})")
+    else:
+        backup_path = Path('previous') / f"{folder_name}_{py_file.name}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        backup_path.parent.mkdir(exist_ok=True)
+        shutil.copy2(py_file, backup_path)
+        print(f"    -> Backup: {backup_path.name}")
 
     # Pattern to match the entire branding block
     # Matches from the comment line through add_quantlet_branding call
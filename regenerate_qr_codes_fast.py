@@ -3,28 +3,15 @@ Fast QR code regeneration - reads URLs from CHART_METADATA without executing scr
 """
 
 import qrcode
-import re
 from pathlib import Path
 
-def extract_url_from_script(py_file):
-    """Extract URL from CHART_METADATA without executing the script."""
-    content = py_file.read_text(encoding='utf-8')
-
-    # Look for: 'url': 'https://...'
-    match = re.search(r"'url'\s*:\s*'([^']+)'", content)
-    if match:
-        return match.group(1)
-    return None
+from build_tools.registry import MODULES, load_index
+from build_tools.trace import traced
 
+@traced('regenerate_qr_codes_fast')
 def main():
     project_root = Path(__file__).parent
-
-    modules = [
-        'module1_perceptron',
-        'module2_mlp',
-        'module3_training',
-        'module4_applications',
-    ]
+    index = load_index(project_root)
 
     generated = 0
     skipped = 0
@@ -32,24 +19,22 @@ def main():
     print("Regenerating QR codes (fast mode)")
     print("=" * 60)
 
-    for module in modules:
-        charts_dir = project_root / module / 'charts'
-        if not charts_dir.exists():
+    for module in MODULES:
+        charts = index.charts(groups=[module])
+        if not charts:
             continue
 
         print(f"\n--- {module} ---")
 
-        for chart_dir in sorted(charts_dir.iterdir()):
-            if not chart_dir.is_dir():
-                continue
+        for chart in charts:
+            chart_dir = chart.dir
 
-            # Find Python script
-            py_files = list(chart_dir.glob('*.py'))
-            if not py_files:
+            # CHART_METADATA comes from the chart index (no script execution)
+            if chart.script is None:
                 skipped += 1
                 continue
 
-            url = extract_url_from_script(py_files[0])
+            url = chart.metadata.get('url')
             if not url:
                 print(f"  [SKIP] {chart_dir.name}: No URL found")
                 skipped += 1
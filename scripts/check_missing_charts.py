@@ -1,29 +1,26 @@
 # Check which chart PDFs are missing and generate a report.
-# Run from: D:/Joerg/Research/slides/NeuralNetworks3
+# Run from anywhere inside the project (uses the shared chart index).
 
-import os
+import sys
 from pathlib import Path
 
-base_dir = Path("D:/Joerg/Research/slides/NeuralNetworks3")
-modules = ["module1_perceptron", "module2_mlp", "module3_training",
-           "module4_applications", "appendix"]
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from build_tools.registry import MODULES, load_index
+
+base_dir = Path(__file__).resolve().parent.parent
 
 missing = []
 existing = []
 
-for module in modules:
-    charts_dir = base_dir / module / "charts"
-    if not charts_dir.exists():
+index = load_index(base_dir)
+for chart in index.charts(groups=MODULES, with_script=True):
+    if chart.script.name != f"{chart.name}.py":
         continue
-    for chart_folder in sorted(charts_dir.iterdir()):
-        if chart_folder.is_dir():
-            py_file = chart_folder / f"{chart_folder.name}.py"
-            pdf_file = chart_folder / f"{chart_folder.name}.pdf"
-            if py_file.exists():
-                if pdf_file.exists():
-                    existing.append(str(pdf_file))
-                else:
-                    missing.append(str(py_file))
+    pdf_file = chart.output('.pdf')
+    if pdf_file is not None:
+        existing.append(str(pdf_file))
+    else:
+        missing.append(str(chart.script))
 
 print(f"=== Chart Status Report ===")
 print(f"Existing PDFs: {len(existing)}")
@@ -31,7 +28,7 @@ print(f"Missing PDFs: {len(missing)}")
 print(f"\n=== Missing Charts by Module ===")
 
 # Group by module
-for module in modules:
+for module in MODULES:
     module_missing = [m for m in missing if module in m]
     if module_missing:
         print(f"\n{module}: {len(module_missing)} missing")
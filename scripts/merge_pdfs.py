@@ -2,11 +2,20 @@
 Merge all module PDFs into one combined PDF
 """
 
+import sys
 from pathlib import Path
 from PyPDF2 import PdfMerger
 from datetime import datetime
 
+try:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from build_tools.trace import traced
+except ImportError:
+    def traced(name=None, cat='stage'):
+        return lambda func: func
 
+
+@traced('merge_pdfs')
 def merge_pdfs():
     project_root = Path(__file__).parent
 
@@ -5,9 +5,13 @@ Update GitHub URLs and logo opacity for NeuralNetworks3 project.
 """
 
 import re
+import sys
 from pathlib import Path
 
-project_root = Path(__file__).parent
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+from build_tools.registry import MODULES, load_index
+
 NEW_BASE_URL = "https://github.com/QuantLet/neural-networks-introduction/tree/main"
 
 def update_chart_metadata():
@@ -16,26 +20,13 @@ def update_chart_metadata():
     print("Step 1: Updating CHART_METADATA in chart scripts")
     print("=" * 60)
 
-    modules = [
-        'module1_perceptron',
-        'module2_mlp',
-        'module3_training',
-        'module4_applications',
-    ]
-
     updated_count = 0
+    index = load_index(project_root)
 
-    for module in modules:
-        charts_dir = project_root / module / 'charts'
-        if not charts_dir.exists():
-            continue
-
-        for chart_dir in sorted(charts_dir.iterdir()):
-            if not chart_dir.is_dir():
-                continue
-
-            chart_name = chart_dir.name
-            py_files = list(chart_dir.glob('*.py'))
+    for module in MODULES:
+        for chart in index.charts(groups=[module]):
+            chart_name = chart.name
+            py_files = [chart.dir / name for name in chart.files if name.endswith('.py')]
 
             for py_file in py_files:
                 content = py_file.read_text(encoding='utf-8')
@@ -71,14 +62,7 @@ def update_tex_files():
     print("Step 2: Updating .tex files (URLs + opacity)")
     print("=" * 60)
 
-    modules = [
-        'module1_perceptron',
-        'module2_mlp',
-        'module3_training',
-        'module4_applications',
-    ]
-
-    for module in modules:
+    for module in MODULES:
         module_dir = project_root / module
         tex_files = list(module_dir.glob('*0829*.tex'))
 
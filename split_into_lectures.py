@@ -6,10 +6,12 @@ Reads 4 module .tex files and creates 8 lecture files with ~28 slides each.
 
 import re
 import os
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from build_tools.history import RunRecord, record_run
+from build_tools.trace import run, traced
+
 
 # Lecture definitions: (filename, title, [(module, section_name), ...])
 LECTURES = [
@@ -217,6 +219,7 @@ def count_frames(content):
     return len(re.findall(r'\\begin\{frame\}', content))
 
 
+@traced('split_into_lectures')
 def split_into_lectures():
     project_root = get_project_root()
     lectures_dir = project_root / 'lectures'
@@ -263,8 +266,12 @@ def split_into_lectures():
 
         frame_count = count_frames(lecture_content)
 
-        # Write tex file
+        # Write tex file (only if changed, so unchanged lectures keep their
+        # mtime and are not recompiled by the build graph)
         tex_path = lectures_dir / f'{lecture_name}.tex'
+        if tex_path.exists() and tex_path.read_text(encoding='utf-8') == lecture_content:
+            print(f"  [UNCHANGED] {lecture_name}.tex: {frame_count} slides")
+            continue
         tex_path.write_text(lecture_content, encoding='utf-8')
 
         print(f"  [OK] {lecture_name}.tex: {frame_count} slides")
@@ -278,27 +285,33 @@ def split_into_lectures():
     return lectures_dir
 
 
-def compile_lectures(lectures_dir):
-    """Compile all lecture tex files to PDF."""
+@traced('compile_lectures')
+def compile_lectures(lectures_dir, record=None):
+    """Compile all lecture tex files to PDF (timed as history stages in ``record``)."""
     print("\n--- Compiling PDFs ---")
 
     os.chdir(lectures_dir)
+    record = record or RunRecord()
 
     for tex_file in sorted(lectures_dir.glob('*.tex')):
         print(f"  Compiling {tex_file.name}...", end=' ', flush=True)
-        try:
-            result = subprocess.run(
-                ['pdflatex', '-interaction=nonstopmode', tex_file.name],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            if result.returncode == 0:
-                print("[OK]")
-            else:
-                print("[ERROR]")
-        except Exception as e:
-            print(f"[ERROR: {e}]")
+        with record.stage(f"pdf:lectures/{tex_file.stem}",
+                          outputs=[tex_file.with_suffix('.pdf')]) as stage:
+            try:
+                result = run(
+                    ['pdflatex', '-interaction=nonstopmode', tex_file.name],
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                )
+                if result.returncode == 0:
+                    print("[OK]")
+                else:
+                    print("[ERROR]")
+                    stage['ok'] = False
+            except Exception as e:
+                print(f"[ERROR: {e}]")
+                stage['ok'] = False
 
     # Clean up auxiliary files
     for ext in ['aux', 'log', 'nav', 'out', 'snm', 'toc']:
@@ -311,7 +324,10 @@ def compile_lectures(lectures_dir):
 if __name__ == '__main__':
     import sys
 
-    lectures_dir = split_into_lectures()
+    with record_run('lectures', compile='--compile' in sys.argv) as record:
+        with record.stage('split') as stage:
+            lectures_dir = split_into_lectures()
+            stage['outputs'] = sorted(lectures_dir.glob('*.tex'))
 
-    if '--compile' in sys.argv:
-        compile_lectures(lectures_dir)
+        if '--compile' in sys.argv:
+            compile_lectures(lectures_dir, record)
@@ -24,10 +24,11 @@ CHART_METADATA = {
 }
 
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import Circle, FancyArrowPatch
+from matplotlib.patches import FancyArrowPatch
 import numpy as np
 
+from chart_helpers.network import connect, neurons
+
 # Set up the figure
 fig, ax = plt.subplots(1, 1, figsize=(14, 8))
 ax.set_xlim(0, 14)
@@ -53,9 +54,9 @@ input_labels = ['Yesterday\nPrice', 'Trading\nVolume', 'Market\nSentiment', 'Vol
 ax.text(input_x, 9.5, 'INPUT LAYER', fontsize=12, ha='center', fontweight='bold', color='blue')
 ax.text(input_x, 9, '(Market Features)', fontsize=9, ha='center', style='italic', color='blue')
 
+neurons(ax, [(input_x, y_pos) for y_pos in input_y_positions], radius=0.35,
+        facecolor='lightblue', edgecolor='blue', linewidth=2)
 for i, (y_pos, label) in enumerate(zip(input_y_positions, input_labels)):
-    circle = Circle((input_x, y_pos), 0.35, facecolor='lightblue', edgecolor='blue', linewidth=2)
-    ax.add_patch(circle)
     input_neurons.append((input_x, y_pos))
     ax.text(input_x - 1.3, y_pos, label, fontsize=8, ha='right', va='center')
 
@@ -67,27 +68,23 @@ ax.text(hidden_x, 9.5, 'HIDDEN LAYER', fontsize=12, ha='center', fontweight='bol
 ax.text(hidden_x, 9, '(Pattern Detection)', fontsize=9, ha='center', style='italic', color='green')
 
 for i, y_pos in enumerate(hidden_y_positions):
-    circle = Circle((hidden_x, y_pos), 0.35, facecolor='lightgreen', edgecolor='green', linewidth=2)
-    ax.add_patch(circle)
     hidden_neurons.append((hidden_x, y_pos))
+neurons(ax, hidden_neurons, radius=0.35, facecolor='lightgreen', edgecolor='green', linewidth=2)
 
 # Output layer
 output_y = 5
 ax.text(output_x, 9.5, 'OUTPUT LAYER', fontsize=12, ha='center', fontweight='bold', color='darkorange')
 ax.text(output_x, 9, '(Prediction)', fontsize=9, ha='center', style='italic', color='darkorange')
 
-output_circle = Circle((output_x, output_y), 0.4, facecolor='orange', edgecolor='darkorange', linewidth=3)
-ax.add_patch(output_circle)
+neurons(ax, [(output_x, output_y)], radius=0.4, facecolor='orange', edgecolor='darkorange', linewidth=3)
 ax.text(output_x + 1.3, output_y, 'Price\nDirection', fontsize=9, ha='left', va='center', fontweight='bold')
 
 # Draw connections (sample, not all to avoid clutter)
 # Input to Hidden (show a subset)
-for i, (in_x, in_y) in enumerate(input_neurons):
-    for j, (h_x, h_y) in enumerate(hidden_neurons):
-        # Draw all connections but with varying alpha
-        alpha = 0.15 if (i + j) % 3 != 0 else 0.3
-        linewidth = 0.5 if (i + j) % 3 != 0 else 1.5
-        ax.plot([in_x + 0.35, h_x - 0.35], [in_y, h_y], 'gray', alpha=alpha, linewidth=linewidth, zorder=1)
+# Draw all connections but with varying alpha
+faint = np.add.outer(np.arange(n_inputs), np.arange(n_hidden)) % 3 != 0
+connect(ax, input_neurons, hidden_neurons, inset=0.35, color='gray',
+        alpha=np.where(faint, 0.15, 0.3), linewidth=np.where(faint, 0.5, 1.5), zorder=1)
 
 # Highlight a few connections
 ax.plot([input_neurons[0][0] + 0.35, hidden_neurons[2][0] - 0.35],
@@ -96,8 +93,8 @@ ax.plot([input_neurons[2][0] + 0.35, hidden_neurons[4][0] - 0.35],
         [input_neurons[2][1], hidden_neurons[4][1]], 'blue', alpha=0.6, linewidth=2, zorder=2)
 
 # Hidden to Output (draw all)
-for h_x, h_y in hidden_neurons:
-    ax.plot([h_x + 0.35, output_x - 0.4], [h_y, output_y], 'gray', alpha=0.3, linewidth=1, zorder=1)
+connect(ax, hidden_neurons, [(output_x, output_y)], inset=(0.35, 0.4), color='gray',
+        alpha=0.3, linewidth=1, zorder=1)
 
 # Highlight a few
 ax.plot([hidden_neurons[1][0] + 0.35, output_x - 0.4],
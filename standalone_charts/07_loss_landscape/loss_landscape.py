@@ -27,20 +27,18 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
 
+from chart_helpers.surfaces import contour, contourf, surface
+
 # Set up the figure
 fig = plt.figure(figsize=(14, 6))
 
 # LEFT: 3D Loss Surface
 ax1 = fig.add_subplot(121, projection='3d')
 
-# Create a loss landscape (simplified for visualization)
-w1 = np.linspace(-3, 3, 100)
-w2 = np.linspace(-3, 3, 100)
-W1, W2 = np.meshgrid(w1, w2)
-
-# Create a complex loss surface with a global minimum
-# Using a combination of quadratic and sinusoidal terms
-Loss = (W1**2 + W2**2) / 10 + 0.5 * np.sin(W1) * np.sin(W2) + 2
+# Create a loss landscape (simplified for visualization): a complex loss
+# surface with a global minimum, quadratic plus sinusoidal terms
+landscape = surface('egg_crate', (-3, 3), (-3, 3), n=100)
+W1, W2, Loss = landscape.X, landscape.Y, landscape.Z
 
 # Find the minimum for marking
 min_idx = np.unravel_index(np.argmin(Loss), Loss.shape)
@@ -68,8 +66,8 @@ cbar.set_label('Loss Value', fontsize=9)
 ax2 = fig.add_subplot(122)
 
 # Create contour plot
-contour = ax2.contour(W1, W2, Loss, levels=20, cmap='viridis', linewidths=1.5)
-contourf = ax2.contourf(W1, W2, Loss, levels=20, cmap='viridis', alpha=0.6)
+lines = contour(ax2, landscape, levels=20, cmap='viridis', linewidths=1.5)
+filled = contourf(ax2, landscape, levels=20, cmap='viridis', alpha=0.6)
 
 # Mark the minimum
 ax2.scatter([min_w1], [min_w2], color='red', s=300, marker='*',
@@ -97,7 +95,7 @@ ax2.legend(loc='upper right', fontsize=8)
 ax2.grid(True, alpha=0.3)
 
 # Add colorbar
-cbar2 = fig.colorbar(contourf, ax=ax2)
+cbar2 = fig.colorbar(filled, ax=ax2)
 cbar2.set_label('Loss Value', fontsize=9)
 
 # Add explanation text
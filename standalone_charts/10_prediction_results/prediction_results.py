@@ -26,6 +26,8 @@ CHART_METADATA = {
 import matplotlib.pyplot as plt
 import numpy as np
 
+from chart_helpers.batching import PointBatch
+
 # Set up the figure
 fig = plt.figure(figsize=(14, 10))
 gs = fig.add_gridspec(3, 2, hspace=0.35, wspace=0.3)
@@ -87,11 +89,12 @@ ax_before.bar(x_pos[before_predictions == 0], -np.ones(np.sum(before_predictions
              color='lightcoral', alpha=0.6, label='Predicted: Down', edgecolor='red')
 
 # Mark correct vs incorrect
-for i, (pred, actual, correct) in enumerate(zip(before_predictions, actual_direction, correct_before)):
-    marker = 'o' if correct else 'x'
-    color = 'green' if correct else 'red'
-    y_pos = 1 if pred == 1 else -1
-    ax_before.plot(i, y_pos, marker, color=color, markersize=8, markeredgewidth=2)
+with PointBatch(ax_before) as points:
+    for i, (pred, actual, correct) in enumerate(zip(before_predictions, actual_direction, correct_before)):
+        marker = 'o' if correct else 'x'
+        color = 'green' if correct else 'red'
+        y_pos = 1 if pred == 1 else -1
+        points.marker(i, y_pos, marker, color=color, size=8, edgewidth=2)
 
 ax_before.axhline(y=0, color='black', linewidth=1)
 ax_before.set_xlabel('Day', fontsize=10)
@@ -115,11 +118,12 @@ ax_after.bar(x_pos[after_predictions == 0], -np.ones(np.sum(after_predictions ==
             color='lightcoral', alpha=0.6, label='Predicted: Down', edgecolor='red')
 
 # Mark correct vs incorrect
-for i, (pred, actual, correct) in enumerate(zip(after_predictions, actual_direction, correct_after)):
-    marker = 'o' if correct else 'x'
-    color = 'green' if correct else 'red'
-    y_pos = 1 if pred == 1 else -1
-    ax_after.plot(i, y_pos, marker, color=color, markersize=8, markeredgewidth=2)
+with PointBatch(ax_after) as points:
+    for i, (pred, actual, correct) in enumerate(zip(after_predictions, actual_direction, correct_after)):
+        marker = 'o' if correct else 'x'
+        color = 'green' if correct else 'red'
+        y_pos = 1 if pred == 1 else -1
+        points.marker(i, y_pos, marker, color=color, size=8, edgewidth=2)
 
 ax_after.axhline(y=0, color='black', linewidth=1)
 ax_after.set_xlabel('Day', fontsize=10)
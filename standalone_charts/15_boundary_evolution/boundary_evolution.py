@@ -28,12 +28,15 @@ Chart 15: Decision Boundary Evolution - REAL NEURAL NETWORKS
 Actually trains neural networks with different architectures and plots their learned boundaries.
 """
 
+
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.neural_network import MLPClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import StandardScaler
 
+from chart_helpers.boundary import boundary_grid, plot_boundary
+
 np.random.seed(42)
 
 # Colors
@@ -67,13 +70,16 @@ y = np.concatenate([y1, y0])
 scaler = StandardScaler()
 X_scaled = scaler.fit_transform(X)
 
-# Create meshgrid for decision boundary visualization
+# Decision boundaries are evaluated on an adaptive grid (fine only near the boundary)
 h = 0.01  # step size
 x_min, x_max = X[:, 0].min() - 0.1, X[:, 0].max() + 0.1
 y_min, y_max = X[:, 1].min() - 0.1, X[:, 1].max() + 0.1
-xx, yy = np.meshgrid(np.arange(x_min, x_max, h), np.arange(y_min, y_max, h))
-mesh_data = np.c_[xx.ravel(), yy.ravel()]
-mesh_data_scaled = scaler.transform(mesh_data)
+
+
+def model_grid(model):
+    return boundary_grid(lambda points: model.predict(scaler.transform(points)),
+                         (x_min, x_max), (y_min, y_max), step=h)
+
 
 fig, axes = plt.subplots(1, 4, figsize=(14, 3.5))
 
@@ -85,12 +91,8 @@ model1 = LogisticRegression(random_state=42, max_iter=1000)
 model1.fit(X_scaled, y)
 acc1 = model1.score(X_scaled, y) * 100
 
-# Predict on mesh
-Z1 = model1.predict(mesh_data_scaled).reshape(xx.shape)
-
 ax1 = axes[0]
-ax1.contourf(xx, yy, Z1, levels=1, colors=[mlred, mlgreen], alpha=0.2)
-ax1.contour(xx, yy, Z1, levels=1, colors=[mlpurple], linewidths=3)
+plot_boundary(ax1, model_grid(model1), colors=[mlred, mlgreen], line_color=mlpurple)
 ax1.scatter(X[y==1, 0], X[y==1, 1], c=mlgreen, s=40, alpha=0.7, edgecolors='k', linewidths=0.5)
 ax1.scatter(X[y==0, 0], X[y==0, 1], c=mlred, s=40, alpha=0.7, edgecolors='k', linewidths=0.5)
 ax1.text(0.5, 0.05, f'Accuracy: {acc1:.0f}%', fontsize=10, ha='center', fontweight='bold',
@@ -111,11 +113,8 @@ model2 = MLPClassifier(hidden_layer_sizes=(2,), activation='relu',
 model2.fit(X_scaled, y)
 acc2 = model2.score(X_scaled, y) * 100
 
-Z2 = model2.predict(mesh_data_scaled).reshape(xx.shape)
-
 ax2 = axes[1]
-ax2.contourf(xx, yy, Z2, levels=1, colors=[mlred, mlgreen], alpha=0.2)
-ax2.contour(xx, yy, Z2, levels=1, colors=[mlpurple], linewidths=2)
+plot_boundary(ax2, model_grid(model2), colors=[mlred, mlgreen], line_color=mlpurple, linewidth=2)
 ax2.scatter(X[y==1, 0], X[y==1, 1], c=mlgreen, s=40, alpha=0.7, edgecolors='k', linewidths=0.5)
 ax2.scatter(X[y==0, 0], X[y==0, 1], c=mlred, s=40, alpha=0.7, edgecolors='k', linewidths=0.5)
 ax2.text(0.5, 0.05, f'Accuracy: {acc2:.0f}%', fontsize=10, ha='center', fontweight='bold', color=mlorange)
@@ -135,11 +134,8 @@ model3 = MLPClassifier(hidden_layer_sizes=(4,), activation='relu',
 model3.fit(X_scaled, y)
 acc3 = model3.score(X_scaled, y) * 100
 
-Z3 = model3.predict(mesh_data_scaled).reshape(xx.shape)
-
 ax3 = axes[2]
-ax3.contourf(xx, yy, Z3, levels=1, colors=[mlred, mlgreen], alpha=0.2)
-ax3.contour(xx, yy, Z3, levels=1, colors=[mlblue], linewidths=3)
+plot_boundary(ax3, model_grid(model3), colors=[mlred, mlgreen], line_color=mlblue)
 ax3.scatter(X[y==1, 0], X[y==1, 1], c=mlgreen, s=40, alpha=0.7, edgecolors='k', linewidths=0.5)
 ax3.scatter(X[y==0, 0], X[y==0, 1], c=mlred, s=40, alpha=0.7, edgecolors='k', linewidths=0.5)
 ax3.text(0.5, 0.05, f'Accuracy: {acc3:.0f}%', fontsize=10, ha='center', fontweight='bold', color=mlblue)
@@ -159,11 +155,8 @@ model4 = MLPClassifier(hidden_layer_sizes=(10,), activation='relu',
 model4.fit(X_scaled, y)
 acc4 = model4.score(X_scaled, y) * 100
 
-Z4 = model4.predict(mesh_data_scaled).reshape(xx.shape)
-
 ax4 = axes[3]
-ax4.contourf(xx, yy, Z4, levels=1, colors=[mlred, mlgreen], alpha=0.2)
-ax4.contour(xx, yy, Z4, levels=1, colors=[mlgreen], linewidths=3)
+plot_boundary(ax4, model_grid(model4), colors=[mlred, mlgreen], line_color=mlgreen)
 ax4.scatter(X[y==1, 0], X[y==1, 1], c=mlgreen, s=40, alpha=0.7, edgecolors='k', linewidths=0.5, label='Buy')
 ax4.scatter(X[y==0, 0], X[y==0, 1], c=mlred, s=40, alpha=0.7, edgecolors='k', linewidths=0.5, label='Sell')
 ax4.text(0.5, 0.05, f'Accuracy: {acc4:.0f}%', fontsize=10, ha='center', fontweight='bold', color=mlgreen)
@@ -2,20 +2,30 @@
 Sync selective content to QuantLet repository.
 
 Content rules:
-- Chart folders: ALL files (Python, PDF, PNG, QR codes)
+- Chart folders: ALL files (Python, PDF, PNG, QR codes), plus a copy of
+  the chart_helpers package in folders whose chart imports it
 - Outside charts: ONLY latest compiled PDF
 - Flatten module charts to root level
+- Chart PNGs are shipped at the preview tier from build_config.json
+  ("sync_png_tier", see build_tools/assets.py); "full" ships the 300-dpi masters
 
 Usage:
     python sync_to_quantlet.py
+    python sync_to_quantlet.py --png-tier full
 """
 
+import argparse
 import os
 import shutil
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from build_tools.assets import FULL_TIER, build_previews, pick_tier
+from build_tools.cache import HELPERS_DIR, uses_helpers
+from build_tools.config import load_config
+from build_tools.registry import MODULES, load_index
+from build_tools.trace import run, span, traced
+
 
 def get_project_root():
     return Path(__file__).parent
@@ -30,14 +40,40 @@ def get_latest_pdf(project_root):
     return max(pdfs, key=lambda p: p.stat().st_mtime)
 
 
-def sync_to_quantlet():
+def copy_chart(chart, dest, manifest, png_tier):
+    """Copy a chart folder, replacing its PNG by the chosen preview tier."""
+    shutil.copytree(chart.dir, dest)
+    if chart.script is not None and uses_helpers(chart.script):
+        shutil.copytree(HELPERS_DIR, dest / HELPERS_DIR.name,
+                        ignore=shutil.ignore_patterns('__pycache__'))
+    master = chart.output('.png')
+    if manifest is None or master is None:
+        return
+    preview = pick_tier(manifest, master, png_tier)
+    if preview != master:
+        shutil.copy2(preview, dest / master.name)
+
+
+@traced('sync_to_quantlet')
+def sync_to_quantlet(png_tier=None):
     project_root = get_project_root()
     staging_dir = project_root / 'temp_quantlet'
+    index = load_index(project_root)
+    if png_tier is None:
+        png_tier = load_config().get('sync_png_tier', FULL_TIER)
 
     print("=" * 60)
     print("Syncing to QuantLet repository")
     print("=" * 60)
 
+    manifest = None
+    if png_tier != FULL_TIER:
+        with span('build previews', 'sync'):
+            manifest, rebuilt = build_previews(project_root)
+        if png_tier not in manifest['tiers']:
+            raise ValueError(f"Unknown PNG tier: {png_tier} (available: {', '.join(manifest['tiers'])})")
+        print(f"\n--- PNG tier: {png_tier} px ({len(rebuilt)} previews rebuilt) ---")
+
     # Clean staging directory
     if staging_dir.exists():
         shutil.rmtree(staging_dir)
@@ -47,40 +83,23 @@ def sync_to_quantlet():
 
     # 1. Copy numbered chart folders (01_*, 02_*, etc.)
     print("\n--- Copying numbered chart folders ---")
-    for folder in sorted(project_root.iterdir()):
-        if folder.is_dir() and folder.name[:2].isdigit() and folder.name[2] == '_':
-            dest = staging_dir / folder.name
-            shutil.copytree(folder, dest)
-            print(f"  [OK] {folder.name}")
-            copied_charts += 1
+    for chart in index.charts(groups=['.']):
+        dest = staging_dir / chart.name
+        copy_chart(chart, dest, manifest, png_tier)
+        print(f"  [OK] {chart.name}")
+        copied_charts += 1
 
     # 2. Flatten module*/charts/* folders to root
     print("\n--- Flattening module charts ---")
-    modules = [
-        'module1_perceptron',
-        'module2_mlp',
-        'module3_training',
-        'module4_applications',
-        'appendix'
-    ]
-
-    for module in modules:
-        charts_dir = project_root / module / 'charts'
-        if not charts_dir.exists():
+    for chart in index.charts(groups=MODULES):
+        dest = staging_dir / chart.name
+        if dest.exists():
+            print(f"  [SKIP] {chart.name} (already exists)")
             continue
 
-        for chart_folder in sorted(charts_dir.iterdir()):
-            if not chart_folder.is_dir():
-                continue
-
-            dest = staging_dir / chart_folder.name
-            if dest.exists():
-                print(f"  [SKIP] {chart_folder.name} (already exists)")
-                continue
-
-            shutil.copytree(chart_folder, dest)
-            print(f"  [OK] {chart_folder.name} (from {module})")
-            copied_charts += 1
+        copy_chart(chart, dest, manifest, png_tier)
+        print(f"  [OK] {chart.name} (from {chart.group})")
+        copied_charts += 1
 
     # 3. Copy latest compiled PDF
     print("\n--- Copying latest PDF ---")
@@ -99,18 +118,18 @@ def sync_to_quantlet():
     # Initialize git if needed
     git_dir = staging_dir / '.git'
     if not git_dir.exists():
-        subprocess.run(['git', 'init'], check=True, capture_output=True)
-        subprocess.run(['git', 'remote', 'add', 'origin',
-                       'https://github.com/QuantLet/neural-networks-introduction.git'],
-                       check=True, capture_output=True)
+        run(['git', 'init'], check=True, capture_output=True)
+        run(['git', 'remote', 'add', 'origin',
+             'https://github.com/QuantLet/neural-networks-introduction.git'],
+            check=True, capture_output=True)
         print("  [OK] Git initialized")
 
     # Add all files
-    subprocess.run(['git', 'add', '-A'], check=True, capture_output=True)
+    run(['git', 'add', '-A'], check=True, capture_output=True)
 
     # Check if there are changes
-    result = subprocess.run(['git', 'status', '--porcelain'],
-                           capture_output=True, text=True)
+    result = run(['git', 'status', '--porcelain'],
+                 capture_output=True, text=True)
 
     if not result.stdout.strip():
         print("  [INFO] No changes to commit")
@@ -118,21 +137,21 @@ def sync_to_quantlet():
         # Commit
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
         commit_msg = f"Sync charts and PDF - {timestamp}"
-        subprocess.run(['git', 'commit', '-m', commit_msg],
-                       check=True, capture_output=True)
+        run(['git', 'commit', '-m', commit_msg],
+            check=True, capture_output=True)
         print(f"  [OK] Committed: {commit_msg}")
 
     # Force push to QuantLet
     print("\n--- Pushing to QuantLet ---")
-    result = subprocess.run(['git', 'push', '--force', 'origin', 'main'],
-                           capture_output=True, text=True)
+    result = run(['git', 'push', '--force', 'origin', 'main'],
+                 capture_output=True, text=True)
 
     if result.returncode == 0:
         print("  [OK] Pushed to QuantLet")
     else:
         # Try with HEAD:main for first push
-        result = subprocess.run(['git', 'push', '--force', 'origin', 'HEAD:main'],
-                               capture_output=True, text=True)
+        result = run(['git', 'push', '--force', 'origin', 'HEAD:main'],
+                     capture_output=True, text=True)
         if result.returncode == 0:
             print("  [OK] Pushed to QuantLet (HEAD:main)")
         else:
@@ -149,4 +168,8 @@ def sync_to_quantlet():
 
 
 if __name__ == '__main__':
-    sync_to_quantlet()
+    parser = argparse.ArgumentParser(description='Sync charts and PDF to QuantLet')
+    parser.add_argument('--png-tier', default=None,
+                        help="PNG tier to ship (e.g. 1600, 800, 'full'; default: build_config.json)")
+    args = parser.parse_args()
+    sync_to_quantlet(png_tier=args.png_tier)